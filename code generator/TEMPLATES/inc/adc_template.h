@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : adc.h
   * @brief          : Header for adc.c file. Contains ADC peripheral configurations.
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -20,9 +20,30 @@ extern "C" {
 
 /* ADC Handle Declaration ----------------------------------------------------*/
 extern ADC_HandleTypeDef hadc1;
+{% if adc.dma %}
+extern DMA_HandleTypeDef hdma_adc1;
+{% endif %}
+
+/* ADC1 settings -------------------------------------------------------------*/
+#define ADC1_CHANNEL        {{ adc.channel }}   /* Input of the ANALOG pin */
+{% if adc.streaming %}
+#define ADC1_FULL_SCALE     {{ adc.full_scale }}U   /* Largest result ({{ adc.oversampling_ratio }}x oversampling) */
+{% if adc.mode == "TIMER" %}
+#define ADC1_SAMPLE_RATE_HZ {{ adc.sample_rate_hz }}U
+{% endif %}
+{% if adc.dma %}
+#define ADC1_BUFFER_LEN     {{ adc.buffer_length }}U   /* Results kept by the circular DMA */
+{% endif %}
+{% endif %}
 
 /* Function Prototypes -------------------------------------------------------*/
 void MX_ADC_Init(void);
+{% if adc.streaming %}
+uint16_t ADC_GetLatest(void);
+{% if adc.dma %}
+uint16_t ADC_GetAverage(void);
+{% endif %}
+{% endif %}
 
 #ifdef __cplusplus
 }
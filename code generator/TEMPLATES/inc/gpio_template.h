@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : gpio.h
   * @brief          : Header for gpio.c file. Contains GPIO pin configurations.
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
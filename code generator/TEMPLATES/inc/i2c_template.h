@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : i2c.h
   * @brief          : Header for i2c.c file. Contains I2C peripheral configurations.
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -20,6 +20,10 @@ extern "C" {
 {% for i2c in i2c_interfaces %}
 extern I2C_HandleTypeDef hi2c{{ i2c.num }};
 {% endfor %}
+{% for i2c in i2c_interfaces if i2c.dma %}
+extern DMA_HandleTypeDef hdma_{{ i2c.dma_name }}_tx;
+extern DMA_HandleTypeDef hdma_{{ i2c.dma_name }}_rx;
+{% endfor %}
 
 /* --- I2C Slave Device Addresses --- */
 {% for i2c in i2c_interfaces %}
@@ -39,6 +43,26 @@ HAL_StatusTypeDef I2C_Write(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8
 HAL_StatusTypeDef I2C_Read(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8_t *buffer, uint16_t size);
 HAL_StatusTypeDef I2C_Read_Register(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8_t reg_address, uint8_t *buffer);
 HAL_StatusTypeDef I2C_Write_Register(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8_t reg_address, uint8_t value);
+{% if i2c_interfaces | selectattr("irq") | list %}
+
+/* --- Asynchronous requests (Interrupt/DMA buses) ---
+ * Requests run in order on their bus; the buffer must stay valid until the
+ * callback, which normally runs in interrupt context. HAL_BUSY: the queue is full. */
+#ifndef I2C_QUEUE_LEN
+#define I2C_QUEUE_LEN 8U    /* Requests per bus, a power of two */
+#endif
+
+typedef void (*I2C_Callback)(HAL_StatusTypeDef status, void *ctx);
+
+HAL_StatusTypeDef I2C_ReadRegsAsync(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8_t reg,
+                                    uint8_t *buffer, uint16_t size, I2C_Callback callback, void *ctx);
+HAL_StatusTypeDef I2C_WriteRegsAsync(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8_t reg,
+                                     const uint8_t *data, uint16_t size, I2C_Callback callback, void *ctx);
+HAL_StatusTypeDef I2C_WriteAsync(I2C_HandleTypeDef *hi2c, uint16_t dev_address,
+                                 const uint8_t *data, uint16_t size, I2C_Callback callback, void *ctx);
+uint8_t I2C_Pending(I2C_HandleTypeDef *hi2c);    /* Queued requests, including the running one */
+HAL_StatusTypeDef I2C_Sync(I2C_HandleTypeDef *hi2c, uint32_t timeout);
+{% endif %}
 
 
 #ifdef __cplusplus
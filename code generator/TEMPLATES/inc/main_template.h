@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : main.h
   * @brief          : Header for main.c file. Contains the common defines of the application.
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
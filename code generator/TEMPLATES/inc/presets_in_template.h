@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : presets_in.h
   * @brief          : Header for presets_in.c file. Contains preset input sensor function prototypes.
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : presets_out.h
   * @brief          : Header for presets_out.c file. Contains preset output actuator function prototypes.
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -30,6 +30,7 @@ void LCD_Init(void);
 void LCD_Clear(void);
 void LCD_SendString(const char *s);
 void LCD_SetCursor(uint8_t row, uint8_t col);
+void LCD_Refresh(void);     /* Sends the text changed since the last refresh */
 {% endif %}
 
 {% if OUT.uart %}
@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : uart.h
   * @brief          : Header for uart.c file. Contains UART/USART peripheral configurations.
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -22,12 +22,30 @@ extern "C" {
 {% for uart in uart_interfaces %}
 extern UART_HandleTypeDef huart{{ uart.num }};
 {% endfor %}
+{% for uart in uart_interfaces if uart.dma %}
+extern DMA_HandleTypeDef hdma_{{ uart.dma_name }}_tx;
+extern DMA_HandleTypeDef hdma_{{ uart.dma_name }}_rx;
+{% endfor %}
+{% for uart in uart_interfaces if uart.dma %}
+
+/* TX ring buffer size of huart{{ uart.num }} (DMA mode), a power of two */
+#ifndef UART{{ uart.num }}_TX_RING_SIZE
+#define UART{{ uart.num }}_TX_RING_SIZE {{ uart.tx_buffer_size }}U
+#endif
+{% endfor %}
 
 /* --- Function Prototypes --- */
 void MX_UART_Init(void);
 
 HAL_StatusTypeDef UART_Transmit(UART_HandleTypeDef *huart, uint8_t *data, uint16_t size, uint32_t timeout);
 HAL_StatusTypeDef UART_Receive (UART_HandleTypeDef *huart, uint8_t *buffer, uint16_t size, uint32_t timeout);
+{% if uart_interfaces | selectattr("dma") | list %}
+
+/* DMA mode: queue bytes for transmission and return at once */
+uint16_t UART_Write(UART_HandleTypeDef *huart, const uint8_t *data, uint16_t size);  /* Returns the bytes queued */
+uint16_t UART_TxPending(UART_HandleTypeDef *huart);
+HAL_StatusTypeDef UART_TxFlush(UART_HandleTypeDef *huart, uint32_t timeout);
+{% endif %}
 
 
 
@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : adc.c
   * @brief          : ADC Peripheral Configuration
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -12,6 +12,34 @@
 
 /* ADC Handle Definition */
 ADC_HandleTypeDef hadc1;
+{% if adc.dma %}
+DMA_HandleTypeDef hdma_adc1;
+
+/* Results of the circular DMA, oldest overwritten first */
+static volatile uint16_t adc1_buffer[ADC1_BUFFER_LEN];
+{% endif %}
+{% if adc.mode == "TIMER" %}
+
+/* TIM6 update events trigger the conversions (registers set directly, no HAL TIM needed) */
+static void ADC_TriggerTimer_Init(void)
+{
+  __HAL_RCC_TIM6_CLK_ENABLE();
+
+  /* APB1 timer clock: PCLK1, doubled when APB1 is divided */
+  uint32_t clk = HAL_RCC_GetPCLK1Freq();
+  if ((RCC->CFGR & RCC_CFGR_PPRE1_2) != 0U)
+  {
+    clk *= 2U;
+  }
+  uint32_t ticks = clk / ADC1_SAMPLE_RATE_HZ;
+  uint32_t prescaler = (ticks - 1U) / 65536U;
+
+  TIM6->PSC = prescaler;
+  TIM6->ARR = ticks / (prescaler + 1U) - 1U;
+  TIM6->CR2 = TIM_CR2_MMS_1;  /* TRGO on update */
+  TIM6->EGR = TIM_EGR_UG;     /* Load PSC/ARR */
+}
+{% endif %}
 
 /**
   * @brief ADC1 Initialization Function
@@ -32,14 +60,40 @@ void MX_ADC_Init(void)
   hadc1.Init.ScanConvMode = ADC_SCAN_DISABLE;
   hadc1.Init.EOCSelection = ADC_EOC_SINGLE_CONV;
   hadc1.Init.LowPowerAutoWait = DISABLE;
+{% if adc.mode == "CONTINUOUS" %}
+  hadc1.Init.ContinuousConvMode = ENABLE;
+{% else %}
   hadc1.Init.ContinuousConvMode = DISABLE;
+{% endif %}
   hadc1.Init.NbrOfConversion = 1;
   hadc1.Init.DiscontinuousConvMode = DISABLE;
+{% if adc.mode == "TIMER" %}
+  hadc1.Init.ExternalTrigConv = ADC_EXTERNALTRIG_T6_TRGO;
+  hadc1.Init.ExternalTrigConvEdge = ADC_EXTERNALTRIGCONVEDGE_RISING;
+{% else %}
   hadc1.Init.ExternalTrigConv = ADC_SOFTWARE_START;
   hadc1.Init.ExternalTrigConvEdge = ADC_EXTERNALTRIGCONVEDGE_NONE;
+{% endif %}
+{% if adc.dma %}
+  hadc1.Init.DMAContinuousRequests = ENABLE;
+{% else %}
   hadc1.Init.DMAContinuousRequests = DISABLE;
+{% endif %}
+{% if adc.streaming %}
+  hadc1.Init.Overrun = ADC_OVR_DATA_OVERWRITTEN;  // Always keep the newest result
+{% else %}
   hadc1.Init.Overrun = ADC_OVR_DATA_PRESERVED;
+{% endif %}
+{% if adc.oversampling %}
+  /* Hardware oversampling: each result is the average of {{ adc.oversampling_ratio }} conversions */
+  hadc1.Init.OversamplingMode = ENABLE;
+  hadc1.Init.Oversampling.Ratio = ADC_OVERSAMPLING_RATIO_{{ adc.oversampling_ratio }};
+  hadc1.Init.Oversampling.RightBitShift = {{ adc.oversampling_shift }};
+  hadc1.Init.Oversampling.TriggeredMode = ADC_TRIGGEREDMODE_SINGLE_TRIGGER;
+  hadc1.Init.Oversampling.OversamplingStopReset = ADC_REGOVERSAMPLING_CONTINUED_MODE;
+{% else %}
   hadc1.Init.OversamplingMode = DISABLE;
+{% endif %}
 
   if (HAL_ADC_Init(&hadc1) != HAL_OK)
   {
@@ -58,7 +112,65 @@ void MX_ADC_Init(void)
   {
     Error_Handler();
   }
+{% if adc.streaming %}
+
+  /* Converted channel */
+  sConfig.Channel = ADC1_CHANNEL;
+  sConfig.Rank = ADC_REGULAR_RANK_1;
+  sConfig.SamplingTime = {{ adc.sample_time }};
+  sConfig.SingleDiff = ADC_SINGLE_ENDED;
+  sConfig.OffsetNumber = ADC_OFFSET_NONE;
+  sConfig.Offset = 0;
+  if (HAL_ADC_ConfigChannel(&hadc1, &sConfig) != HAL_OK)
+  {
+    Error_Handler();
+  }
+
+  /* Start converting in the background */
+{% if adc.mode == "TIMER" %}
+  ADC_TriggerTimer_Init();
+{% endif %}
+{% if adc.dma %}
+  /* DMA interrupts stay disabled in the NVIC: no CPU work per sample */
+  if (HAL_ADC_Start_DMA(&hadc1, (uint32_t *)adc1_buffer, ADC1_BUFFER_LEN) != HAL_OK)
+{% else %}
+  if (HAL_ADC_Start(&hadc1) != HAL_OK)
+{% endif %}
+  {
+    Error_Handler();
+  }
+{% if adc.mode == "TIMER" %}
+  TIM6->CR1 |= TIM_CR1_CEN;
+{% endif %}
+{% endif %}
+}
+{% if adc.streaming %}
+
+/* Latest result ({{ adc.mode | lower }} mode, 0..ADC1_FULL_SCALE) */
+uint16_t ADC_GetLatest(void)
+{
+{% if adc.dma %}
+  /* The DMA counter tells which slot it writes next */
+  uint32_t next = ADC1_BUFFER_LEN - __HAL_DMA_GET_COUNTER(hadc1.DMA_Handle);
+  return adc1_buffer[(next + ADC1_BUFFER_LEN - 1U) % ADC1_BUFFER_LEN];
+{% else %}
+  return (uint16_t)HAL_ADC_GetValue(&hadc1);
+{% endif %}
+}
+{% if adc.dma %}
+
+/* Mean of the last ADC1_BUFFER_LEN results */
+uint16_t ADC_GetAverage(void)
+{
+  uint32_t sum = 0;
+  for (uint32_t i = 0; i < ADC1_BUFFER_LEN; i++)
+  {
+    sum += adc1_buffer[i];
+  }
+  return (uint16_t)(sum / ADC1_BUFFER_LEN);
 }
+{% endif %}
+{% endif %}
 
 /* MSP Init - GPIO and Clock Configuration */
 void HAL_ADC_MspInit(ADC_HandleTypeDef* adcHandle)
@@ -79,6 +191,26 @@ void HAL_ADC_MspInit(ADC_HandleTypeDef* adcHandle)
     __HAL_RCC_ADC12_CLK_ENABLE();
     
     /* GPIO pins are already configured in gpio.c */
+{% if adc.dma %}
+
+    /* ADC1 DMA on {{ adc.dma.instance }}: circular, one halfword per result */
+    __HAL_RCC_DMAMUX1_CLK_ENABLE();
+    __HAL_RCC_{{ adc.dma.controller }}_CLK_ENABLE();
+    hdma_adc1.Instance                 = {{ adc.dma.instance }};
+    hdma_adc1.Init.Request             = DMA_REQUEST_{{ adc.dma.request }};
+    hdma_adc1.Init.Direction           = DMA_PERIPH_TO_MEMORY;
+    hdma_adc1.Init.PeriphInc           = DMA_PINC_DISABLE;
+    hdma_adc1.Init.MemInc              = DMA_MINC_ENABLE;
+    hdma_adc1.Init.PeriphDataAlignment = DMA_PDATAALIGN_HALFWORD;
+    hdma_adc1.Init.MemDataAlignment    = DMA_MDATAALIGN_HALFWORD;
+    hdma_adc1.Init.Mode                = DMA_CIRCULAR;
+    hdma_adc1.Init.Priority            = DMA_PRIORITY_LOW;
+    if (HAL_DMA_Init(&hdma_adc1) != HAL_OK)
+    {
+      Error_Handler();
+    }
+    __HAL_LINKDMA(adcHandle, DMA_Handle, hdma_adc1);
+{% endif %}
   }
 }
 
@@ -88,6 +220,9 @@ void HAL_ADC_MspDeInit(ADC_HandleTypeDef* adcHandle)
   {
     /* Peripheral clock disable */
     __HAL_RCC_ADC12_CLK_DISABLE();
+{% if adc.dma %}
+    HAL_DMA_DeInit(adcHandle->DMA_Handle);
+{% endif %}
   }
 }
 
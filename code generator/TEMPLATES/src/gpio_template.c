@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : gpio.c
   * @brief          : GPIO Initialization and Configuration
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -2,21 +2,197 @@
   ******************************************************************************
   * @file           : i2c.c
   * @brief          : I2C Peripheral Configuration
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
 
 #include "i2c.h"
+{% set async_buses = i2c_interfaces | selectattr("irq") | list %}
+{% set dma_buses = i2c_interfaces | selectattr("dma") | list %}
 
 // --- Handles Declaration ---
 {% for i2c in i2c_interfaces %}
 I2C_HandleTypeDef hi2c{{ i2c.num }};
 {% endfor %}
+{% for i2c in dma_buses %}
+DMA_HandleTypeDef hdma_{{ i2c.dma_name }}_tx;
+DMA_HandleTypeDef hdma_{{ i2c.dma_name }}_rx;
+{% endfor %}
+{% if async_buses %}
+
+// --- Asynchronous request queues ---
+/*
+ * One queue per bus in Interrupt/DMA mode. Requests are added with
+ * I2C_ReadRegsAsync/I2C_WriteRegsAsync/I2C_WriteAsync (from the main loop or
+ * from a completion callback) and run one after the other from the I2C
+ * interrupts; each request's callback is called, in interrupt context, when
+ * it completes. head/tail are free-running 8-bit indexes.
+ */
+typedef struct
+{
+    uint16_t dev_address;
+    uint8_t reg;
+    uint8_t kind;               /* I2C_REQ_* */
+    uint8_t *data;
+    uint16_t size;
+    I2C_Callback callback;
+    void *ctx;
+} I2C_Request;
+
+enum { I2C_REQ_READ_REGS, I2C_REQ_WRITE_REGS, I2C_REQ_WRITE };
+
+typedef struct
+{
+    I2C_HandleTypeDef *hi2c;
+    uint8_t use_dma;
+    I2C_Request req[I2C_QUEUE_LEN];
+    volatile uint8_t head;      /* Next free slot */
+    volatile uint8_t tail;      /* Request on the bus (or next to start) */
+    volatile uint8_t busy;      /* 1 while a request is on the bus */
+} I2C_Queue;
+
+{% for i2c in async_buses %}
+static I2C_Queue i2c{{ i2c.num }}_queue = { .hi2c = &hi2c{{ i2c.num }}, .use_dma = {{ 1 if i2c.dma else 0 }}U };
+{% endfor %}
+
+static I2C_Queue *I2C_QueueOf(I2C_HandleTypeDef *hi2c)
+{
+{% for i2c in async_buses %}
+    if (hi2c == &hi2c{{ i2c.num }}) return &i2c{{ i2c.num }}_queue;
+{% endfor %}
+    return NULL;
+}
+
+static uint8_t I2C_Claim(volatile uint8_t *busy)
+{
+    do
+    {
+        if (__LDREXB(busy) != 0U)
+        {
+            __CLREX();
+            return 0U;
+        }
+    } while (__STREXB(1U, busy) != 0U);
+    __DMB();
+    return 1U;
+}
+
+static HAL_StatusTypeDef I2C_Start(I2C_Queue *q, const I2C_Request *r)
+{
+    switch (r->kind)
+    {
+    case I2C_REQ_READ_REGS:
+        return q->use_dma
+            ? HAL_I2C_Mem_Read_DMA(q->hi2c, r->dev_address, r->reg, I2C_MEMADD_SIZE_8BIT, r->data, r->size)
+            : HAL_I2C_Mem_Read_IT(q->hi2c, r->dev_address, r->reg, I2C_MEMADD_SIZE_8BIT, r->data, r->size);
+    case I2C_REQ_WRITE_REGS:
+        return q->use_dma
+            ? HAL_I2C_Mem_Write_DMA(q->hi2c, r->dev_address, r->reg, I2C_MEMADD_SIZE_8BIT, r->data, r->size)
+            : HAL_I2C_Mem_Write_IT(q->hi2c, r->dev_address, r->reg, I2C_MEMADD_SIZE_8BIT, r->data, r->size);
+    default:
+        return q->use_dma
+            ? HAL_I2C_Master_Transmit_DMA(q->hi2c, r->dev_address, r->data, r->size)
+            : HAL_I2C_Master_Transmit_IT(q->hi2c, r->dev_address, r->data, r->size);
+    }
+}
+
+/* Removes the request at the tail and reports it; the bus is released first,
+ * so the callback may queue the next request. */
+static void I2C_Finish(I2C_Queue *q, HAL_StatusTypeDef status)
+{
+    I2C_Request r = q->req[q->tail & (I2C_QUEUE_LEN - 1U)];
+    q->tail = (uint8_t)(q->tail + 1U);
+    __DMB();
+    q->busy = 0U;
+    if (r.callback != NULL)
+    {
+        r.callback(status, r.ctx);
+    }
+}
+
+/* Starts the next queued request unless one is already on the bus. */
+static void I2C_Kick(I2C_Queue *q)
+{
+    while (q->head != q->tail && I2C_Claim(&q->busy))
+    {
+        if (q->head == q->tail)
+        {
+            /* Emptied by an interrupt between the check and the claim */
+            __DMB();
+            q->busy = 0U;
+            return;
+        }
+        HAL_StatusTypeDef status = I2C_Start(q, &q->req[q->tail & (I2C_QUEUE_LEN - 1U)]);
+        if (status == HAL_OK)
+        {
+            return;
+        }
+        I2C_Finish(q, status);  /* Could not start (bus taken by a blocking call): report and go on */
+    }
+}
+
+static HAL_StatusTypeDef I2C_Submit(I2C_HandleTypeDef *hi2c, uint8_t kind, uint16_t dev_address, uint8_t reg,
+                                    uint8_t *data, uint16_t size, I2C_Callback callback, void *ctx)
+{
+    I2C_Queue *q = I2C_QueueOf(hi2c);
+    if (q == NULL || data == NULL || size == 0U)
+    {
+        return HAL_ERROR;
+    }
+    /* Short critical section: requests may come from the main loop and from callbacks */
+    uint32_t primask = __get_PRIMASK();
+    __disable_irq();
+    uint8_t head = q->head;
+    if ((uint8_t)(head - q->tail) >= I2C_QUEUE_LEN)
+    {
+        __set_PRIMASK(primask);
+        return HAL_BUSY;
+    }
+    I2C_Request *r = &q->req[head & (I2C_QUEUE_LEN - 1U)];
+    r->dev_address = dev_address;
+    r->reg = reg;
+    r->kind = kind;
+    r->data = data;
+    r->size = size;
+    r->callback = callback;
+    r->ctx = ctx;
+    __DMB();
+    q->head = (uint8_t)(head + 1U);
+    __set_PRIMASK(primask);
+
+    I2C_Kick(q);
+    return HAL_OK;
+}
+
+static void I2C_Complete(I2C_HandleTypeDef *hi2c, HAL_StatusTypeDef status)
+{
+    I2C_Queue *q = I2C_QueueOf(hi2c);
+    if (q != NULL && q->busy)
+    {
+        I2C_Finish(q, status);
+        I2C_Kick(q);
+    }
+}
+{% endif %}
 
 // --- MX_I2C_Init Function ---
 void MX_I2C_Init(void)
 {
+{% if dma_buses %}
+    /* DMA clocks and channel interrupts (the channels are set up in HAL_I2C_MspInit) */
+    __HAL_RCC_DMAMUX1_CLK_ENABLE();
+{% for controller in dma_controllers %}
+    __HAL_RCC_{{ controller }}_CLK_ENABLE();
+{% endfor %}
+{% for i2c in dma_buses %}
+    HAL_NVIC_SetPriority({{ i2c.dma_tx.irqn }}, 5, 0);
+    HAL_NVIC_EnableIRQ({{ i2c.dma_tx.irqn }});
+    HAL_NVIC_SetPriority({{ i2c.dma_rx.irqn }}, 5, 0);
+    HAL_NVIC_EnableIRQ({{ i2c.dma_rx.irqn }});
+{% endfor %}
+
+{% endif %}
 {% for i2c in i2c_interfaces %}
     /* {{ i2c.interface }} */
     __HAL_RCC_{{ i2c.interface }}_CLK_ENABLE();  // só o clock do PERIFÉRICO aqui
@@ -39,15 +215,132 @@ void MX_I2C_Init(void)
     /* Filters */
     if (HAL_I2CEx_ConfigAnalogFilter(&hi2c{{ i2c.num }}, I2C_ANALOGFILTER_ENABLE) != HAL_OK) { Error_Handler(); }
     if (HAL_I2CEx_ConfigDigitalFilter(&hi2c{{ i2c.num }}, 0) != HAL_OK) { Error_Handler(); }
+{% if i2c.irq %}
+
+    /* Event and error interrupts ({{ i2c.transferMode }} mode) */
+    HAL_NVIC_SetPriority({{ i2c.interface }}_EV_IRQn, 5, 0);
+    HAL_NVIC_EnableIRQ({{ i2c.interface }}_EV_IRQn);
+    HAL_NVIC_SetPriority({{ i2c.interface }}_ER_IRQn, 5, 0);
+    HAL_NVIC_EnableIRQ({{ i2c.interface }}_ER_IRQn);
+{% endif %}
 {% endfor %}
 }
 
 /* MSP: NÃO configurar GPIO aqui (pinmux e __HAL_RCC_GPIOx_CLK_ENABLE ficam no gpio.c) */
 void HAL_I2C_MspInit(I2C_HandleTypeDef* i2cHandle)
 {
+{% if not dma_buses %}
     (void)i2cHandle;
     /* Intencionalmente vazio. Se quiser NVIC/DMA, configure aqui. */
+{% endif %}
+{% for i2c in dma_buses %}
+{% for dir, direction in (("tx", "DMA_MEMORY_TO_PERIPH"), ("rx", "DMA_PERIPH_TO_MEMORY")) %}
+{% set ch = i2c["dma_" ~ dir] %}
+{% set h = "hdma_" ~ i2c.dma_name ~ "_" ~ dir %}
+{% if loop.first %}
+    if (i2cHandle->Instance == {{ i2c.interface }})
+    {
+{% else %}
+
+{% endif %}
+        /* {{ ch.request }} DMA on {{ ch.instance }} */
+        {{ h }}.Instance                 = {{ ch.instance }};
+        {{ h }}.Init.Request             = DMA_REQUEST_{{ ch.request }};
+        {{ h }}.Init.Direction           = {{ direction }};
+        {{ h }}.Init.PeriphInc           = DMA_PINC_DISABLE;
+        {{ h }}.Init.MemInc              = DMA_MINC_ENABLE;
+        {{ h }}.Init.PeriphDataAlignment = DMA_PDATAALIGN_BYTE;
+        {{ h }}.Init.MemDataAlignment    = DMA_MDATAALIGN_BYTE;
+        {{ h }}.Init.Mode                = DMA_NORMAL;
+        {{ h }}.Init.Priority            = DMA_PRIORITY_LOW;
+        if (HAL_DMA_Init(&{{ h }}) != HAL_OK)
+        {
+            Error_Handler();
+        }
+        __HAL_LINKDMA(i2cHandle, hdma{{ dir }}, {{ h }});
+{% endfor %}
+    }
+{% endfor %}
+}
+{% if async_buses %}
+
+/*
+ * ----------------------------------------------------------------
+ * --- Interrupt handlers (Interrupt and DMA transfer modes) ---
+ * ----------------------------------------------------------------
+ */
+{% for i2c in async_buses %}
+void {{ i2c.interface }}_EV_IRQHandler(void)
+{
+    HAL_I2C_EV_IRQHandler(&hi2c{{ i2c.num }});
+}
+
+void {{ i2c.interface }}_ER_IRQHandler(void)
+{
+    HAL_I2C_ER_IRQHandler(&hi2c{{ i2c.num }});
+}
+
+{% endfor %}
+{% for i2c in dma_buses %}
+void {{ i2c.dma_tx.irq_handler }}(void)
+{
+    HAL_DMA_IRQHandler(&hdma_{{ i2c.dma_name }}_tx);
+}
+
+void {{ i2c.dma_rx.irq_handler }}(void)
+{
+    HAL_DMA_IRQHandler(&hdma_{{ i2c.dma_name }}_rx);
+}
+
+{% endfor %}
+void HAL_I2C_MemRxCpltCallback(I2C_HandleTypeDef *hi2c)    { I2C_Complete(hi2c, HAL_OK); }
+void HAL_I2C_MemTxCpltCallback(I2C_HandleTypeDef *hi2c)    { I2C_Complete(hi2c, HAL_OK); }
+void HAL_I2C_MasterTxCpltCallback(I2C_HandleTypeDef *hi2c) { I2C_Complete(hi2c, HAL_OK); }
+void HAL_I2C_ErrorCallback(I2C_HandleTypeDef *hi2c)        { I2C_Complete(hi2c, HAL_ERROR); }
+void HAL_I2C_AbortCpltCallback(I2C_HandleTypeDef *hi2c)    { I2C_Complete(hi2c, HAL_ERROR); }
+
+/*
+ * ----------------------------------------------------------------
+ * --- Asynchronous requests (Interrupt and DMA transfer modes) ---
+ * ----------------------------------------------------------------
+ */
+HAL_StatusTypeDef I2C_ReadRegsAsync(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8_t reg,
+                                    uint8_t *buffer, uint16_t size, I2C_Callback callback, void *ctx)
+{
+    return I2C_Submit(hi2c, I2C_REQ_READ_REGS, dev_address, reg, buffer, size, callback, ctx);
+}
+
+HAL_StatusTypeDef I2C_WriteRegsAsync(I2C_HandleTypeDef *hi2c, uint16_t dev_address, uint8_t reg,
+                                     const uint8_t *data, uint16_t size, I2C_Callback callback, void *ctx)
+{
+    return I2C_Submit(hi2c, I2C_REQ_WRITE_REGS, dev_address, reg, (uint8_t *)data, size, callback, ctx);
+}
+
+HAL_StatusTypeDef I2C_WriteAsync(I2C_HandleTypeDef *hi2c, uint16_t dev_address,
+                                 const uint8_t *data, uint16_t size, I2C_Callback callback, void *ctx)
+{
+    return I2C_Submit(hi2c, I2C_REQ_WRITE, dev_address, 0U, (uint8_t *)data, size, callback, ctx);
+}
+
+uint8_t I2C_Pending(I2C_HandleTypeDef *hi2c)
+{
+    I2C_Queue *q = I2C_QueueOf(hi2c);
+    return (q != NULL) ? (uint8_t)(q->head - q->tail) : 0U;
+}
+
+HAL_StatusTypeDef I2C_Sync(I2C_HandleTypeDef *hi2c, uint32_t timeout)
+{
+    uint32_t start = HAL_GetTick();
+    while (I2C_Pending(hi2c) != 0U)
+    {
+        if ((HAL_GetTick() - start) >= timeout)
+        {
+            return HAL_TIMEOUT;
+        }
+    }
+    return HAL_OK;
 }
+{% endif %}
 
 /*
  * ----------------------------------------------------------------
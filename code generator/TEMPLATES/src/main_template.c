@@ -3,7 +3,7 @@
   ******************************************************************************
   * @file           : main.c
   * @brief          : Main program body
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -40,9 +40,12 @@
 void SystemClock_Config(void);
 
 {# Generate prototypes for example tasks if they will be created #}
+{% set scheduler_needed = preset_example_needed or gpio_example_needed or i2c_example_needed or uart_example_needed %}
 {% if preset_example_needed %}
 void Presets_Init(void);
-void Presets_Process(void);
+{% for case in preset_cases %}
+static void Preset_Task_{{ loop.index0 }}(void);
+{% endfor %}
 {% endif %}
 {% if gpio_example_needed %}
 static void GPIO_Example_Task(void);
@@ -53,6 +56,9 @@ static void I2C_Example_Task(void);
 {% if uart_example_needed %}
 static void UART_Example_Task(void);
 {% endif %}
+{% if scheduler_needed %}
+static void Scheduler_Run(void);
+{% endif %}
 
 
 /**
@@ -91,17 +97,8 @@ int main(void)
   /* Infinite loop */
   while (1)
   {
-    {% if preset_example_needed %}
-    Presets_Process();
-    {% endif %}
-    {% if gpio_example_needed and not preset_example_needed %}
-    GPIO_Example_Task();
-    {% endif %}
-    {% if i2c_example_needed and not preset_example_needed %}
-    I2C_Example_Task();
-    {% endif %}
-    {% if uart_example_needed and not preset_example_needed %}
-    UART_Example_Task();
+    {% if scheduler_needed %}
+    Scheduler_Run();
     {% endif %}
   }
 }
@@ -196,9 +193,11 @@ void Presets_Init(void)
   {% if has_dht11.value %}
   // Display DHT11 startup message
   LCD_SendString("DHT11 Starting...");
+  LCD_Refresh();
   HAL_Delay(2000);  // DHT11 needs 1-2 seconds to stabilize after power-on
   LCD_Clear();
   LCD_SendString("DHT11 Ready");
+  LCD_Refresh();
   HAL_Delay(1000);
   LCD_Clear();
   {% endif %}
@@ -208,6 +207,7 @@ void Presets_Init(void)
   {% if has_lcd.value %}
   // Display startup message
   LCD_SendString("MPU6050 Init...");
+  LCD_Refresh();
   HAL_Delay(500);
   {% endif %}
   
@@ -219,6 +219,7 @@ void Presets_Init(void)
   // Show ready message
   LCD_Clear();
   LCD_SendString("MPU6050 Ready!");
+  LCD_Refresh();
   HAL_Delay(1000);
   LCD_Clear();
   {% endif %}
@@ -241,53 +242,18 @@ void Presets_Init(void)
   {% endfor %}
 }
 
+{% for case in preset_cases %}
 /**
-  * @brief  Process presets: read input, apply formula, check threshold, set output
+  * @brief  Preset: {{ case.get("input_key", "Unknown") }} -> {{ case.get("output_key", "Unknown") }}
+  *         (read input, apply formula, check threshold, set output), every {{ case.sample_period_ms }} ms
   * @retval None
   */
-void Presets_Process(void)
+static void Preset_Task_{{ loop.index0 }}(void)
 {
-  {% set needs_timer = namespace(value=false) %}
-  {% set needs_buffer = namespace(value=false) %}
-  {% for case in preset_cases %}
-    {% if case.output_type in ["lcd", "uart"] %}
-      {% set needs_timer.value = true %}
-      {% set needs_buffer.value = true %}
-    {% endif %}
-  {% endfor %}
-  
-  {% if needs_timer.value %}
-  static uint32_t last_update = 0;
-  {% endif %}
-  {% if needs_buffer.value %}
-  char buffer[64];  // Buffer for UART/LCD text (increased from 20 to avoid truncation)
-  {% endif %}
-  
-  {% if needs_timer.value %}
-  {% set has_dht11_case = namespace(value=false) %}
-  {% for case in preset_cases %}
-    {% if case.input_type == "dht11" %}
-      {% set has_dht11_case.value = true %}
-    {% endif %}
-  {% endfor %}
+  {% if case.output_type in ["lcd", "uart"] %}
+  char buffer[64];  // Buffer for UART/LCD text
   
-  {% if has_dht11_case.value %}
-  // DHT11 requires minimum 2 second interval between reads
-  if (HAL_GetTick() - last_update < 2000) {
-    return;
-  }
-  {% else %}
-  // Update display every 200ms
-  if (HAL_GetTick() - last_update < 200) {
-    return;
-  }
-  {% endif %}
-  last_update = HAL_GetTick();
   {% endif %}
-  
-  {% for case in preset_cases %}
-  // ========== Preset: {{ case.get("input_key", "Unknown") }} -> {{ case.get("output_key", "Unknown") }} ==========
-  
   {% if case.input_type == "gy521" %}
   // Read GY-521 (MPU6050) accelerometer data
   float accel_x = 0.0f, accel_y = 0.0f, accel_z = 0.0f;
@@ -308,7 +274,7 @@ void Presets_Process(void)
   // Read potentiometer value via ADC
   uint16_t raw_value = 0;
   float processed_value = 0.0f;
-  if (POT_ReadRaw(&hadc1, ADC_CHANNEL_0, &raw_value) == HAL_OK)
+  if (POT_ReadRaw(&hadc1, ADC1_CHANNEL, &raw_value) == HAL_OK)
   {
     float value = POT_RawToRatio(raw_value);  // Convert to 0.0-1.0 ratio
     {% if case.get("processing", {}).get("enabled") %}
@@ -363,7 +329,7 @@ void Presets_Process(void)
   
   // Process output based on type
   {% if case.output_type == "lcd" %}
-  // Display on LCD
+  // Redraw the LCD frame in RAM; LCD_Refresh() sends only the characters that changed
   LCD_Clear();
   
   {% if case.input_type == "gy521" %}
@@ -418,6 +384,7 @@ void Presets_Process(void)
     LCD_SendString("INACTIVE");
   }
   {% endif %}
+  LCD_Refresh();
   
   {% elif case.output_type == "uart" %}
   // Send via UART
@@ -488,14 +455,9 @@ void Presets_Process(void)
   }
   
   {% endif %}
-  
-  {% endfor %}
-  
-  {% if not needs_timer.value %}
-  // Small delay for GPIO-only presets to prevent excessive CPU usage
-  HAL_Delay(1);
-  {% endif %}
 }
+
+{% endfor %}
 {% endif %}
 
 /* USER CODE BEGIN 4 (Old examples) */
@@ -518,9 +480,8 @@ static void GPIO_Example_Task(void)
         HAL_GPIO_WritePin({{ first_gpio_output.name }}_GPIO_Port, {{ first_gpio_output.name }}_Pin, GPIO_PIN_RESET);
     }
     {% elif first_gpio_output %}
-    // Toggles the first configured output pin every 500ms.
+    // Toggles the first configured output pin (run every 500ms).
     HAL_GPIO_TogglePin({{ first_gpio_output.name }}_GPIO_Port, {{ first_gpio_output.name }}_Pin);
-    HAL_Delay(500);
     {% endif %}
 }
 {% endif %}
@@ -545,8 +506,6 @@ static void I2C_Example_Task(void)
     {
       // Communication failed
     }
-
-    HAL_Delay(1000); // Wait 1 second before the next transmission
 }
 {% endif %}
 
@@ -562,8 +521,59 @@ static void UART_Example_Task(void)
     // Transmit the message via the first configured UART interface.
     // The generated UART_Transmit function handles the selected transfer mode (Polling, IT, or DMA).
     UART_Transmit(&huart{{ uart_interfaces[0].num }}, msg, sizeof(msg) - 1, 100);
-    
-    HAL_Delay(1000); // Wait 1 second before the next transmission
+}
+{% endif %}
+
+{% if scheduler_needed %}
+/* Cooperative scheduler -----------------------------------------------------*/
+typedef struct {
+  void (*run)(void);
+  uint32_t period_ms;
+  uint32_t next_run;    // HAL_GetTick() time of the next run
+} Task_t;
+
+static Task_t tasks[] = {
+{% for case in preset_cases %}
+  { Preset_Task_{{ loop.index0 }}, {{ case.sample_period_ms }}U, 0U },  // {{ case.get("input_key", "Unknown") }} -> {{ case.get("output_key", "Unknown") }}
+{% endfor %}
+{% if gpio_example_needed %}
+  { GPIO_Example_Task, {{ 1 if first_gpio_input else 500 }}U, 0U },
+{% endif %}
+{% if i2c_example_needed %}
+  { I2C_Example_Task, 1000U, 0U },
+{% endif %}
+{% if uart_example_needed %}
+  { UART_Example_Task, 1000U, 0U },
+{% endif %}
+};
+
+/**
+  * @brief  Runs every task whose period has elapsed, then sleeps until the next
+  *         interrupt (at the latest the 1 ms SysTick). Tasks run to completion, so
+  *         a task starts late by at most one tick plus the run time of the tasks
+  *         due before it.
+  * @retval None
+  */
+static void Scheduler_Run(void)
+{
+  uint32_t now = HAL_GetTick();
+
+  for (uint32_t i = 0; i < sizeof(tasks) / sizeof(tasks[0]); i++)
+  {
+    Task_t *t = &tasks[i];
+    if ((int32_t)(now - t->next_run) < 0)
+    {
+      continue;
+    }
+    t->run();
+    t->next_run += t->period_ms;
+    if ((int32_t)(now - t->next_run) >= 0)
+    {
+      // Overran its period: skip the missed runs instead of running back to back
+      t->next_run = now + t->period_ms;
+    }
+  }
+  __WFI();
 }
 {% endif %}
 /* USER CODE END 4 */
@@ -2,12 +2,15 @@
   ******************************************************************************
   * @file           : presets_in.c
   * @brief          : Preset Input Sensor Functions
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
 
 #include "presets_in.h"
+{% if include_pot and adc_streaming %}
+#include "adc.h"
+{% endif %}
 
 {% if include_gy521 and gy521_devices %}
 /* =========================
@@ -59,6 +62,88 @@ HAL_StatusTypeDef MPU6050_Init_I2C{{ d.num }}(void)
     return HAL_OK;
 }
 
+{% if i2c_async %}
+/*
+ * Background sampling: one 14-byte burst (ACCEL_XOUT_H..GYRO_ZOUT_L) is kept
+ * queued on the I2C bus. The read functions take the finished burst, if any,
+ * start the next one and return the latest sample without waiting for the bus.
+ */
+enum { MPU6050_IDLE_I2C{{ d.num }}, MPU6050_READING_I2C{{ d.num }}, MPU6050_DONE_I2C{{ d.num }} };
+static uint8_t _mpu6050_rx_I2C{{ d.num }}[14];
+static int16_t _mpu6050_accel_I2C{{ d.num }}[3];
+static int16_t _mpu6050_gyro_I2C{{ d.num }}[3];
+static uint8_t _mpu6050_valid_I2C{{ d.num }};
+static volatile uint8_t _mpu6050_state_I2C{{ d.num }};
+
+static void MPU6050_ReadDone_I2C{{ d.num }}(HAL_StatusTypeDef status, void *ctx)
+{
+    (void)ctx;
+    _mpu6050_state_I2C{{ d.num }} = (status == HAL_OK) ? MPU6050_DONE_I2C{{ d.num }} : MPU6050_IDLE_I2C{{ d.num }};
+}
+
+static HAL_StatusTypeDef MPU6050_Update_I2C{{ d.num }}(void)
+{
+    if (_mpu6050_state_I2C{{ d.num }} == MPU6050_READING_I2C{{ d.num }})
+    {
+        return _mpu6050_valid_I2C{{ d.num }} ? HAL_OK : HAL_BUSY;
+    }
+    if (_mpu6050_state_I2C{{ d.num }} == MPU6050_DONE_I2C{{ d.num }})
+    {
+        const uint8_t *r = _mpu6050_rx_I2C{{ d.num }};
+        for (int i = 0; i < 3; i++)
+        {
+            _mpu6050_accel_I2C{{ d.num }}[i] = (int16_t)((r[2 * i] << 8) | r[2 * i + 1]);
+            _mpu6050_gyro_I2C{{ d.num }}[i]  = (int16_t)((r[8 + 2 * i] << 8) | r[8 + 2 * i + 1]);
+        }
+        _mpu6050_valid_I2C{{ d.num }} = 1U;
+    }
+    _mpu6050_state_I2C{{ d.num }} = MPU6050_READING_I2C{{ d.num }};
+    if (I2C_ReadRegsAsync(&_MPU6050_HI2C, _MPU6050_ADDR, MPU6050_REG_ACCEL_XOUT, _mpu6050_rx_I2C{{ d.num }},
+                          sizeof(_mpu6050_rx_I2C{{ d.num }}), MPU6050_ReadDone_I2C{{ d.num }}, NULL) != HAL_OK)
+    {
+        _mpu6050_state_I2C{{ d.num }} = MPU6050_IDLE_I2C{{ d.num }};
+    }
+    return _mpu6050_valid_I2C{{ d.num }} ? HAL_OK : HAL_BUSY;
+}
+
+HAL_StatusTypeDef MPU6050_Read_Accel_I2C{{ d.num }}(int16_t* ax, int16_t* ay, int16_t* az, float* Ax_g, float* Ay_g, float* Az_g)
+{
+    if (MPU6050_Update_I2C{{ d.num }}() != HAL_OK)
+        return HAL_BUSY;  // No sample yet
+
+    int16_t ax_raw = _mpu6050_accel_I2C{{ d.num }}[0];
+    int16_t ay_raw = _mpu6050_accel_I2C{{ d.num }}[1];
+    int16_t az_raw = _mpu6050_accel_I2C{{ d.num }}[2];
+
+    if (ax) *ax = ax_raw;
+    if (ay) *ay = ay_raw;
+    if (az) *az = az_raw;
+    if (Ax_g) *Ax_g = (float)ax_raw / 16384.0f;
+    if (Ay_g) *Ay_g = (float)ay_raw / 16384.0f;
+    if (Az_g) *Az_g = (float)az_raw / 16384.0f;
+
+    return HAL_OK;
+}
+
+HAL_StatusTypeDef MPU6050_Read_Gyro_I2C{{ d.num }}(int16_t* gx, int16_t* gy, int16_t* gz, float* Gx_dps, float* Gy_dps, float* Gz_dps)
+{
+    if (MPU6050_Update_I2C{{ d.num }}() != HAL_OK)
+        return HAL_BUSY;  // No sample yet
+
+    int16_t gx_raw = _mpu6050_gyro_I2C{{ d.num }}[0];
+    int16_t gy_raw = _mpu6050_gyro_I2C{{ d.num }}[1];
+    int16_t gz_raw = _mpu6050_gyro_I2C{{ d.num }}[2];
+
+    if (gx) *gx = gx_raw;
+    if (gy) *gy = gy_raw;
+    if (gz) *gz = gz_raw;
+    if (Gx_dps) *Gx_dps = (float)gx_raw / 131.0f;
+    if (Gy_dps) *Gy_dps = (float)gy_raw / 131.0f;
+    if (Gz_dps) *Gz_dps = (float)gz_raw / 131.0f;
+
+    return HAL_OK;
+}
+{% else %}
 HAL_StatusTypeDef MPU6050_Read_Accel_I2C{{ d.num }}(int16_t* ax, int16_t* ay, int16_t* az, float* Ax_g, float* Ay_g, float* Az_g)
 {
     uint8_t r[6];
@@ -98,6 +183,7 @@ HAL_StatusTypeDef MPU6050_Read_Gyro_I2C{{ d.num }}(int16_t* gx, int16_t* gy, int
 
     return HAL_OK;
 }
+{% endif %}
 
 #undef _MPU6050_HI2C
 #undef _MPU6050_ADDR
@@ -255,6 +341,18 @@ DHT11_Data_t DHT11_Read(void)
 HAL_StatusTypeDef POT_ReadRaw(ADC_HandleTypeDef* hadc, uint32_t channel, uint16_t* out_raw)
 {
     if (!hadc || !out_raw) return HAL_ERROR;
+{% if adc_streaming %}
+
+    /* ADC1 converts in the background (set up in MX_ADC_Init): take the latest result */
+    (void)channel;
+    *out_raw = ADC_GetLatest();
+    return HAL_OK;
+}
+float POT_RawToRatio(uint16_t raw)
+{
+    return (float)raw / (float)ADC1_FULL_SCALE;
+}
+{% else %}
     
     ADC_ChannelConfTypeDef sConfig = {0};
     sConfig.Channel = channel;
@@ -276,3 +374,4 @@ float POT_RawToRatio(uint16_t raw)
     return (float)raw / 4095.0f;
 }
 {% endif %}
+{% endif %}
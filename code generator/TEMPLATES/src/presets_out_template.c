@@ -2,7 +2,7 @@
   ******************************************************************************
   * @file           : presets_out.c
   * @brief          : Preset Output Actuator Functions
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
@@ -22,49 +22,200 @@ extern TIM_HandleTypeDef  {{ tim_handle if tim_handle else 'htim1' }};
 
 {% if OUT.lcd %}
 #define LCD_ADDR {{ lcd_addr if lcd_addr else '0x4E' }}
+#define LCD_HI2C {{ i2c_handle if i2c_handle else 'hi2c1' }}
+#define LCD_ROWS 4U
+#define LCD_COLS 20U
 
-static void lcd_send_cmd(uint8_t cmd)
+/*
+ * The PCF8574 takes a byte stream (4 bytes per character or command), so LCD
+ * writes are packed into a buffer and sent as one I2C transfer.
+ */
+#define LCD_TX_SIZE     96U     /* Set-cursor command + a full row */
+#define LCD_TX_TIMEOUT  100U    /* ms */
+
+/*
+ * LCD_Clear/SetCursor/SendString only edit lcd_frame; LCD_Refresh compares it
+ * with lcd_shown (what the LCD displays) and sends the changed runs only.
+ * lcd_shown is only updated once a run's transfer has succeeded; a failed one
+ * marks its row unknown, so the next refresh sends the row again.
+ */
+#define LCD_UNKNOWN '\0'       /* Never in lcd_frame (strings end there) */
+
+typedef struct {
+    uint8_t row, col, len;      /* len 0: the buffer holds commands only */
+    char text[LCD_COLS];
+} LCD_Run;
+
+static char lcd_frame[LCD_ROWS][LCD_COLS];
+static char lcd_shown[LCD_ROWS][LCD_COLS];
+static uint8_t lcd_row, lcd_col;
+static LCD_Run lcd_run;                     /* Run being packed into the buffer */
+
+static void lcd_commit(const LCD_Run *run, HAL_StatusTypeDef status)
+{
+    if (run->len == 0U) return;
+    if (status == HAL_OK) memcpy(&lcd_shown[run->row][run->col], run->text, run->len);
+    else memset(lcd_shown[run->row], LCD_UNKNOWN, LCD_COLS);
+}
+
+{% if i2c_async %}
+/*
+ * Two buffers, queued on the bus in turn, so the main loop only waits when
+ * both are still being sent. A buffer still busy after LCD_TX_TIMEOUT is
+ * never refilled (it may still be queued or read by DMA): until it is free,
+ * the runs meant for it are dropped and their rows marked unknown.
+ */
+static uint8_t lcd_tx[2][LCD_TX_SIZE];
+static uint16_t lcd_tx_len;
+static uint8_t lcd_tx_fill;                 /* Buffer being filled */
+static volatile uint8_t lcd_tx_busy[2];     /* 1 while queued or on the bus */
+static LCD_Run lcd_tx_run[2];               /* Run sent by each buffer */
+static uint8_t lcd_tx_stalled;              /* 1 while lcd_tx_fill is still busy */
+
+static void lcd_tx_done(HAL_StatusTypeDef status, void *ctx)
+{
+    uintptr_t b = (uintptr_t)ctx;
+    lcd_commit(&lcd_tx_run[b], status);
+    lcd_tx_busy[b] = 0U;
+}
+
+static void lcd_wait(uint8_t b)
 {
-    uint8_t u = (cmd & 0xF0);
-    uint8_t l = (cmd << 4) & 0xF0;
-    uint8_t t[4] = { u|0x0C, u|0x08, l|0x0C, l|0x08 };
-    HAL_I2C_Master_Transmit(&{{ i2c_handle if i2c_handle else 'hi2c1' }}, LCD_ADDR, t, 4, 100);
+    uint32_t start = HAL_GetTick();
+    while (lcd_tx_busy[b] && (HAL_GetTick() - start) < LCD_TX_TIMEOUT) {}
 }
 
-static void lcd_send_data(uint8_t data)
+static void lcd_flush(void)
 {
-    uint8_t u = (data & 0xF0);
-    uint8_t l = (data << 4) & 0xF0;
-    uint8_t t[4] = { u|0x0D, u|0x09, l|0x0D, l|0x09 };
-    HAL_I2C_Master_Transmit(&{{ i2c_handle if i2c_handle else 'hi2c1' }}, LCD_ADDR, t, 4, 100);
+    if (lcd_tx_stalled) {
+        /* Nothing was packed (lcd_put drops bytes while stalled) */
+        lcd_commit(&lcd_run, HAL_TIMEOUT);
+        lcd_run.len = 0U;
+        lcd_tx_stalled = lcd_tx_busy[lcd_tx_fill];
+        return;
+    }
+    if (lcd_tx_len == 0U) return;
+    uint8_t b = lcd_tx_fill;
+    uint32_t start = HAL_GetTick();
+    HAL_StatusTypeDef st;
+
+    lcd_tx_run[b] = lcd_run;
+    lcd_run.len = 0U;
+    lcd_tx_busy[b] = 1U;
+    do {  // HAL_BUSY: request queue full, wait for a slot
+        st = I2C_WriteAsync(&LCD_HI2C, LCD_ADDR, lcd_tx[b], lcd_tx_len, lcd_tx_done, (void *)(uintptr_t)b);
+    } while (st == HAL_BUSY && (HAL_GetTick() - start) < LCD_TX_TIMEOUT);
+    if (st != HAL_OK) {
+        lcd_commit(&lcd_tx_run[b], st);
+        lcd_tx_busy[b] = 0U;
+    }
+
+    lcd_tx_fill = b ^ 1U;
+    lcd_tx_len = 0U;
+    lcd_wait(lcd_tx_fill);
+    lcd_tx_stalled = lcd_tx_busy[lcd_tx_fill];
 }
 
-void LCD_Clear(void) { lcd_send_cmd(0x01); HAL_Delay(2); }
+/* Sends what is buffered and waits for it to reach the LCD (before delays) */
+static void lcd_sync(void)
+{
+    lcd_flush();
+    lcd_wait(0);
+    lcd_wait(1);
+}
+
+#define LCD_TX_BUF  lcd_tx[lcd_tx_fill]
+{% else %}
+static uint8_t lcd_tx[LCD_TX_SIZE];
+static uint16_t lcd_tx_len;
+static const uint8_t lcd_tx_stalled = 0U;   /* Blocking transfers never leave the buffer busy */
+
+static void lcd_flush(void)
+{
+    if (lcd_tx_len == 0U) return;
+    lcd_commit(&lcd_run, HAL_I2C_Master_Transmit(&LCD_HI2C, LCD_ADDR, lcd_tx, lcd_tx_len, LCD_TX_TIMEOUT));
+    lcd_run.len = 0U;
+    lcd_tx_len = 0U;
+}
+
+static void lcd_sync(void) { lcd_flush(); }
+
+#define LCD_TX_BUF  lcd_tx
+{% endif %}
+
+static void lcd_put(uint8_t hi, uint8_t lo, uint8_t rs)
+{
+    if (lcd_tx_len + 4U > LCD_TX_SIZE) lcd_flush();
+    if (lcd_tx_stalled) return;
+    uint8_t *t = &LCD_TX_BUF[lcd_tx_len];
+    t[0] = hi | 0x0C | rs; t[1] = hi | 0x08 | rs;
+    t[2] = lo | 0x0C | rs; t[3] = lo | 0x08 | rs;
+    lcd_tx_len += 4U;
+}
+
+static void lcd_send_cmd(uint8_t cmd)   { lcd_put(cmd & 0xF0, (cmd << 4) & 0xF0, 0x00); }
+static void lcd_send_data(uint8_t data) { lcd_put(data & 0xF0, (data << 4) & 0xF0, 0x01); }
+
+void LCD_Clear(void)
+{
+    memset(lcd_frame, ' ', sizeof(lcd_frame));
+    lcd_row = 0U;
+    lcd_col = 0U;
+}
 
 void LCD_Init(void)
 {
     HAL_Delay(50);
-    lcd_send_cmd(0x30); HAL_Delay(5);
-    lcd_send_cmd(0x30); HAL_Delay(1);
-    lcd_send_cmd(0x30); HAL_Delay(1);
-    lcd_send_cmd(0x20); HAL_Delay(1);
-    lcd_send_cmd(0x28); HAL_Delay(1);
-    lcd_send_cmd(0x08); HAL_Delay(1);
+    lcd_send_cmd(0x30); lcd_sync(); HAL_Delay(5);
+    lcd_send_cmd(0x30); lcd_sync(); HAL_Delay(1);
+    lcd_send_cmd(0x30); lcd_sync(); HAL_Delay(1);
+    lcd_send_cmd(0x20); lcd_sync(); HAL_Delay(1);
+    lcd_send_cmd(0x28); lcd_sync(); HAL_Delay(1);
+    lcd_send_cmd(0x08); lcd_sync(); HAL_Delay(1);
+    lcd_send_cmd(0x01); lcd_sync(); HAL_Delay(2);
+    lcd_send_cmd(0x06); lcd_sync(); HAL_Delay(1);
+    lcd_send_cmd(0x0C); lcd_sync(); HAL_Delay(1);
+    memset(lcd_shown, ' ', sizeof(lcd_shown));
     LCD_Clear();
-    lcd_send_cmd(0x06); HAL_Delay(1);
-    lcd_send_cmd(0x0C); HAL_Delay(1);
 }
 
+/* Writes at the cursor; text past the end of the row is dropped */
 void LCD_SendString(const char *s)
 {
-    while (*s) lcd_send_data((uint8_t)*s++);
+    while (*s && lcd_col < LCD_COLS) lcd_frame[lcd_row][lcd_col++] = *s++;
 }
 
 void LCD_SetCursor(uint8_t row, uint8_t col)
 {
-    uint8_t row_offsets[] = { 0x00, 0x40, 0x14, 0x54 };
-    if (row >= 4) row = 0;
-    lcd_send_cmd(0x80 | (col + row_offsets[row]));
+    lcd_row = (row < LCD_ROWS) ? row : 0U;
+    lcd_col = col;
+}
+
+void LCD_Refresh(void)
+{
+    static const uint8_t row_offsets[LCD_ROWS] = { 0x00, 0x40, 0x14, 0x54 };
+
+    lcd_flush();   /* Nothing buffered: picks up a stalled buffer freed since */
+    for (uint8_t r = 0; r < LCD_ROWS; r++) {
+        uint8_t c = 0;
+        while (c < LCD_COLS) {
+            if (lcd_frame[r][c] == lcd_shown[r][c]) { c++; continue; }
+            /* Run of changes; a single unchanged character is cheaper to
+               resend (4 bytes) than a new set-cursor command (4 bytes + transfer) */
+            uint8_t end = c + 1U;
+            while (end < LCD_COLS && (lcd_frame[r][end] != lcd_shown[r][end] ||
+                   (end + 1U < LCD_COLS && lcd_frame[r][end + 1U] != lcd_shown[r][end + 1U]))) end++;
+
+            lcd_send_cmd(0x80 | (row_offsets[r] + c));
+            lcd_run.row = r;
+            lcd_run.col = c;
+            for (; c < end; c++) {
+                lcd_send_data((uint8_t)lcd_frame[r][c]);
+                lcd_run.text[lcd_run.len++] = lcd_frame[r][c];
+            }
+            lcd_flush();   /* lcd_shown is updated when the transfer succeeds */
+        }
+    }
 }
 {% endif %}
 
@@ -72,7 +223,13 @@ void LCD_SetCursor(uint8_t row, uint8_t col)
 HAL_StatusTypeDef OUT_UART_Print(const char *s)
 {
     const uint8_t *p = (const uint8_t*)s;
+{% if uart_dma %}
+    /* Queued in the UART TX ring buffer, sent by DMA: returns at once */
+    uint16_t len = (uint16_t)strlen(s);
+    return (UART_Write(&{{ uart_handle }}, p, len) == len) ? HAL_OK : HAL_BUSY;
+{% else %}
     return HAL_UART_Transmit(&{{ uart_handle if uart_handle else 'huart2' }}, (uint8_t*)p, (uint16_t)strlen(s), 100);
+{% endif %}
 }
 {% endif %}
 
@@ -2,21 +2,125 @@
   ******************************************************************************
   * @file           : uart.c
   * @brief          : UART/USART Peripheral Configuration
-  * @date           : {{ now().strftime('%b %d, %Y') }}
+  * @date           : {{ generation_stamp() }}
   * @author         : Auto-generated by Config Tool
   ******************************************************************************
   */
 
 #include "uart.h"
+{% set dma_uarts = uart_interfaces | selectattr("dma") | list %}
+{% if dma_uarts %}
+#include <string.h>
+{% endif %}
 
 // --- Handles Declaration ---
 {% for uart in uart_interfaces %}
 UART_HandleTypeDef huart{{ uart.num }};
 {% endfor %}
+{% for uart in dma_uarts %}
+DMA_HandleTypeDef hdma_{{ uart.dma_name }}_tx;
+DMA_HandleTypeDef hdma_{{ uart.dma_name }}_rx;
+{% endfor %}
+{% if dma_uarts %}
+
+// --- DMA TX ring buffers ---
+/*
+ * One ring per UART in DMA mode. Single producer (the main loop, through
+ * UART_Write/UART_Transmit) and single consumer (the TX complete interrupt):
+ * head is only written by the producer and tail only by the consumer, so
+ * queuing data takes no lock. `busy` is claimed with LDREX/STREX, so exactly
+ * one side starts the next DMA transfer. head/tail are free-running 16-bit
+ * indexes; the buffer size is a power of two.
+ */
+typedef struct
+{
+    UART_HandleTypeDef *huart;
+    uint8_t *buf;
+    uint16_t mask;                /* size - 1 */
+    volatile uint16_t head;       /* written by the producer */
+    volatile uint16_t tail;       /* written by the consumer */
+    volatile uint16_t in_flight;  /* bytes of the running DMA transfer */
+    volatile uint8_t busy;        /* 1 while a DMA transfer runs */
+} UART_TxRing;
+
+{% for uart in dma_uarts %}
+static uint8_t uart{{ uart.num }}_tx_buf[UART{{ uart.num }}_TX_RING_SIZE];
+static UART_TxRing uart{{ uart.num }}_tx_ring = { &huart{{ uart.num }}, uart{{ uart.num }}_tx_buf, UART{{ uart.num }}_TX_RING_SIZE - 1U, 0U, 0U, 0U, 0U };
+{% endfor %}
+
+static UART_TxRing *UART_TxRingOf(UART_HandleTypeDef *huart)
+{
+{% for uart in dma_uarts %}
+    if (huart == &huart{{ uart.num }}) return &uart{{ uart.num }}_tx_ring;
+{% endfor %}
+    return NULL;
+}
+
+static uint8_t UART_TxClaim(volatile uint8_t *busy)
+{
+    do
+    {
+        if (__LDREXB(busy) != 0U)
+        {
+            __CLREX();
+            return 0U;
+        }
+    } while (__STREXB(1U, busy) != 0U);
+    __DMB();
+    return 1U;
+}
+
+/* Starts a DMA transfer of the queued bytes unless one is already running. */
+static void UART_TxKick(UART_TxRing *r)
+{
+    if (r->head == r->tail || !UART_TxClaim(&r->busy))
+    {
+        return;
+    }
+    uint16_t tail  = r->tail;
+    uint16_t count = (uint16_t)(r->head - tail);
+    uint16_t start = tail & r->mask;
+    uint16_t chunk = (uint16_t)(r->mask + 1U - start);  /* Up to the end of the buffer; the rest goes next */
+    if (chunk > count) chunk = count;
+
+    r->in_flight = chunk;
+    if (HAL_UART_Transmit_DMA(r->huart, &r->buf[start], chunk) != HAL_OK)
+    {
+        /* UART busy or in error: keep the data, retried by the next UART_Write or UART_TxFlush */
+        r->in_flight = 0U;
+        __DMB();
+        r->busy = 0U;
+    }
+}
+
+/* Consumer side: the finished chunk is released and the next one started. */
+static void UART_TxDone(UART_TxRing *r)
+{
+    r->tail = (uint16_t)(r->tail + r->in_flight);
+    r->in_flight = 0U;
+    __DMB();
+    r->busy = 0U;
+    UART_TxKick(r);
+}
+{% endif %}
 
 // --- MX_UART_Init Function ---
 void MX_UART_Init(void)
 {
+{% if dma_uarts %}
+    /* DMA clocks and channel interrupts (the channels are set up in HAL_UART_MspInit) */
+    __HAL_RCC_DMAMUX1_CLK_ENABLE();
+{% for controller in dma_controllers %}
+    __HAL_RCC_{{ controller }}_CLK_ENABLE();
+{% endfor %}
+{% for uart in dma_uarts %}
+    HAL_NVIC_SetPriority({{ uart.dma_tx.irqn }}, 5, 0);
+    HAL_NVIC_EnableIRQ({{ uart.dma_tx.irqn }});
+    HAL_NVIC_SetPriority({{ uart.dma_rx.irqn }}, 5, 0);
+    HAL_NVIC_EnableIRQ({{ uart.dma_rx.irqn }});
+{% endfor %}
+
+{% endif %}
 {% for uart in uart_interfaces %}
     /* {{ uart.interface }} - Clock enable moved to HAL_UART_MspInit */
 
@@ -37,6 +141,10 @@ void MX_UART_Init(void)
     {
         Error_Handler();
     }
+{% if uart.irq %}
+    HAL_NVIC_SetPriority({{ uart.irqn }}, 5, 0);
+    HAL_NVIC_EnableIRQ({{ uart.irqn }});
+{% endif %}
 {% endfor %}
 }
 
@@ -62,7 +170,142 @@ void HAL_UART_MspInit(UART_HandleTypeDef* uartHandle)
         GPIO_InitStruct.Alternate = GPIO_AF7_USART2;
         HAL_GPIO_Init(GPIOA, &GPIO_InitStruct);
     }
+{% for uart in dma_uarts %}
+
+    if (uartHandle->Instance == {{ uart.interface }})
+    {
+        /* {{ uart.interface }}_TX DMA on {{ uart.dma_tx.instance }} */
+        hdma_{{ uart.dma_name }}_tx.Instance                 = {{ uart.dma_tx.instance }};
+        hdma_{{ uart.dma_name }}_tx.Init.Request             = DMA_REQUEST_{{ uart.dma_tx.request }};
+        hdma_{{ uart.dma_name }}_tx.Init.Direction           = DMA_MEMORY_TO_PERIPH;
+        hdma_{{ uart.dma_name }}_tx.Init.PeriphInc           = DMA_PINC_DISABLE;
+        hdma_{{ uart.dma_name }}_tx.Init.MemInc              = DMA_MINC_ENABLE;
+        hdma_{{ uart.dma_name }}_tx.Init.PeriphDataAlignment = DMA_PDATAALIGN_BYTE;
+        hdma_{{ uart.dma_name }}_tx.Init.MemDataAlignment    = DMA_MDATAALIGN_BYTE;
+        hdma_{{ uart.dma_name }}_tx.Init.Mode                = DMA_NORMAL;
+        hdma_{{ uart.dma_name }}_tx.Init.Priority            = DMA_PRIORITY_LOW;
+        if (HAL_DMA_Init(&hdma_{{ uart.dma_name }}_tx) != HAL_OK)
+        {
+            Error_Handler();
+        }
+        __HAL_LINKDMA(uartHandle, hdmatx, hdma_{{ uart.dma_name }}_tx);
+
+        /* {{ uart.interface }}_RX DMA on {{ uart.dma_rx.instance }} */
+        hdma_{{ uart.dma_name }}_rx.Instance                 = {{ uart.dma_rx.instance }};
+        hdma_{{ uart.dma_name }}_rx.Init.Request             = DMA_REQUEST_{{ uart.dma_rx.request }};
+        hdma_{{ uart.dma_name }}_rx.Init.Direction           = DMA_PERIPH_TO_MEMORY;
+        hdma_{{ uart.dma_name }}_rx.Init.PeriphInc           = DMA_PINC_DISABLE;
+        hdma_{{ uart.dma_name }}_rx.Init.MemInc              = DMA_MINC_ENABLE;
+        hdma_{{ uart.dma_name }}_rx.Init.PeriphDataAlignment = DMA_PDATAALIGN_BYTE;
+        hdma_{{ uart.dma_name }}_rx.Init.MemDataAlignment    = DMA_MDATAALIGN_BYTE;
+        hdma_{{ uart.dma_name }}_rx.Init.Mode                = DMA_NORMAL;
+        hdma_{{ uart.dma_name }}_rx.Init.Priority            = DMA_PRIORITY_LOW;
+        if (HAL_DMA_Init(&hdma_{{ uart.dma_name }}_rx) != HAL_OK)
+        {
+            Error_Handler();
+        }
+        __HAL_LINKDMA(uartHandle, hdmarx, hdma_{{ uart.dma_name }}_rx);
+    }
+{% endfor %}
+}
+{% if uart_interfaces | selectattr("irq") | list %}
+
+/*
+ * ----------------------------------------------------------------
+ * --- Interrupt handlers (Interrupt and DMA transfer modes) ---
+ * ----------------------------------------------------------------
+ */
+{% for uart in uart_interfaces if uart.irq %}
+void {{ uart.irq_handler }}(void)
+{
+    HAL_UART_IRQHandler(&huart{{ uart.num }});
+}
+
+{% endfor %}
+{% for uart in dma_uarts %}
+void {{ uart.dma_tx.irq_handler }}(void)
+{
+    HAL_DMA_IRQHandler(&hdma_{{ uart.dma_name }}_tx);
+}
+
+void {{ uart.dma_rx.irq_handler }}(void)
+{
+    HAL_DMA_IRQHandler(&hdma_{{ uart.dma_name }}_rx);
+}
+
+{% endfor %}
+{% endif %}
+{% if dma_uarts %}
+
+void HAL_UART_TxCpltCallback(UART_HandleTypeDef *huart)
+{
+    UART_TxRing *r = UART_TxRingOf(huart);
+    if (r != NULL)
+    {
+        UART_TxDone(r);
+    }
+}
+
+void HAL_UART_ErrorCallback(UART_HandleTypeDef *huart)
+{
+    /* A TX DMA error ends the transfer: drop that chunk and go on with the rest */
+    UART_TxRing *r = UART_TxRingOf(huart);
+    if (r != NULL && r->busy && huart->gState == HAL_UART_STATE_READY)
+    {
+        UART_TxDone(r);
+    }
+}
+
+/*
+ * ----------------------------------------------------------------
+ * --- Non-blocking TX (DMA transfer mode) ---
+ * ----------------------------------------------------------------
+ */
+uint16_t UART_Write(UART_HandleTypeDef *huart, const uint8_t *data, uint16_t size)
+{
+    UART_TxRing *r = UART_TxRingOf(huart);
+    if (r == NULL)
+    {
+        return 0U;
+    }
+    uint16_t head  = r->head;
+    uint16_t space = (uint16_t)(r->mask + 1U - (uint16_t)(head - r->tail));
+    if (size > space) size = space;
+
+    uint16_t start = head & r->mask;
+    uint16_t first = (uint16_t)(r->mask + 1U - start);
+    if (first > size) first = size;
+    memcpy(&r->buf[start], data, first);
+    memcpy(r->buf, data + first, (size_t)(size - first));
+    __DMB();
+    r->head = (uint16_t)(head + size);
+
+    UART_TxKick(r);
+    return size;
+}
+
+uint16_t UART_TxPending(UART_HandleTypeDef *huart)
+{
+    UART_TxRing *r = UART_TxRingOf(huart);
+    return (r != NULL) ? (uint16_t)(r->head - r->tail) : 0U;
+}
+
+HAL_StatusTypeDef UART_TxFlush(UART_HandleTypeDef *huart, uint32_t timeout)
+{
+    UART_TxRing *r = UART_TxRingOf(huart);
+    uint32_t start = HAL_GetTick();
+    while (UART_TxPending(huart) != 0U)
+    {
+        /* Restarts the DMA if the last start failed (no-op while a transfer runs) */
+        UART_TxKick(r);
+        if ((HAL_GetTick() - start) >= timeout)
+        {
+            return HAL_TIMEOUT;
+        }
+    }
+    return HAL_OK;
 }
+{% endif %}
 
 /*
  * ----------------------------------------------------------------
@@ -79,7 +322,9 @@ HAL_StatusTypeDef UART_Transmit(UART_HandleTypeDef *huart, uint8_t *data, uint16
         {% elif uart.transferMode == 'INTERRUPT' %}
         return HAL_UART_Transmit_IT(huart, data, size);
         {% elif uart.transferMode == 'DMA' %}
-        return HAL_UART_Transmit_DMA(huart, data, size);
+        /* Queued in the TX ring; returns at once (timeout unused) */
+        (void)timeout;
+        return (UART_Write(huart, data, size) == size) ? HAL_OK : HAL_BUSY;
         {% else %}
         return HAL_UART_Transmit(huart, data, size, timeout);
         {% endif %}
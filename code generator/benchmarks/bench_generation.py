@@ -0,0 +1,275 @@
+# benchmarks/bench_generation.py
+"""Generation benchmark with synthetic configurations of increasing size.
+
+Usage (from the 'code generator' folder):
+    python benchmarks/bench_generation.py
+    python benchmarks/bench_generation.py --repeat 10 --output bench.json
+    python benchmarks/bench_generation.py --compare baseline.json --threshold 1.25
+
+Every scenario is generated into a throwaway output root. Each stage of
+generate_all.STAGES is timed on its own (in dependency order, like
+generate_project_files runs them), followed by an end-to-end full run and an
+incremental no-op run. Results are written as JSON; --compare reports stages
+that got slower than a previous results file and exits with status 1.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import copy
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+GEN_DIR = Path(__file__).resolve().parent.parent
+PROJ_ROOT = GEN_DIR.parent
+sys.path.insert(0, str(GEN_DIR / "ui"))
+
+import data  # noqa: E402
+from generators import config_schema, generate_all, template_engine  # noqa: E402
+
+RESULTS_VERSION = 1
+MCU = "STM32G474RE"
+
+# Project files the HAL config / CMake stages edit in place; copied into each output root.
+SEED_FILES = ["Core/Inc/stm32g4xx_hal_conf.h", "cmake/stm32cubemx/CMakeLists.txt"]
+
+# (name, GPIO entries, I2C devices per instance, preset cases)
+SIZES = [
+    ("small", 8, 1, 1),
+    ("medium", 24, 8, 8),
+    ("large", 48, 32, 32),
+    ("xlarge", 48, 128, 128),
+]
+
+_MODES = ["OUTPUT_PP", "INPUT", "OUTPUT_OD", "ANALOG"]
+_PULLS = ["NOPULL", "PULLUP", "PULLDOWN"]
+_SPEEDS = ["LOW", "MEDIUM", "HIGH", "VERY_HIGH"]
+
+
+# --- Synthetic configurations ---
+
+def _combinations() -> list[tuple[str, str]]:
+    return [(i, o) for i, outs in data.VALID_PRESET_COMBINATIONS.items() for o in outs]
+
+
+def _case(input_key: str, output_key: str, index: int) -> dict:
+    """Builds a preset case the way the Presets tab exports it."""
+    maps = data.PRESETS.get("mappings", {})
+
+    def _periph(key: str) -> dict:
+        m = maps.get(key, {})
+        return {"type": m.get("type", ""), "instance": m.get("instance", ""),
+                "settings": copy.deepcopy(m.get("settings", {}))}
+
+    return {
+        "input_key": input_key,
+        "output_key": output_key,
+        "processing": {"enabled": index % 2 == 0, "formula": f"value*{index + 1}"},
+        "threshold": {"enabled": index % 3 == 0, "value": str(100 + index)},
+        "peripheral_settings": {
+            "input_peripheral": _periph(input_key),
+            "output_peripheral": _periph(output_key),
+        },
+    }
+
+
+def synth_config(n_gpio: int, n_i2c_devices: int, n_cases: int,
+                 combinations: list[tuple[str, str]] | None = None) -> tuple[dict, dict, dict]:
+    """Returns (pinout_config, peripheral_settings, preset_settings) of the requested size.
+
+    GPIOs are spread over every port of the MCU in the MCU database; I2C devices are
+    split over every I2C instance; cases cycle through the valid preset combinations.
+    """
+    mcu = data.get_mcu(MCU)
+    pins = mcu.get("gpio_pins", [])
+    # Round-robin over ports so every port is used before any port gets a second pin.
+    by_port: dict[str, list[str]] = {}
+    for pin in pins:
+        by_port.setdefault(pin[1], []).append(pin)
+    ordered = []
+    while any(by_port.values()):
+        for port in sorted(by_port):
+            if by_port[port]:
+                ordered.append(by_port[port].pop(0))
+
+    gpio = []
+    for i, pin in enumerate(ordered[:n_gpio]):
+        gpio.append({
+            "name": f"SIG_{pin}",
+            "port": f"GPIO{pin[1]}",
+            "pin": int(pin[2:]),
+            "mode": _MODES[i % len(_MODES)],
+            "pull": _PULLS[i % len(_PULLS)],
+            "speed": _SPEEDS[i % len(_SPEEDS)],
+            "alternate_fn": "",
+        })
+    pinout = {"project_name": "Benchmark", "microcontroller": MCU, "gpio": gpio}
+
+    i2c = {}
+    instances = list(mcu.get("i2c_interfaces", {}))
+    for k, inst in enumerate(instances):
+        devices = [{"name": f"DEV{k}_{d}", "address": 0x08 + (d % 0x70)}
+                   for d in range(k, n_i2c_devices, len(instances))]
+        i2c[inst] = {"clockSpeed": 400000 if k % 2 else 100000,
+                     "addressingMode": "I2C_ADDRESSINGMODE_7BIT",
+                     "transferMode": "POLLING", "devices": devices}
+    uart = {"UART2": {"baudRate": 115200, "wordLength": "UART_WORDLENGTH_8B",
+                      "stopBits": "UART_STOPBITS_1", "parity": "UART_PARITY_NONE",
+                      "flowControl": "UART_HWCONTROL_NONE", "transferMode": "POLLING"}}
+    peripherals = {"I2C": i2c, "UART": uart}
+
+    combos = combinations or _combinations()
+    cases = [_case(*combos[i % len(combos)], i) for i in range(n_cases)]
+    return pinout, peripherals, {"cases": cases}
+
+
+def scenarios() -> list[tuple[str, dict, tuple[dict, dict, dict]]]:
+    """Size sweep plus one single-case scenario per valid preset combination."""
+    out = []
+    for name, n_gpio, n_dev, n_cases in SIZES:
+        params = {"gpio": n_gpio, "i2c_devices": n_dev, "cases": n_cases}
+        out.append((f"size/{name}", params, synth_config(n_gpio, n_dev, n_cases)))
+    for input_key, output_key in _combinations():
+        params = {"gpio": 8, "i2c_devices": 1, "cases": 1, "input": input_key, "output": output_key}
+        out.append((f"combo/{input_key} -> {output_key}", params,
+                    synth_config(8, 1, 1, [(input_key, output_key)])))
+    return out
+
+
+# --- Timing ---
+
+def _seed_output_root(root: Path):
+    for rel in SEED_FILES:
+        src = PROJ_ROOT / rel
+        if src.exists():
+            (root / rel).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(src, root / rel)
+
+
+def _summary(samples: list[float]) -> dict:
+    return {"min_ms": round(min(samples) * 1000, 3), "median_ms": round(statistics.median(samples) * 1000, 3)}
+
+
+def time_stages(config: tuple[dict, dict, dict], repeat: int) -> dict:
+    """Times every stage function on its own, in dependency order."""
+    config = config_schema.validate_configs(*config)  # What generate_project_files passes the stages
+    samples: dict[str, list[float]] = {tag: [] for _, tag, _, _ in generate_all.STAGES}
+    template_engine.set_generation_stamp("benchmark")
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="codegen-bench-") as tmp:
+            root = Path(tmp)
+            _seed_output_root(root)
+            results: dict[str, list[str]] = {}
+            for name, tag, func, deps in generate_all.STAGES:
+                args = (str(root),) + copy.deepcopy(config)
+                if deps:
+                    args += ([f for dep in deps for f in results.get(dep, [])],)
+                start = time.perf_counter()
+                results[name] = list(func(*args) or [])
+                samples[tag].append(time.perf_counter() - start)
+    return {tag: _summary(s) for tag, s in samples.items()}
+
+
+def time_end_to_end(config: tuple[dict, dict, dict], repeat: int) -> tuple[dict, dict, int]:
+    """Times generate_project_files: a full run, then an incremental run with no changes."""
+    full, noop, n_files = [], [], 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="codegen-bench-") as tmp:
+            _seed_output_root(Path(tmp))
+            start = time.perf_counter()
+            files, _ = generate_all.generate_project_files(*copy.deepcopy(config), output_root=tmp, incremental=False)
+            full.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            generate_all.generate_project_files(*copy.deepcopy(config), output_root=tmp)
+            noop.append(time.perf_counter() - start)
+            n_files = len(files)
+    return _summary(full), _summary(noop), n_files
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJ_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(repeat: int, only: str | None = None) -> dict:
+    data.load_initial_mapping(); data.load_presets()
+    results = []
+    for name, params, config in scenarios():
+        if only and only not in name:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):  # The generators are chatty
+            stages = time_stages(config, repeat)
+            full, noop, n_files = time_end_to_end(config, repeat)
+        results.append({"name": name, "params": params, "files": n_files,
+                        "stages": stages, "full": full, "incremental_noop": noop})
+        print(f"{name:<55} full {full['median_ms']:>9.2f} ms   no-op {noop['median_ms']:>8.2f} ms")
+    return {
+        "version": RESULTS_VERSION,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_ms: float = 2.0) -> list[str]:
+    """Returns a line for every stage/total whose median got slower than threshold x baseline."""
+    base = {s["name"]: s for s in baseline.get("scenarios", [])}
+    regressions = []
+    for scenario in current["scenarios"]:
+        old = base.get(scenario["name"])
+        if not old:
+            continue
+        pairs = [(f"stage {tag}", t, old["stages"].get(tag)) for tag, t in scenario["stages"].items()]
+        pairs += [("full", scenario["full"], old.get("full")),
+                  ("incremental no-op", scenario["incremental_noop"], old.get("incremental_noop"))]
+        for label, new_t, old_t in pairs:
+            # Timings of a millisecond or two are mostly noise.
+            if not old_t or max(new_t["median_ms"], old_t["median_ms"]) < min_ms:
+                continue
+            ratio = new_t["median_ms"] / old_t["median_ms"] if old_t["median_ms"] else float("inf")
+            if ratio > threshold:
+                regressions.append(f"{scenario['name']} / {label}: {old_t['median_ms']:.2f} -> "
+                                   f"{new_t['median_ms']:.2f} ms (x{ratio:.2f})")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark code generation on synthetic configurations.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="runs per scenario (median is reported)")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="results file (JSON)")
+    parser.add_argument("-k", "--only", help="only run scenarios whose name contains this text")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--min-ms", type=float, default=2.0, help="ignore timings below this when comparing")
+    args = parser.parse_args(argv)
+
+    results = run(max(1, args.repeat), args.only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_ms)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare} (threshold x{args.threshold})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
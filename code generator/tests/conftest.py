@@ -0,0 +1,36 @@
+# tests/conftest.py
+"""Puts ui/ on sys.path, like cli.py and main.py run: the modules import
+each other as top-level modules (data, pin_allocator, generators, ...)."""
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+UI_DIR = Path(__file__).resolve().parent.parent / "ui"
+sys.path.insert(0, str(UI_DIR))
+
+from generators import generate_all  # noqa: E402
+
+# A small project: a potentiometer (ADC) driving an LED.
+PINOUT = {
+    "schema_version": 2,
+    "project_name": "Demo",
+    "microcontroller": "STM32G474RE",
+    "gpio": [
+        {"name": "POT_ADC", "port": "GPIOA", "pin": 0, "mode": "ANALOG"},
+        {"name": "LED", "port": "GPIOA", "pin": 5, "mode": "OUTPUT_PP"},
+    ],
+}
+PERIPHERALS = {"ADC": {"ADC1": {"conversionMode": "CONTINUOUS"}}}
+PRESETS = {"cases": [{"input_key": "Potentiometer (ADC)", "output_key": "Digital Output (LED)"}]}
+
+
+@pytest.fixture
+def generate(tmp_path):
+    """generate(pinout, peripherals, presets, **kwargs) -> (files, report), into tmp_path."""
+    def run(pinout=PINOUT, peripherals=PERIPHERALS, presets=PRESETS, **kwargs):
+        return generate_all.generate_project_files(copy.deepcopy(pinout), copy.deepcopy(peripherals),
+                                                   copy.deepcopy(presets), output_root=tmp_path,
+                                                   log=lambda line: None, **kwargs)
+    return run
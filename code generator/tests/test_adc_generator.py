@@ -0,0 +1,42 @@
+# tests/test_adc_generator.py
+import copy
+
+import pytest
+
+from conftest import PINOUT
+from generators.adc_generator import adc1_channel
+
+
+def pinout_with_analog(port: str, pin: int) -> dict:
+    pinout = copy.deepcopy(PINOUT)
+    pinout["gpio"][0].update(port=port, pin=pin)
+    return pinout
+
+
+@pytest.mark.parametrize("port, pin, channel", [
+    ("GPIOA", 0, "ADC_CHANNEL_1"),
+    ("GPIOB", 1, "ADC_CHANNEL_10"),
+    ("GPIOC", 5, "ADC_CHANNEL_16"),
+])
+def test_channel_of_the_analog_pin(port, pin, channel):
+    assert adc1_channel(pinout_with_analog(port, pin)) == channel
+
+
+def test_explicit_channel_wins():
+    assert adc1_channel(PINOUT, {"channel": "ADC_CHANNEL_VREFINT"}) == "ADC_CHANNEL_VREFINT"
+
+
+def test_no_adc1_input_in_the_pinout():
+    assert adc1_channel(pinout_with_analog("GPIOA", 9)) is None      # PA9: no ADC1 input
+    assert adc1_channel(dict(PINOUT, microcontroller="UNKNOWN")) is None
+
+
+def test_generated_channel_follows_the_pinout(generate, tmp_path):
+    adc_h = tmp_path / "Core" / "Inc" / "adc.h"
+    generate()
+    assert "#define ADC1_CHANNEL        ADC_CHANNEL_1 " in adc_h.read_text()
+
+    _, report = generate(pinout=pinout_with_analog("GPIOB", 1))
+    assert "adc" in report["stages_run"]
+    assert "#define ADC1_CHANNEL        ADC_CHANNEL_10 " in adc_h.read_text()
+    assert "POT_ReadRaw(&hadc1, ADC1_CHANNEL," in (tmp_path / "Core" / "Src" / "main.c").read_text()
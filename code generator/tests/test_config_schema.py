@@ -0,0 +1,125 @@
+# tests/test_config_schema.py
+import pytest
+
+from generators import config_schema
+from generators.config_schema import ConfigValidationError, validate_configs
+
+PINOUT = {
+    "schema_version": config_schema.SCHEMA_VERSION,
+    "project_name": "Demo",
+    "microcontroller": "STM32G474RE",
+    "gpio": [{"name": "LED", "port": "GPIOA", "pin": 5, "mode": "OUTPUT_PP"}],
+}
+
+
+def errors_of(pinout=PINOUT, peripherals=None, presets=None) -> list[str]:
+    with pytest.raises(ConfigValidationError) as exc:
+        validate_configs(pinout, peripherals, presets)
+    return exc.value.errors
+
+
+def test_fills_defaults_and_canonical_forms():
+    pinout = dict(PINOUT, gpio=[{"port": "pa", "pin": "5", "mode": "output_pp", "alternate_fn": 4}])
+    peripherals = {"I2C": {"I2C1": {"devices": [{"name": "LCD", "address": "0x27"}]}}}
+
+    pc, ps, pr = validate_configs(pinout, peripherals, {})
+
+    assert pc["gpio"] == [{"name": "", "port": "GPIOA", "pin": 5, "mode": "OUTPUT_PP", "pull": "NOPULL",
+                           "speed": "LOW", "alternate_fn": "GPIO_AF4"}]
+    assert ps["I2C"]["I2C1"]["clockSpeed"] == 100_000
+    assert ps["I2C"]["I2C1"]["devices"] == [{"name": "LCD", "address": 0x27}]
+    assert pr == {}
+
+
+def test_inputs_are_not_modified():
+    pinout = dict(PINOUT, gpio=[{"port": "PA", "pin": 5}])
+    validate_configs(pinout, None, None)
+    assert pinout["gpio"] == [{"port": "PA", "pin": 5}]
+
+
+def test_migrates_version_1():
+    pinout = {"microcontroller": "STM32G474RE",
+              "peripherals": [{"type": "GPIO", "pins": [{"name": "LED", "port": "GPIOA", "pin": 5}]},
+                              {"type": "UART", "pins": [{"name": "TX", "port": "GPIOA", "pin": 2}]}]}
+    peripherals = {"USART": {"USART1": {"baudRate": 9600}}, "UART": {"UART2": {}}}
+    presets = [{"input_key": "Digital Input", "output_key": "UART"}]
+
+    pc, ps, pr = validate_configs(pinout, peripherals, presets)
+
+    assert pc["schema_version"] == config_schema.SCHEMA_VERSION
+    assert [(p["name"], p["pin"]) for p in pc["gpio"]] == [("LED", 5), ("TX", 2)]
+    assert set(ps["UART"]) == {"USART1", "UART2"}
+    assert ps["UART"]["USART1"]["baudRate"] == 9600
+    assert [c["input_key"] for c in pr["cases"]] == ["Digital Input"]
+
+
+def test_migrates_a_single_version_1_case():
+    _, _, pr = validate_configs({"gpio": []}, {}, {"input_key": "Digital Input", "output_key": "UART"})
+    assert len(pr["cases"]) == 1
+
+
+def test_newer_schema_version_is_rejected():
+    errors = errors_of(dict(PINOUT, schema_version=config_schema.SCHEMA_VERSION + 1))
+    assert len(errors) == 1
+    assert "newer than this generator supports" in errors[0]
+
+
+def test_reports_every_error_with_file_and_path():
+    pinout = dict(PINOUT, gpio=[{"port": "GPIOA", "pin": 16}, {"port": "GPIOZ", "pin": 1, "mode": "FAST"}])
+    peripherals = {"UART": {"UART2": {"baudRate": "fast"}}}
+    presets = {"cases": [{"output_key": "UART"}]}
+
+    errors = errors_of(pinout, peripherals, presets)
+
+    assert "pinout_config.json: gpio[0].pin: 16 is out of range [0, 15]" in errors
+    assert any(e.startswith("pinout_config.json: gpio[1].port:") for e in errors)
+    assert any(e.startswith("pinout_config.json: gpio[1].mode:") for e in errors)
+    assert "peripheral_settings.json: UART.UART2.baudRate: 'fast' is not an integer" in errors
+    assert any(e.startswith("preset_settings.json: cases[0].input_key:") for e in errors)
+
+
+def test_duplicate_pins():
+    pinout = dict(PINOUT, gpio=[{"port": "GPIOA", "pin": 5}, {"port": "PA", "pin": 5}])
+    assert errors_of(pinout) == ["pinout_config.json: gpio[1]: GPIOA pin 5 is already used by gpio[0]"]
+
+
+def test_message_lists_at_most_max_reported_errors():
+    gpio = [{"port": "GPIOA", "pin": 16 + i} for i in range(config_schema.MAX_REPORTED_ERRORS + 5)]
+    with pytest.raises(ConfigValidationError) as exc:
+        validate_configs(dict(PINOUT, gpio=gpio), None, None)
+    assert len(exc.value.errors) == config_schema.MAX_REPORTED_ERRORS + 5
+    assert "... and 5 more" in str(exc.value)
+
+
+def test_only_adc1_is_accepted():
+    errors = errors_of(peripherals={"ADC": {"ADC2": {}}})
+    assert errors == ["peripheral_settings.json: ADC.ADC2: unexpected key (expected ADC1)"]
+
+
+def test_adc_cross_field_rules():
+    errors = errors_of(peripherals={"ADC": {"ADC1": {"oversamplingRatio": 3, "dma": True}}})
+    assert "peripheral_settings.json: ADC.ADC1.oversamplingRatio: 3 is not a power of two" in errors
+    assert "peripheral_settings.json: ADC.ADC1.dma: needs conversionMode CONTINUOUS or TIMER" in errors
+
+
+def test_dht11_sample_period():
+    case = {"input_key": "DHT11 Humidity & Temp Sensor", "output_key": "UART", "sample_period_ms": 500}
+    errors = errors_of(presets={"cases": [case]})
+    assert errors == ["preset_settings.json: cases[0].sample_period_ms: the DHT11 needs at least "
+                      f"{config_schema.DHT11_MIN_PERIOD_MS} ms between reads, got 500"]
+
+    validate_configs(PINOUT, None, {"cases": [dict(case, sample_period_ms=config_schema.DHT11_MIN_PERIOD_MS)]})
+
+
+@pytest.mark.parametrize("period, expected", [
+    ("250", []),
+    ("abc", ["sample_period_ms: 'abc' is not an integer"]),
+    ("0", ["sample_period_ms: 0 is out of range [1, 3600000]"]),
+    ("3600001", ["sample_period_ms: 3600001 is out of range [1, 3600000]"]),
+])
+def test_check_case(period, expected):
+    case, errors = config_schema.check_case({"input_key": "Digital Input", "output_key": "UART",
+                                             "sample_period_ms": period})
+    assert errors == expected
+    if not errors:
+        assert case["sample_period_ms"] == 250
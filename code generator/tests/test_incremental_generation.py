@@ -0,0 +1,83 @@
+# tests/test_incremental_generation.py
+"""Per-stage skipping through the generation manifest (.codegen_manifest.json)."""
+import os
+import shutil
+from pathlib import Path
+
+from generators import generate_all
+from generators.manifest import MANIFEST_NAME
+
+ALL_STAGES = sorted(name for name, _, _, _ in generate_all.STAGES)
+
+
+def mtimes(files) -> dict:
+    return {f: os.stat(f).st_mtime_ns for f in files}
+
+
+def test_first_run_generates_everything(generate, tmp_path):
+    files, report = generate()
+    assert report["stages_run"] == ALL_STAGES
+    assert report["stages_failed"] == []
+    assert {Path(f).name for f in files} >= {"gpio.c", "adc.c", "adc.h", "main.c", "presets_in.c"}
+    assert (tmp_path / MANIFEST_NAME).exists()
+
+
+def test_unchanged_config_skips_every_stage(generate):
+    files, _ = generate()
+    before = mtimes(files)
+
+    again, report = generate()
+
+    assert report["stages_run"] == []
+    assert report["stages_skipped"] == ALL_STAGES
+    assert sorted(again) == sorted(files)
+    assert mtimes(files) == before
+
+
+def test_only_stages_reading_a_changed_section_run(generate):
+    files, _ = generate()
+    gpio_c = next(f for f in files if f.endswith("gpio.c"))
+    before = mtimes([gpio_c])
+
+    _, report = generate(peripherals={"ADC": {"ADC1": {"conversionMode": "CONTINUOUS", "oversamplingRatio": 4}}})
+
+    assert "adc" in report["stages_run"]
+    assert {"gpio", "main", "i2c", "uart"} <= set(report["stages_skipped"])
+    assert mtimes([gpio_c]) == before
+
+
+def test_missing_output_reruns_its_stage(generate):
+    files, _ = generate()
+    gpio_c = next(f for f in files if f.endswith("gpio.c"))
+    os.remove(gpio_c)
+
+    _, report = generate()
+
+    assert report["stages_run"] == ["gpio"]
+    assert os.path.exists(gpio_c)
+
+
+def test_files_edited_in_place_are_restored_after_drift(generate, tmp_path):
+    project_root = generate_all.PROJ_ROOT
+    for rel in generate_all.EDITED_IN_PLACE.values():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(project_root / rel, tmp_path / rel)
+    hal_conf = tmp_path / generate_all.EDITED_IN_PLACE["hal_config"]
+    cmake = tmp_path / generate_all.EDITED_IN_PLACE["cmake"]
+
+    generate()
+    _, report = generate()
+    assert report["stages_run"] == []
+
+    # Reverted by hand: the ADC module off, adc.c out of the source list
+    hal_conf.write_text(hal_conf.read_text().replace("#define HAL_ADC_MODULE_ENABLED",
+                                                     "/* #define HAL_ADC_MODULE_ENABLED */"))
+    cmake.write_text("\n".join(line for line in cmake.read_text().split("\n") if "adc.c" not in line))
+
+    _, report = generate()
+
+    assert report["stages_run"] == ["cmake", "hal_config"]
+    assert "\n#define HAL_ADC_MODULE_ENABLED" in hal_conf.read_text()
+    assert "Core/Src/adc.c" in cmake.read_text()
+    _, report = generate()
+    assert report["stages_run"] == []
@@ -0,0 +1,93 @@
+# tests/test_output_writer.py
+import hashlib
+import os
+import re
+
+from generators import metrics, template_engine
+from generators.output_writer import content_hash, track_outputs, write_if_changed
+
+
+def test_writes_new_files_and_parent_folders(tmp_path):
+    path = tmp_path / "Core" / "Inc" / "gpio.h"
+    assert write_if_changed(path, "#define A 1\n")
+    assert path.read_text(encoding="utf-8") == "#define A 1\n"
+    assert not list(path.parent.glob("*.tmp"))
+
+
+def test_unchanged_content_keeps_the_file_untouched(tmp_path):
+    path = tmp_path / "gpio.c"
+    write_if_changed(path, "int x;\n")
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    assert not write_if_changed(path, "int x;\n")
+    assert path.stat().st_mtime_ns == 1_000_000_000
+
+    assert write_if_changed(path, "int y;\n")
+    assert path.read_text(encoding="utf-8") == "int y;\n"
+    assert path.stat().st_mtime_ns != 1_000_000_000
+
+
+def test_same_size_different_content_is_written(tmp_path):
+    path = tmp_path / "main.c"
+    write_if_changed(path, "aaaa")
+    assert write_if_changed(path, "bbbb")
+    assert path.read_text(encoding="utf-8") == "bbbb"
+
+
+def test_counts_written_and_unchanged_files(tmp_path):
+    with metrics.collect() as counters:
+        write_if_changed(tmp_path / "a.h", "x")
+        write_if_changed(tmp_path / "a.h", "x")
+        write_if_changed(tmp_path / "b.h", "yz")
+    assert counters["files_written"] == 2
+    assert counters["files_unchanged"] == 1
+    assert counters["bytes_written"] == 3
+
+
+def test_track_outputs_records_written_and_unchanged_files(tmp_path):
+    write_if_changed(tmp_path / "a.h", "x")
+    with track_outputs() as outputs:
+        write_if_changed(tmp_path / "a.h", "x")
+        write_if_changed(tmp_path / "b.h", "y")
+    assert outputs == {str(tmp_path / "a.h"): content_hash(b"x"),
+                       str(tmp_path / "b.h"): content_hash(b"y")}
+
+    write_if_changed(tmp_path / "c.h", "z")   # Outside the block: not tracked
+    assert len(outputs) == 2
+
+
+def test_content_stamp_is_the_hash_of_the_text():
+    text = f"/* @date : {template_engine.CONTENT_STAMP} */\nint x;\n"
+    stamped = template_engine.finish_stamp(text)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    assert stamped == f"/* @date : content {digest} */\nint x;\n"
+    assert template_engine.finish_stamp("int x;\n") == "int x;\n"
+
+
+def test_deterministic_headers(generate, tmp_path):
+    generate()
+    gpio_c = (tmp_path / "Core" / "Src" / "gpio.c").read_text(encoding="utf-8")
+    stamp = re.search(r"@date\s+: content ([0-9a-f]{12})", gpio_c)
+    assert stamp
+    unstamped = gpio_c.replace(f"content {stamp.group(1)}", template_engine.CONTENT_STAMP)
+    assert hashlib.sha256(unstamped.encode("utf-8")).hexdigest()[:12] == stamp.group(1)
+
+
+def test_regeneration_rewrites_nothing(generate):
+    generate()
+    _, report = generate(incremental=False)
+    assert report["totals"]["files_written"] == 0
+    assert report["totals"]["files_unchanged"] > 0
+
+
+def test_outputs_no_longer_produced_are_removed(generate, tmp_path):
+    generate()
+    adc_c = tmp_path / "Core" / "Src" / "adc.c"
+    assert adc_c.exists()
+
+    presets = {"cases": [{"input_key": "Digital Input", "output_key": "Digital Output (LED)"}]}
+    generate(presets=presets)
+
+    assert not adc_c.exists()
+    assert not (tmp_path / "Core" / "Inc" / "adc.h").exists()
+    assert (tmp_path / "Core" / "Src" / "gpio.c").exists()
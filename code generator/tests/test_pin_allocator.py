@@ -0,0 +1,99 @@
+# tests/test_pin_allocator.py
+import pytest
+
+import data
+from pin_allocator import AllocationError, RESERVED_PINS, allocate
+
+MCU = "STM32G474RE"
+
+
+@pytest.fixture(scope="module")
+def mcu_data():
+    """Pin tables of the default part."""
+    assert data.load_initial_mapping()
+    return data.get_mcu(MCU)
+
+
+@pytest.fixture(scope="module")
+def presets():
+    """The preset mappings of presets.json, by name."""
+    assert data.load_presets()
+    return data.PRESETS["mappings"]
+
+
+def gpio_request(pin_choice: str) -> dict:
+    return {"type": "GPIO", "pins": [{"pin_choice": pin_choice, "label": "SIGNAL", "mode": "INPUT"}]}
+
+
+def pins(assignments) -> list[str]:
+    return [a.pin for a in assignments]
+
+
+def test_keeps_preferred_pins_when_they_fit(mcu_data, presets):
+    result = allocate(mcu_data, [("UART", presets["UART"]), ("Digital Input", presets["Digital Input"])])
+    assert pins(result) == ["PA2", "PA3", "PA1"]
+    assert [a.request for a in result] == [0, 0, 1]
+    assert result[0].af == "GPIO_AF7_USART2"
+
+
+def test_moves_one_of_two_requests_wanting_the_same_pin(mcu_data, presets):
+    result = allocate(mcu_data, [("Digital Input", presets["Digital Input"]),
+                                 ("DHT11", presets["DHT11 Humidity & Temp Sensor"])])
+    assert result[0].pin == "PA1"
+    assert result[1].pin != "PA1"
+    assert result[1].preferred_pin == "PA1"
+
+
+def test_devices_on_one_i2c_bus_share_its_pins(mcu_data, presets):
+    result = allocate(mcu_data, [("GY-521", presets["GY-521 Sensor"]), ("LCD", presets["LCD 20x4 (I2C)"])])
+    assert pins(result) == ["PB8", "PB9", "PB8", "PB9"]
+    assert {a.instance for a in result} == {"I2C1"}
+
+
+def test_avoids_occupied_pins(mcu_data, presets):
+    result = allocate(mcu_data, [("UART", presets["UART"])], occupied=["PA2"])
+    assert "PA2" not in pins(result)
+    assert {a.role for a in result} == {"tx", "rx"}
+
+
+def test_reserved_pins_are_never_picked_automatically(mcu_data):
+    free = [p for p in mcu_data["gpio_pins"] if p not in RESERVED_PINS]
+    with pytest.raises(AllocationError) as exc:
+        allocate(mcu_data, [("DIN", gpio_request("PA1"))], occupied=free)
+    assert exc.value.conflicts == ["DIN"]
+    assert "PA13 (SWDIO)" in str(exc.value)
+
+    # Without reserved pins, the same request gets one of them.
+    result = allocate(mcu_data, [("DIN", gpio_request("PA1"))], occupied=free, reserved={})
+    assert result[0].pin in RESERVED_PINS
+
+
+def test_reserved_pin_named_as_pin_choice_is_used(mcu_data):
+    result = allocate(mcu_data, [("SWD GPIO", gpio_request("PA13"))])
+    assert pins(result) == ["PA13"]
+
+
+def test_many_gpios_leave_reserved_pins_alone(mcu_data):
+    count = len([p for p in mcu_data["gpio_pins"] if p not in RESERVED_PINS])
+    result = allocate(mcu_data, [(f"DIN{i}", gpio_request("PA1")) for i in range(count)])
+    assert len(set(pins(result))) == count
+    assert not set(pins(result)) & set(RESERVED_PINS)
+
+    with pytest.raises(AllocationError):
+        allocate(mcu_data, [(f"DIN{i}", gpio_request("PA1")) for i in range(count + 1)])
+
+
+def test_unavailable_instance_moves_to_another(mcu_data):
+    request = {"type": "UART", "instance": "UART9", "pins": [{"role": "tx", "pin_choice": "PA2"}]}
+    result = allocate(mcu_data, [("UART9", request)])
+    assert result[0].instance in mcu_data["uart_interfaces"]
+    assert result[0].af
+
+
+def test_role_without_pins_is_reported(mcu_data):
+    request = {"type": "I2C", "instance": "I2C1", "pins": [{"role": "clk", "pin_choice": "PB8"}]}
+    with pytest.raises(AllocationError) as exc:
+        allocate(mcu_data, [("Bus", request)])
+    assert exc.value.conflicts == ["Bus"]
+    assert "no I2C I2C1 pins for clk" in str(exc.value)
+
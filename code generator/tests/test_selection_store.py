@@ -0,0 +1,72 @@
+# tests/test_selection_store.py
+import selection_store
+from selection_store import SelectionStore
+
+
+def row(port: str, pin, type_: str = "GPIO", instance: str = "", name: str = "") -> dict:
+    return {"type": type_, "instance": instance, "name": name, "port": port, "pin": pin, "mode": "INPUT"}
+
+
+def test_pin_numbers_are_keys_as_strings():
+    store = SelectionStore([row("GPIOA", 5)])
+    assert store.get("GPIOA", "5") is store.get("GPIOA", 5)
+    assert ("GPIOA", "5") in store
+    assert not store.add(row("GPIOA", "5"))
+    assert len(store) == 1
+
+
+def test_behaves_like_the_old_list():
+    rows = [row("GPIOA", 1), row("GPIOB", 2), row("GPIOC", 3)]
+    store = SelectionStore(rows)
+    assert list(store) == rows
+    assert store[1] is rows[1]
+    assert store[-1] is rows[2]
+    assert store
+    assert not SelectionStore()
+    store.append(row("GPIOA", 4))
+    assert len(store) == 4
+
+
+def test_labels_and_iids():
+    store = SelectionStore([row("GPIOA", 5)])
+    assert store.is_used("PA5")
+    assert not store.is_used("PA6")
+    assert not store.is_used("")
+    assert store.get_label("PA5") is store.get("GPIOA", 5)
+    iid = selection_store.row_iid(store.get("GPIOA", 5))
+    assert iid == "GPIOA:5"
+    assert selection_store.iid_key(iid) == selection_store.pin_key("GPIOA", 5)
+
+
+def test_indexes_follow_add_and_remove():
+    store = SelectionStore([row("GPIOB", 8, "I2C", "I2C1", "SCL"), row("GPIOB", 9, "I2C", "I2C1", "SDA"),
+                            row("GPIOA", 2, "USART", "USART2"), row("GPIOA", 5)])
+    assert [r["name"] for r in store.by_instance("I2C1")] == ["SCL", "SDA"]
+    assert store.instances("I2C") == {"I2C1"}
+    assert store.instances(*selection_store.UART_TYPES) == {"USART2"}
+    assert len(store.by_type("GPIO")) == 1
+
+    store.remove("GPIOB", 8)
+    assert store.instances("I2C") == {"I2C1"}   # SDA still uses it
+    assert store.remove("GPIOB", "9")["name"] == "SDA"
+    assert store.instances("I2C") == set()
+    assert store.by_instance("I2C1") == []
+    assert store.remove("GPIOB", 9) is None
+
+
+def test_update_reindexes():
+    store = SelectionStore([row("GPIOA", 9, "UART", "USART1")])
+    updated = store.update("GPIOA", 9, type="GPIO", instance="", mode="OUTPUT_PP")
+    assert updated is store.get("GPIOA", 9)
+    assert updated["mode"] == "OUTPUT_PP"
+    assert store.instances("UART") == set()
+    assert store.by_type("GPIO") == [updated]
+    assert store.update("GPIOA", 10, mode="INPUT") is None
+
+
+def test_clear():
+    store = SelectionStore([row("GPIOB", 8, "I2C", "I2C1")])
+    store.clear()
+    assert len(store) == 0
+    assert store.instances("I2C") == set()
+    assert store.add(row("GPIOB", 8, "I2C", "I2C1"))
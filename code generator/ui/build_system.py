@@ -0,0 +1,341 @@
+# build_system.py
+"""Incremental CMake build and flash of the generated project (no tkinter).
+
+The build directory is kept between builds and keyed by preset and toolchain
+(build/<preset>-<key>), so switching toolchains never reuses a stale cache and
+a rebuild without edits only runs the (no-op) Ninja/Make step.
+"""
+from __future__ import annotations
+import glob
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+THIS = Path(__file__).resolve()
+GEN_DIR = THIS.parent.parent
+PROJ_ROOT = GEN_DIR.parent
+CACHE_DIR = GEN_DIR / ".cache"
+TOOLCHAIN_CACHE = CACHE_DIR / "toolchain.json"
+
+GCC_NAME = "arm-none-eabi-gcc.exe" if sys.platform == "win32" else "arm-none-eabi-gcc"
+
+# Install locations probed when arm-none-eabi-gcc is not on PATH (glob patterns).
+TOOLCHAIN_SEARCH_PATTERNS = [
+    os.path.join(os.environ.get("LOCALAPPDATA", ""), "stm32cube", "bundles", "gnu-tools-for-stm32", "*", "bin"),
+    r"C:\ST\STM32CubeIDE_*\STM32CubeIDE\plugins\*gnu-tools-for-stm32*\tools\bin",
+    r"C:\Program Files (x86)\Arm GNU Toolchain arm-none-eabi\*\bin",
+    os.path.join(str(Path.home()), ".local", "share", "stm32cube", "bundles", "gnu-tools-for-stm32", "*", "bin"),
+    "/opt/st/stm32cubeide_*/plugins/*gnu-tools-for-stm32*/tools/bin",
+    "/opt/gcc-arm-none-eabi*/bin",
+    "/Applications/STM32CubeIDE.app/Contents/Eclipse/plugins/*gnu-tools-for-stm32*/tools/bin",
+]
+
+TOOLCHAIN_FILE_CANDIDATES = [
+    "cmake/gcc-arm-none-eabi.cmake",
+    "cmake/stm32cubemx/STM32G474xx.cmake",
+    "cmake/stm32cubemx/STM32G4xx.cmake",
+    "cmake/stm32cubemx/toolchain.cmake",
+]
+
+# Files whose changes require running the CMake configure step again.
+CMAKE_STRUCTURE_FILES = [
+    "CMakeLists.txt",
+    "CMakePresets.json",
+    "cmake/stm32cubemx/CMakeLists.txt",
+]
+
+CONFIGURE_STAMP = ".codegen_configure.json"
+
+
+class BuildError(Exception):
+    """A build step failed. `title` is a short summary suitable for a dialog title."""
+
+    def __init__(self, title: str, message: str):
+        self.title = title
+        self.message = message
+        super().__init__(f"{title}: {message}")
+
+
+def _file_hash(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _discover_toolchain() -> str | None:
+    """Finds the folder containing arm-none-eabi-gcc (PATH first, then known installs)."""
+    on_path = shutil.which("arm-none-eabi-gcc")
+    if on_path:
+        return os.path.dirname(on_path)
+    for pattern in TOOLCHAIN_SEARCH_PATTERNS:
+        # Newest version first when several are installed side by side.
+        for folder in sorted(glob.glob(pattern), reverse=True):
+            if os.path.isfile(os.path.join(folder, GCC_NAME)):
+                return folder
+    return None
+
+
+def find_toolchain(refresh: bool = False) -> str | None:
+    """Returns the ARM GCC bin folder, using the cached result while it is still valid.
+
+    Args:
+        refresh: Ignore the cache and search again.
+    """
+    if not refresh:
+        try:
+            with open(TOOLCHAIN_CACHE, "r", encoding="utf-8") as f:
+                cached = json.load(f).get("bin_dir")
+            if cached and os.path.isfile(os.path.join(cached, GCC_NAME)):
+                return cached
+        except (OSError, ValueError):
+            pass
+
+    bin_dir = _discover_toolchain()
+    if bin_dir:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(TOOLCHAIN_CACHE, "w", encoding="utf-8") as f:
+                json.dump({"bin_dir": bin_dir}, f)
+        except OSError as e:
+            print(f"[BUILD] Warning: could not cache toolchain location: {e}")
+    return bin_dir
+
+
+def select_generator() -> str:
+    """Ninja when available, otherwise the platform's Makefile generator."""
+    if shutil.which("ninja"):
+        return "Ninja"
+    if sys.platform == "win32":
+        return "MinGW Makefiles"
+    return "Unix Makefiles"
+
+
+def find_toolchain_file(project_root: Path) -> str | None:
+    for candidate in TOOLCHAIN_FILE_CANDIDATES:
+        if (project_root / candidate).exists():
+            return candidate
+    return None
+
+
+def build_dir_for(project_root: Path, preset: str, toolchain_dir: str, generator: str,
+                  toolchain_file: str | None) -> Path:
+    """Returns build/<preset>-<key>, where key identifies toolchain and generator."""
+    key = hashlib.sha256(
+        json.dumps([os.path.normcase(toolchain_dir), generator, toolchain_file]).encode("utf-8")
+    ).hexdigest()[:8]
+    return project_root / "build" / f"{preset}-{key}"
+
+
+def _configure_inputs(project_root: Path, toolchain_file: str | None) -> dict:
+    return {
+        "toolchain_file": _file_hash(project_root / toolchain_file) if toolchain_file else None,
+        "structure": {name: _file_hash(project_root / name) for name in CMAKE_STRUCTURE_FILES},
+    }
+
+
+def _load_stamp(build_dir: Path) -> dict | None:
+    try:
+        with open(build_dir / CONFIGURE_STAMP, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Build steps, in order; progress callbacks report (step index + fraction, len(BUILD_STEPS), label).
+BUILD_STEPS = ("Configure", "Build", "Flash")
+
+# "[12/40] Building C object ..." (Ninja) and "[ 45%] Building C object ..." (Make)
+_NINJA_PROGRESS = re.compile(r"^\[\s*(\d+)/(\d+)\]")
+_MAKE_PROGRESS = re.compile(r"^\[\s*(\d+)%\]")
+
+
+class BuildCancelled(BuildError):
+    """The build was cancelled by the user."""
+
+    def __init__(self):
+        super().__init__("Cancelled", "Build cancelled.")
+
+
+def _output_fraction(line: str) -> float | None:
+    """Returns the build progress reported by a Ninja/Make output line, if any."""
+    m = _NINJA_PROGRESS.match(line)
+    if m and int(m.group(2)):
+        return int(m.group(1)) / int(m.group(2))
+    m = _MAKE_PROGRESS.match(line)
+    if m:
+        return int(m.group(1)) / 100
+    return None
+
+
+def _run(cmd: list[str], env: dict, cwd: Path, timeout: int, title: str,
+         log=print, cancel=None, on_fraction=None) -> str:
+    """Runs a command, streaming its combined stdout/stderr line by line to `log`.
+
+    Args:
+        log: Called with each output line (without the newline).
+        cancel: Optional threading.Event; the process is killed once it is set.
+        on_fraction: Called with the progress (0..1) parsed from Ninja/Make output.
+
+    Returns:
+        str: The last lines of output.
+
+    Raises:
+        BuildError: On a non-zero exit code, timeout or missing CMake.
+        BuildCancelled: If `cancel` was set.
+    """
+    log(f"[BUILD] Running: {' '.join(cmd)}")
+    try:
+        proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, errors="replace", bufsize=1)
+    except FileNotFoundError as e:
+        raise BuildError("CMake Not Found",
+                         "CMake is not installed or not in PATH.\n\n"
+                         "Please install CMake and ensure it's available in your system PATH.") from e
+
+    # A reader thread keeps the pipe drained while this thread watches cancel/timeout.
+    lines: queue.Queue[str | None] = queue.Queue()
+    def _reader():
+        for line in proc.stdout:
+            lines.put(line.rstrip("\r\n"))
+        lines.put(None)
+    threading.Thread(target=_reader, daemon=True).start()
+
+    tail: deque[str] = deque(maxlen=200)
+    deadline = time.monotonic() + timeout
+    while True:
+        if cancel is not None and cancel.is_set():
+            proc.kill(); proc.wait()
+            raise BuildCancelled()
+        if time.monotonic() > deadline:
+            proc.kill(); proc.wait()
+            raise BuildError("Timeout", f"'{' '.join(cmd)}' timed out after {timeout}s.")
+        try:
+            line = lines.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if line is None:
+            break
+        tail.append(line)
+        log(line)
+        if on_fraction is not None:
+            fraction = _output_fraction(line)
+            if fraction is not None:
+                on_fraction(fraction)
+
+    output = "\n".join(tail)
+    if proc.wait() != 0:
+        raise BuildError(title, output)
+    return output
+
+
+def build_project(project_root: str | Path | None = None, preset: str = "Debug",
+                  flash: bool = True, log=print, progress=None, cancel=None) -> dict:
+    """Configures (only when needed), builds and optionally flashes the project.
+
+    The configure step is skipped while the toolchain file and CMake structure
+    files are unchanged; when only the CMake structure changed the existing
+    cache is reused, and when the toolchain file changed the cache is dropped.
+
+    Args:
+        project_root: Project folder (defaults to the repository root).
+        preset: Build type / CMakePresets.json preset name (Debug or Release).
+        flash: Run the 'flash' target after a successful build.
+        log: Receives every status and CMake/compiler output line as it appears.
+        progress: Optional callback (done, total, label) fed from BUILD_STEPS.
+        cancel: Optional threading.Event that stops the running step.
+
+    Returns:
+        dict: build_dir, configured (bool), build_seconds, flash_ok (None if not
+              attempted) and flash_output.
+
+    Raises:
+        BuildError: If the toolchain is missing or configure/build fails.
+        BuildCancelled: If `cancel` was set.
+    """
+    def _progress(step: int, fraction: float = 0.0):
+        if progress is not None:
+            progress(step + fraction, len(BUILD_STEPS), BUILD_STEPS[min(step, len(BUILD_STEPS) - 1)])
+
+    root = Path(project_root) if project_root else PROJ_ROOT
+    if not (root / "Core" / "Src" / "main.c").exists():
+        raise BuildError("Code Not Generated", "Please generate code first before building and flashing.")
+
+    toolchain_dir = find_toolchain()
+    if not toolchain_dir:
+        raise BuildError("Toolchain Not Found",
+                         "STM32 ARM toolchain (arm-none-eabi-gcc) not found. Please ensure "
+                         "STM32CubeIDE or STM32CubeCLT is installed, or add it to PATH.")
+
+    env = os.environ.copy()
+    env["PATH"] = toolchain_dir + os.pathsep + env.get("PATH", "")
+
+    generator = select_generator()
+    toolchain_file = find_toolchain_file(root)
+    build_dir = build_dir_for(root, preset, toolchain_dir, generator, toolchain_file)
+    inputs = _configure_inputs(root, toolchain_file)
+    stamp = _load_stamp(build_dir)
+    has_cache = (build_dir / "CMakeCache.txt").exists()
+
+    _progress(0)
+    configured = False
+    if not has_cache or stamp != inputs:
+        if has_cache and stamp and stamp.get("toolchain_file") != inputs["toolchain_file"]:
+            # Compiler settings are cached at first configure: start from a clean cache.
+            log("[BUILD] Toolchain file changed, dropping the CMake cache")
+            os.remove(build_dir / "CMakeCache.txt")
+            shutil.rmtree(build_dir / "CMakeFiles", ignore_errors=True)
+
+        config_cmd = ["cmake", "-S", str(root), "-B", str(build_dir), "-G", generator,
+                      f"-DCMAKE_BUILD_TYPE={preset}"]
+        if toolchain_file:
+            config_cmd.extend(["--toolchain", toolchain_file])
+        try:
+            _run(config_cmd, env, root, 120, "CMake Config Error", log, cancel)
+        except BuildCancelled:
+            raise
+        except BuildError as e:
+            e.message += f"\n\nTried toolchain file: {toolchain_file or 'None found'}"
+            raise
+        with open(build_dir / CONFIGURE_STAMP, "w", encoding="utf-8") as f:
+            json.dump(inputs, f, indent=2)
+        configured = True
+    else:
+        log(f"[BUILD] Reusing configured build directory: {build_dir}")
+
+    _progress(1)
+    start = time.perf_counter()
+    _run(["cmake", "--build", str(build_dir), "--parallel"], env, root, 300, "Build Error",
+         log, cancel, lambda fraction: _progress(1, fraction))
+    build_seconds = time.perf_counter() - start
+    log(f"[BUILD] Build finished in {build_seconds:.1f}s")
+
+    flash_ok, flash_output = None, ""
+    if flash:
+        _progress(2)
+        try:
+            flash_output = _run(["cmake", "--build", str(build_dir), "--target", "flash"],
+                                env, root, 60, "Flash Failed", log, cancel)
+            flash_ok = True
+        except BuildCancelled:
+            raise
+        except BuildError as e:
+            flash_ok, flash_output = False, e.message
+
+    _progress(len(BUILD_STEPS))
+    return {
+        "build_dir": str(build_dir),
+        "configured": configured,
+        "build_seconds": build_seconds,
+        "flash_ok": flash_ok,
+        "flash_output": flash_output,
+    }
@@ -0,0 +1,138 @@
+# cli.py
+"""Headless code generation (no tkinter), e.g. for CI.
+
+Usage (from the 'code generator' folder):
+    python ui/cli.py Config
+    python ui/cli.py boards/* --output-dir build/generated --jobs 8
+
+Each folder must contain pinout_config.json (peripheral_settings.json and
+preset_settings.json are optional). A single folder is generated into the
+project tree, like the UI does; with --output-dir every folder is generated
+into <output-dir>/<folder name>.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import config_loader
+from generators import generate_all
+
+
+def _output_roots(parser: argparse.ArgumentParser, folders: list[str], output_dir: str | None) -> list[str | None]:
+    """Returns the output root of each folder (None = the project tree)."""
+    if output_dir is None:
+        if len(folders) > 1:
+            parser.error("--output-dir is required when generating more than one folder")
+        return [None]
+
+    roots, seen = [], {}
+    for folder in folders:
+        name = Path(folder).resolve().name
+        if name in seen:
+            parser.error(f"'{folder}' and '{seen[name]}' would both generate into '{name}'")
+        seen[name] = folder
+        roots.append(str(Path(output_dir) / name))
+    return roots
+
+
+def generate_folder(folder: str, output_root: str | None, incremental: bool = True,
+                    max_workers: int | None = None) -> dict:
+    """Generates one configuration folder, capturing the generator output.
+
+    Returns:
+        dict: folder, output_root, files, metrics (generation report, None on
+              error), error (None on success), log and seconds.
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    files, report, error = [], None, None
+    with contextlib.redirect_stdout(log):
+        try:
+            pinout, peripherals, presets = config_loader.load_config_folder(folder)
+            files, report = generate_all.generate_project_files(
+                pinout, peripherals, presets,
+                max_workers=max_workers,
+                incremental=incremental,
+                output_root=output_root,
+                strict=True,
+            )
+        except Exception as e:
+            error = str(e)
+    return {
+        "folder": folder,
+        "output_root": output_root,
+        "files": files,
+        "metrics": report,
+        "error": error,
+        "log": log.getvalue(),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _report(result: dict, verbose: bool):
+    target = result["output_root"] or str(generate_all.PROJ_ROOT)
+    if verbose or result["error"]:
+        print(result["log"], end="")
+    if result["error"]:
+        print(f"[FAILED] {result['folder']}: {result['error']}")
+    else:
+        print(f"[OK] {result['folder']} -> {target} "
+              f"({len(result['files'])} file(s), {result['seconds']:.2f}s)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate STM32 project files from exported configuration folders.")
+    parser.add_argument("folders", nargs="+", help="folders containing pinout_config.json and friends")
+    parser.add_argument("-o", "--output-dir", help="generate each folder into OUTPUT_DIR/<folder name>")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of folders generated in parallel (processes)")
+    parser.add_argument("--full", action="store_true", help="re-render every stage, ignoring the generation manifest")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the generator output of every folder")
+    parser.add_argument("--metrics", metavar="FILE", help="write the per-stage metrics of every folder to FILE (JSON)")
+    args = parser.parse_args(argv)
+
+    for folder in args.folders:
+        if not os.path.isdir(folder):
+            parser.error(f"not a folder: {folder}")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    roots = _output_roots(parser, args.folders, args.output_dir)
+
+    start = time.perf_counter()
+    failures = 0
+    reports = {}
+    if args.jobs == 1 or len(args.folders) == 1:
+        for folder, root in zip(args.folders, roots):
+            result = generate_folder(folder, root, not args.full)
+            failures += bool(result["error"])
+            reports[folder] = result["metrics"]
+            _report(result, args.verbose)
+    else:
+        # One process per folder; stages inside a folder run sequentially so
+        # the pool size is the real degree of parallelism.
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(generate_folder, folder, root, not args.full, 1)
+                       for folder, root in zip(args.folders, roots)]
+            for future in as_completed(futures):
+                result = future.result()
+                failures += bool(result["error"])
+                reports[result["folder"]] = result["metrics"]
+                _report(result, args.verbose)
+
+    print(f"\nGenerated {len(args.folders) - failures}/{len(args.folders)} folder(s) "
+          f"in {time.perf_counter() - start:.2f}s")
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        print(f"Metrics written to {args.metrics}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# config_loader.py
+"""Loads exported configuration folders without touching the UI (no tkinter).
+
+The files are returned as parsed; their shape is migrated and validated by
+generators.config_schema when generate_project_files() runs.
+"""
+from __future__ import annotations
+import json
+import os
+
+PINOUT_FILE = "pinout_config.json"
+PERIPHERAL_FILE = "peripheral_settings.json"
+PRESET_FILE = "preset_settings.json"
+
+
+class ConfigLoadError(Exception):
+    """Raised when a configuration file exists but cannot be used."""
+
+    def __init__(self, file_name: str, error: Exception):
+        self.file_name = file_name
+        self.error = error
+        super().__init__(f"Could not read '{file_name}':\n{error}")
+
+
+def load_config_folder(folder_path: str) -> tuple[dict, dict, dict]:
+    """Loads the three configuration files exported by the UI.
+
+    pinout_config.json is required; peripheral_settings.json and
+    preset_settings.json are optional.
+
+    Args:
+        folder_path: Folder containing the exported JSON files.
+
+    Returns:
+        (pinout_config, peripheral_settings, preset_settings)
+
+    Raises:
+        ConfigLoadError: If a file cannot be read or parsed.
+    """
+    try:
+        with open(os.path.join(folder_path, PINOUT_FILE), "r", encoding="utf-8") as f:
+            pinout_data = json.load(f)
+    except Exception as e:
+        raise ConfigLoadError(PINOUT_FILE, e) from e
+
+    peripheral_data = {}
+    try:
+        with open(os.path.join(folder_path, PERIPHERAL_FILE), "r", encoding="utf-8") as f:
+            peripheral_data = json.load(f)
+    except FileNotFoundError:
+        print(f"Info: '{PERIPHERAL_FILE}' not found. Continuing without peripheral-specific settings.")
+    except Exception as e:
+        raise ConfigLoadError(PERIPHERAL_FILE, e) from e
+
+    preset_settings = {}
+    try:
+        with open(os.path.join(folder_path, PRESET_FILE), "r", encoding="utf-8") as f:
+            preset_settings = json.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        raise ConfigLoadError(PRESET_FILE, e) from e
+
+    return pinout_data, peripheral_data, preset_settings
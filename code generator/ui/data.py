@@ -1,41 +1,241 @@
 # data.py
 from __future__ import annotations
 import os
+import sys
+import hashlib
+import marshal
+from collections import OrderedDict
+from collections.abc import Mapping
 from pathlib import Path
 import json
+from typing import NamedTuple
 
 THIS = Path(__file__).resolve()             
 GEN_DIR = THIS.parent.parent                       
 PROJ_ROOT = GEN_DIR.parent.parent.parent                   
-PATH_PIN = GEN_DIR / "Mappings" / "pin_map.json"
+PATH_MCU_DB = GEN_DIR / "Mappings" / "mcu"
+PATH_MCU_INDEX = PATH_MCU_DB / "index.json"
 PATH_HAL = GEN_DIR / "Mappings" / "hal_map.json"
 PATH_PRESETS = GEN_DIR / "Mappings" / "presets.json"
 
+# Parsed mapping files are cached here in marshal form (see _load_json).
+MAPPING_CACHE_DIR = GEN_DIR / ".cache" / "mappings"
+_MAPPING_CACHE_FORMAT = 1
+# Mapping file (relative to Mappings/) -> how the last load was served:
+# "cache", "cache (hash)" or "parsed".
+LOAD_STATS: dict[str, str] = {}
+
 # Default peripheral types for the main dropdown.
 DEFAULT_TYPES = ["GPIO", "I2C", "UART", "SPI", "ADC"]
 
-# MCU_MAP will be populated at runtime by loading the JSON file.
-MCU_MAP = {}
+# Preset input -> outputs it can be combined with (presets.json keys).
+VALID_PRESET_COMBINATIONS = {
+    "Digital Input": ["Digital Output (LED)"],
+    "Potentiometer (ADC)": ["Digital Output (LED)", "UART"],
+    "GY-521 Sensor": ["LCD 20x4 (I2C)", "UART"],
+    "DHT11 Humidity & Temp Sensor": ["LCD 20x4 (I2C)", "UART"],
+}
+
+# Parts kept in memory by the MCU database (least recently used ones are dropped).
+MCU_CACHE_SIZE = 4
+
 HAL_MAPPINGS = {}
 
 
+class PinFunction(NamedTuple):
+    """One thing a pin can be used for (an entry of the reverse pin index)."""
+    type: str          # "I2C", "UART", "SPI", "TIM", "ADC"
+    instance: str      # "I2C1", "UART2", "ADC12", ...
+    role: str          # "scl", "tx", "ch2", ... ("" for ADC inputs)
+    af: str = ""       # Full AF constant, e.g. "GPIO_AF4_I2C1"
+    adc_channel: str = ""  # e.g. "ADC_IN1"
+
+
+# Types whose pins are described by *_interfaces (role -> pins) + *_af_mapping.
+_AF_TYPES = ("I2C", "UART", "SPI", "TIM")
+
+
+def _load_json(path: Path):
+    """json.load() of a mapping file, served from a marshal cache when possible.
+
+    The cache entry records the source mtime, size and SHA-256. It is used
+    as-is while mtime and size match; otherwise the source is hashed and the
+    entry is still reused if only the mtime changed (e.g. after a checkout).
+    Entries are also keyed by the Python version, since the marshal format
+    is not portable. Any cache problem falls back to parsing the JSON.
+
+    Raises:
+        FileNotFoundError, json.JSONDecodeError: Like json.load() on the source.
+    """
+    st = os.stat(path)
+    mappings_dir = GEN_DIR / "Mappings"
+    if path.is_relative_to(mappings_dir):
+        name = path.relative_to(mappings_dir).as_posix()
+        cache_path = MAPPING_CACHE_DIR / f"{name.replace('/', '__')}.marshal"
+    else:
+        name = str(path)
+        cache_path = MAPPING_CACHE_DIR / f"{hashlib.sha1(name.encode()).hexdigest()[:12]}-{path.name}.marshal"
+    key = (_MAPPING_CACHE_FORMAT, tuple(sys.version_info[:2]))
+    cached = None
+    try:
+        with open(cache_path, "rb") as f:
+            cached = marshal.load(f)
+        if cached[0] != key:
+            cached = None
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        cached = None
+
+    if cached is not None and cached[1:3] == (st.st_mtime_ns, st.st_size):
+        LOAD_STATS[name] = "cache"
+        return cached[4]
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached is not None and cached[3] == digest:
+        LOAD_STATS[name] = "cache (hash)"
+        content = cached[4]
+    else:
+        LOAD_STATS[name] = "parsed"
+        content = json.loads(raw.decode("utf-8"))
+
+    try:
+        MAPPING_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            marshal.dump((key, st.st_mtime_ns, st.st_size, digest, content), f)
+        os.replace(tmp, cache_path)
+    except (OSError, ValueError):
+        pass  # The cache is only an optimization
+    return content
+
+
+class McuDatabase(Mapping):
+    """Per-MCU pin database (Mappings/mcu), loaded one part at a time.
+
+    Mappings/mcu/index.json lists the parts:
+        {"format": 1, "default": "<part>", "mcus": {"<part>": {"file": "<part>.json", ...}}}
+    and every part has its own file with the pin/interface/AF tables
+    ("gpio_pins", "<type>_interfaces", "<type>_af_mapping", "adc_pin_mapping").
+
+    Only the index is read up front. db[part] loads that part's file (and
+    builds its reverse pin index) on first use and keeps it in a small LRU of
+    MCU_CACHE_SIZE parts, so memory and startup time do not grow with the
+    catalogue. Iteration and `in` only use the index; avoid values()/items(),
+    which load every part.
+    """
+
+    def __init__(self, index: dict | None = None, folder: Path = PATH_MCU_DB, capacity: int = MCU_CACHE_SIZE):
+        index = index or {}
+        self.folder = Path(folder)
+        self.entries: dict[str, dict] = index.get("mcus", {})
+        self.default = index.get("default") or next(iter(self.entries), None)
+        self.capacity = max(1, capacity)
+        # part -> (part data, pin -> [PinFunction], (type, instance, pin) -> AF)
+        self._loaded: OrderedDict[str, tuple] = OrderedDict()
+
+    def __getitem__(self, mcu: str) -> dict:
+        return self._get(mcu)[0]
+
+    def __contains__(self, mcu) -> bool:
+        return mcu in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def loaded(self) -> list[str]:
+        """Parts currently in memory, least recently used first."""
+        return list(self._loaded)
+
+    def pin_index(self, mcu: str) -> dict[str, list[PinFunction]]:
+        return self._get(mcu)[1] if mcu in self.entries else {}
+
+    def af_index(self, mcu: str) -> dict[tuple[str, str, str], str]:
+        return self._get(mcu)[2] if mcu in self.entries else {}
+
+    def _get(self, mcu: str) -> tuple:
+        item = self._loaded.get(mcu)
+        if item is not None:
+            self._loaded.move_to_end(mcu)
+            return item
+        entry = self.entries[mcu]  # KeyError for unknown parts, like a dict
+        mcu_data = _load_json(self.folder / entry.get("file", f"{mcu}.json"))
+        item = self._loaded[mcu] = (mcu_data, *build_pin_index(mcu_data))
+        while len(self._loaded) > self.capacity:
+            self._loaded.popitem(last=False)
+        return item
+
+
+# MCU_MAP is filled by load_initial_mapping(); until then it knows no parts.
+MCU_MAP = McuDatabase()
+
+
 def load_initial_mapping():
     """
-    Loads the MCU mapping data from a JSON file into the global MCU_MAP variable.
+    Loads the MCU database index (Mappings/mcu/index.json) into MCU_MAP.
+    The default part is loaded right away; other parts on first use.
     Returns True on success, False on failure.
     """
     global MCU_MAP
     try:
-        with open(PATH_PIN, "r", encoding="utf-8") as f:
-            MCU_MAP = json.load(f)
+        MCU_MAP = McuDatabase(_load_json(PATH_MCU_INDEX))
+        if MCU_MAP.default:
+            MCU_MAP[MCU_MAP.default]
         return True
-    except FileNotFoundError:
-        print(f"Error: {PATH_PIN} not found.")
+    except FileNotFoundError as e:
+        print(f"Error: {e.filename} not found.")
         return False
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {PATH_PIN}.")
+        print(f"Error: Could not decode JSON from the MCU database ({PATH_MCU_DB}).")
         return False
-    
+
+
+def get_mcu(mcu: str) -> dict:
+    """Returns the pin/AF tables of a part, loading it if needed."""
+    return MCU_MAP[mcu]
+
+
+def build_pin_index(mcu_data: dict) -> tuple[dict[str, list[PinFunction]], dict[tuple[str, str, str], str]]:
+    """Builds the reverse index of one part of the MCU database.
+
+    Returns:
+        (pin -> every PinFunction the pin can serve, (type, instance, pin) -> AF constant).
+        Every GPIO pin of the MCU is a key of the first dict, even with no functions.
+    """
+    pins: dict[str, list[PinFunction]] = {pin: [] for pin in mcu_data.get("gpio_pins", [])}
+    afs: dict[tuple[str, str, str], str] = {}
+    for t in _AF_TYPES:
+        af_map = mcu_data.get(f"{t.lower()}_af_mapping", {})
+        for inst, roles in mcu_data.get(f"{t.lower()}_interfaces", {}).items():
+            for pin, af in af_map.get(inst, {}).items():
+                afs[(t, inst, pin)] = af
+            for role, role_pins in roles.items():
+                for pin in role_pins:
+                    af = afs.get((t, inst, pin), "")
+                    pins.setdefault(pin, []).append(PinFunction(t, inst, role, af))
+    for inst, channels in mcu_data.get("adc_pin_mapping", {}).items():
+        for channel, pin in channels.items():
+            pins.setdefault(pin, []).append(PinFunction("ADC", inst, "", "", channel))
+    return pins, afs
+
+
+def pin_functions(mcu: str, pin: str) -> list[PinFunction]:
+    """Returns everything `pin` (e.g. 'PA5') can do on `mcu` ([] if unknown)."""
+    return MCU_MAP.pin_index(mcu).get(pin, [])
+
+
+def pin_af(mcu: str, periph_type: str, instance: str, pin: str) -> str:
+    """Returns the AF constant of `pin` for a peripheral instance ("" if none).
+
+    USART is looked up as UART, like the UART tab treats them.
+    """
+    t = (periph_type or "").upper()
+    t = "UART" if t == "USART" else t
+    return MCU_MAP.af_index(mcu).get((t, instance, pin), "")
+
+
 def load_hal_mappings():
     """
     Loads the UI-to-HAL constant mappings from a JSON file into the HAL_MAPPINGS variable.
@@ -43,8 +243,7 @@ def load_hal_mappings():
     """
     global HAL_MAPPINGS
     try:
-        with open(PATH_HAL, "r", encoding="utf-8") as f:
-            HAL_MAPPINGS = json.load(f)
+        HAL_MAPPINGS = _load_json(PATH_HAL)
         return True
     except FileNotFoundError:
         print(f"Error: {PATH_HAL} not found.")
@@ -57,8 +256,7 @@ def load_presets():
     """Loads the presets configuration file."""
     global PRESETS
     try:
-        with open(PATH_PRESETS, "r", encoding="utf-8") as f:
-            PRESETS = json.load(f)
+        PRESETS = _load_json(PATH_PRESETS)
         return True
     except Exception as e:
         print(f"Warning: Could not load from {PATH_PRESETS}: {e}")
@@ -1,50 +1,109 @@
 # ui/generators/adc_generator.py
-from jinja2 import Template
-from datetime import datetime
 import os
+import re
+from . import template_engine
+from .output_writer import write_if_changed
+import data
 
-def generate_adc_files(output_dir_inc, output_dir_src, template_dir):
+
+def _adc1_signals(mcu: str) -> dict[str, str]:
+    """Pin -> ADC1 input signal ("PA0" -> "ADC_IN1") of an MCU, {} if unknown.
+
+    Shared inputs ("ADC12_IN1") count as ADC1 inputs too.
+    """
+    if not data.MCU_MAP:
+        data.load_initial_mapping()  # CLI and worker processes start without the index
+    if mcu not in data.MCU_MAP:
+        return {}
+    signals = {}
+    for inst, channels in data.get_mcu(mcu).get("adc_pin_mapping", {}).items():
+        m = re.fullmatch(r"ADC(\d+)", inst)
+        if m and "1" in m.group(1):
+            for signal, pin in channels.items():
+                signals.setdefault(pin, signal)
+    return signals
+
+
+def adc1_channel(pinout_config: dict, adc_settings: dict | None = None) -> str | None:
+    """ADC_CHANNEL_x converted by ADC1 (None if the pinout has no ADC1 input).
+
+    An explicit "channel" setting wins (e.g. ADC_CHANNEL_VREFINT); otherwise it
+    is the ADC_INx signal of the first ANALOG pin of the pinout ADC1 can read.
+    """
+    if (adc_settings or {}).get("channel"):
+        return adc_settings["channel"]
+    signals = _adc1_signals((pinout_config or {}).get("microcontroller", ""))
+    for g in (pinout_config or {}).get("gpio", []):
+        if g.get("mode") != "ANALOG":
+            continue
+        pin = f"P{g.get('port', '')[-1:]}{g.get('pin')}"
+        m = re.fullmatch(r"ADC\d*_IN(\d+)", signals.get(pin, ""))
+        if m:
+            return f"ADC_CHANNEL_{m.group(1)}"
+    return None
+
+
+def _adc_context(adc_settings, dma, channel="ADC_CHANNEL_1"):
+    """Template context of ADC1 from its validated settings (all optional).
+
+    Without settings the ADC is started and polled per conversion (SINGLE).
+    CONTINUOUS and TIMER keep it converting in the background; with "dma" the
+    results go round a circular buffer, so reading the latest one costs nothing.
+    """
+    s = adc_settings or {}
+    ratio = s.get("oversamplingRatio", 1)
+    shift = s.get("oversamplingShift", ratio.bit_length() - 1)
+    mode = s.get("conversionMode", "SINGLE")
+    return {
+        "channel": channel,
+        "sample_time": s.get("sampleTime", "ADC_SAMPLETIME_47CYCLES_5"),
+        "mode": mode,
+        "streaming": mode != "SINGLE",
+        "sample_rate_hz": s.get("sampleRateHz", 1000),
+        "oversampling": ratio > 1,
+        "oversampling_ratio": ratio,
+        "oversampling_shift": f"ADC_RIGHTBITSHIFT_{shift}" if shift else "ADC_RIGHTBITSHIFT_NONE",
+        "full_scale": (4095 * ratio) >> shift,   # Largest result after oversampling
+        "dma": (dma or {}).get("ADC1") if s.get("dma") else None,
+        "buffer_length": s.get("dmaBufferLength", 16),
+    }
+
+
+def generate_adc_files(output_dir_inc, output_dir_src, template_dir, adc_settings=None, dma=None,
+                       pinout_config=None):
     """
     Generate adc.c and adc.h files for ADC peripheral.
-    Always generates basic ADC1 configuration.
+    Always generates the ADC1 configuration; adc_settings (validated
+    peripheral_settings["ADC"]["ADC1"]) selects the conversion mode,
+    oversampling and DMA, and dma holds the channels from dma_allocator.allocate().
+    The converted channel comes from the ANALOG pin of pinout_config (adc1_channel()).
+    Templates come from the shared (bytecode-cached) template environment.
     """
     results = []
-    
+    channel = adc1_channel(pinout_config, adc_settings)
+    if channel is None:
+        channel = "ADC_CHANNEL_1"
+        print(f"  WARNING: no ANALOG pin on an ADC1 input in the pinout, converting {channel}")
+    context = {"adc": _adc_context(adc_settings, dma, channel)}
+
     # Render adc.h
     template_path_h = os.path.join(template_dir, "inc", "adc_template.h")
     if os.path.exists(template_path_h):
-        with open(template_path_h, 'r', encoding='utf-8') as f:
-            template_h = Template(f.read())
-        
-        context = {
-            "now": datetime.now
-        }
-        
-        rendered_h = template_h.render(context)
+        rendered_h = template_engine.render("adc_template.h", context, template_dir)
         output_path_h = os.path.join(output_dir_inc, "adc.h")
-        
-        with open(output_path_h, 'w', encoding='utf-8') as f:
-            f.write(rendered_h)
-        
-        results.append(f"Generated: {output_path_h}")
-    
+
+        write_if_changed(output_path_h, rendered_h)
+
+        results.append(output_path_h)
+
     # Render adc.c
     template_path_c = os.path.join(template_dir, "src", "adc_template.c")
     if os.path.exists(template_path_c):
-        with open(template_path_c, 'r', encoding='utf-8') as f:
-            template_c = Template(f.read())
-        
-        context = {
-            "now": datetime.now
-        }
-        
-        rendered_c = template_c.render(context)
+        rendered_c = template_engine.render("adc_template.c", context, template_dir)
         output_path_c = os.path.join(output_dir_src, "adc.c")
-        
-        with open(output_path_c, 'w', encoding='utf-8') as f:
-            f.write(rendered_c)
-        
-        results.append(f"Generated: {output_path_c}")
-    
-    return results
 
+        write_if_changed(output_path_c, rendered_c)
+
+        results.append(output_path_c)
+
+    return results
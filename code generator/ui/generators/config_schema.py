@@ -0,0 +1,505 @@
+# generators/config_schema.py
+"""Validation and version migration of the three exported config files.
+
+generate_project_files() runs validate_configs() once, before any stage runs
+or any file is removed. It migrates older shapes to the current one, checks
+every field against the schema below, and returns canonical copies, so the
+generators read a single shape:
+
+  pinout_config.json        {"schema_version", "project_name", "microcontroller",
+                             "gpio": [{"name", "port": "GPIOx", "pin": 0-15,
+                                       "mode", "pull", "speed", "alternate_fn"}]}
+  peripheral_settings.json  {"I2C": {"I2Cx": {...}}, "UART": {"UARTx": {...}},
+                             "ADC": {"ADC1": {...}}, ...}
+  preset_settings.json      {"cases": [{"input_key", "output_key", "processing",
+                             "threshold", "peripheral_settings",
+                             "sample_period_ms"}]}, or {}
+
+The schema is declared with the small node classes below and compiled into
+plain closures at import time, so validating a config is a single pass with
+no per-field dispatch on the schema. Every problem is reported with its file
+and path (e.g. "pinout_config.json: gpio[3].pin"), all at once.
+
+The version lives in pinout_config.json ("schema_version"); files without it
+are version 1 (the legacy shapes: pinout blocks under "peripherals", preset
+cases as a bare list or a single case, "USART" settings next to "UART").
+"""
+from __future__ import annotations
+import re
+from typing import Callable
+
+SCHEMA_VERSION = 2
+
+PINOUT_FILE = "pinout_config.json"
+PERIPHERAL_FILE = "peripheral_settings.json"
+PRESET_FILE = "preset_settings.json"
+
+# Errors listed in the exception message (all of them are in .errors)
+MAX_REPORTED_ERRORS = 20
+
+GPIO_MODES = ("INPUT", "OUTPUT_PP", "OUTPUT_OD", "AF_PP", "AF_OD", "ANALOG")
+GPIO_PULLS = ("NOPULL", "PULLUP", "PULLDOWN")
+GPIO_SPEEDS = ("LOW", "MEDIUM", "HIGH", "VERY_HIGH")
+TRANSFER_MODES = ("POLLING", "INTERRUPT", "DMA")
+ADC_CONVERSION_MODES = ("SINGLE", "CONTINUOUS", "TIMER")
+DHT11_MIN_PERIOD_MS = 2000
+
+
+class ConfigValidationError(ValueError):
+    """The configuration does not match the schema.
+
+    Attributes:
+        errors: Every problem found, as "<file>: <path>: <message>".
+    """
+
+    def __init__(self, errors: list[str]):
+        self.errors = list(errors)
+        shown = "\n".join(f"  - {e}" for e in self.errors[:MAX_REPORTED_ERRORS])
+        more = len(self.errors) - MAX_REPORTED_ERRORS
+        if more > 0:
+            shown += f"\n  ... and {more} more"
+        super().__init__(f"Invalid configuration ({len(self.errors)} error(s)):\n{shown}")
+
+
+# --- Schema nodes ---
+# compile() returns check(value, path, errors) -> canonical value. Problems are
+# appended to `errors`; the returned value is then meaningless.
+
+_REQUIRED = object()
+_OMIT = object()        # Default of optional fields left out when missing
+
+
+def _p(path: str) -> str:
+    return path or "top level"
+
+
+def _kind(value) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+class _Str:
+    def __init__(self, choices=None, pattern: str | None = None, upper: bool = False,
+                 coerce: Callable | None = None):
+        self.choices = choices
+        self.pattern = pattern
+        self.upper = upper
+        self.coerce = coerce    # coerce(raw) -> str, for accepted non-canonical spellings
+
+    def compile(self):
+        choices = frozenset(self.choices) if self.choices else None
+        match = re.compile(self.pattern).fullmatch if self.pattern else None
+        upper, coerce = self.upper, self.coerce
+        listed = ", ".join(self.choices or ())
+
+        def check(value, path, errors):
+            if coerce is not None:
+                try:
+                    value = coerce(value)
+                except (TypeError, ValueError):
+                    pass
+            if not isinstance(value, str):
+                errors.append(f"{_p(path)}: expected a string, got {_kind(value)}")
+                return value
+            value = value.strip()
+            if upper:
+                value = value.upper()
+            if choices is not None and value not in choices:
+                errors.append(f"{_p(path)}: {value!r} is not one of {listed}")
+            elif match is not None and not match(value):
+                errors.append(f"{_p(path)}: {value!r} does not match {self.pattern}")
+            return value
+        return check
+
+
+class _Int:
+    def __init__(self, min: int | None = None, max: int | None = None):
+        self.min, self.max = min, max
+
+    def compile(self):
+        lo, hi = self.min, self.max
+
+        def check(value, path, errors):
+            if isinstance(value, str):
+                try:
+                    value = int(value.strip(), 0)   # "115200", "0x68"
+                except ValueError:
+                    errors.append(f"{_p(path)}: {value!r} is not an integer")
+                    return value
+            if isinstance(value, bool) or not isinstance(value, int):
+                errors.append(f"{_p(path)}: expected an integer, got {_kind(value)}")
+                return value
+            if (lo is not None and value < lo) or (hi is not None and value > hi):
+                errors.append(f"{_p(path)}: {value} is out of range [{lo}, {hi}]")
+            return value
+        return check
+
+
+class _Bool:
+    def compile(self):
+        def check(value, path, errors):
+            if not isinstance(value, bool):
+                errors.append(f"{_p(path)}: expected true/false, got {_kind(value)}")
+            return value
+        return check
+
+
+class _Dict:
+    """Any JSON object, kept as is (copied)."""
+
+    def compile(self):
+        def check(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append(f"{_p(path)}: expected an object, got {_kind(value)}")
+                return value
+            return dict(value)
+        return check
+
+
+class _List:
+    def __init__(self, item):
+        self.item = item
+
+    def compile(self):
+        item = self.item.compile()
+
+        def check(value, path, errors):
+            if not isinstance(value, list):
+                errors.append(f"{_p(path)}: expected a list, got {_kind(value)}")
+                return value
+            return [item(v, f"{path}[{i}]", errors) for i, v in enumerate(value)]
+        return check
+
+
+class _Record:
+    """An object with known fields: {name: (node, default)}.
+
+    A missing (or null) optional field gets its default (or stays out with
+    _OMIT); nested records are filled with their own defaults. Unknown fields
+    are kept as they are.
+    """
+
+    def __init__(self, fields: dict, check: Callable | None = None):
+        self.fields = fields
+        self.extra_check = check    # extra_check(record, path, errors), cross-field rules
+
+    def compile(self):
+        fields = []
+        for name, (node, default) in self.fields.items():
+            fields.append((name, node.compile(), default, isinstance(node, _Record)))
+        extra_check = self.extra_check
+
+        def check(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append(f"{_p(path)}: expected an object, got {_kind(value)}")
+                return value
+            out = dict(value)
+            prefix = f"{path}." if path else ""
+            for name, field_check, default, nested in fields:
+                raw = value.get(name)
+                if raw is None:
+                    if default is _REQUIRED:
+                        errors.append(f"{prefix}{name}: required field is missing")
+                        continue
+                    if default is _OMIT:
+                        out.pop(name, None)
+                        continue
+                    if not nested:
+                        out[name] = default.copy() if isinstance(default, (list, dict)) else default
+                        continue
+                    raw = {}
+                out[name] = field_check(raw, prefix + name, errors)
+            if extra_check is not None:
+                extra_check(out, path, errors)
+            return out
+        return check
+
+
+class _Map:
+    """An object whose keys match a pattern, all values of one node."""
+
+    def __init__(self, key_pattern: str, value):
+        self.key_pattern = key_pattern
+        self.value = value
+
+    def compile(self):
+        match = re.compile(self.key_pattern).fullmatch
+        value_check = self.value.compile()
+
+        def check(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append(f"{_p(path)}: expected an object, got {_kind(value)}")
+                return value
+            prefix = f"{path}." if path else ""
+            out = {}
+            for key, v in value.items():
+                if not match(key):
+                    errors.append(f"{prefix}{key}: unexpected key (expected {self.key_pattern})")
+                    continue
+                out[key] = value_check(v, prefix + key, errors)
+            return out
+        return check
+
+
+# --- Field coercions ---
+
+def _port_to_hal(port):
+    """'PA'/'A'/'gpioa' -> 'GPIOA'."""
+    s = port.strip().upper()
+    if s.startswith("GPIO"):
+        return s
+    return "GPIO" + (s[1:] if s.startswith("P") and len(s) == 2 else s)
+
+
+def _af_const(af):
+    """4 / "4" -> "GPIO_AF4", 0 -> "" (no alternate function)."""
+    if isinstance(af, int) and not isinstance(af, bool):
+        return f"GPIO_AF{af}" if af > 0 else ""
+    if isinstance(af, str) and af.strip().isdigit():
+        return _af_const(int(af))
+    return af
+
+
+def _uart_type(ptype):
+    return "UART" if isinstance(ptype, str) and ptype.strip().upper() == "USART" else ptype
+
+
+def _to_str(value):
+    return str(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+
+def _other_peripherals(peripherals: dict, path: str, errors: list):
+    # Types without a schema here (TIM, SPI, ...) must still be {instance: {...}}
+    for ptype, instances in peripherals.items():
+        if ptype in ("I2C", "UART", "ADC"):
+            continue
+        if not isinstance(instances, dict) or not all(isinstance(v, dict) for v in instances.values()):
+            errors.append(f"{ptype}: expected an object of instance settings, got {_kind(instances)}")
+
+
+def _uart_tx_buffer(uart: dict, path: str, errors: list):
+    size = uart.get("txBufferSize")
+    if isinstance(size, int) and size & (size - 1):
+        errors.append(f"{path}.txBufferSize: {size} is not a power of two")
+
+
+def _adc_settings(adc: dict, path: str, errors: list):
+    ratio, shift = adc.get("oversamplingRatio"), adc.get("oversamplingShift")
+    if not isinstance(ratio, int):
+        return
+    if ratio & (ratio - 1):
+        errors.append(f"{path}.oversamplingRatio: {ratio} is not a power of two")
+    elif isinstance(shift, int) and ratio >> shift > 16:
+        errors.append(f"{path}.oversamplingShift: {ratio}x oversampling needs a shift of at least "
+                      f"{ratio.bit_length() - 5} to fit the 16-bit data register")
+    if adc.get("dma") and adc.get("conversionMode") == "SINGLE":
+        errors.append(f"{path}.dma: needs conversionMode CONTINUOUS or TIMER")
+
+
+def _case_period(case: dict, path: str, errors: list):
+    period = case.get("sample_period_ms")
+    if (isinstance(period, int) and 1 <= period < DHT11_MIN_PERIOD_MS
+            and "dht11" in str(case.get("input_key", "")).lower()):
+        prefix = f"{path}." if path else ""
+        errors.append(f"{prefix}sample_period_ms: the DHT11 needs at least "
+                      f"{DHT11_MIN_PERIOD_MS} ms between reads, got {period}")
+
+
+def _unique_pins(pinout: dict, path: str, errors: list):
+    seen = {}
+    for i, pin in enumerate(pinout.get("gpio") or []):
+        if isinstance(pin, dict):
+            key = (pin.get("port"), pin.get("pin"))
+            if key in seen:
+                errors.append(f"gpio[{i}]: {key[0]} pin {key[1]} is already used by gpio[{seen[key]}]")
+            seen.setdefault(key, i)
+
+
+# --- Schema ---
+
+_GPIO_PIN = _Record({
+    "name":         (_Str(pattern=r"[A-Za-z_]\w*|"), ""),
+    "port":         (_Str(pattern=r"GPIO[A-K]", coerce=_port_to_hal), _REQUIRED),
+    "pin":          (_Int(0, 15), _REQUIRED),
+    "mode":         (_Str(GPIO_MODES, upper=True), "INPUT"),
+    "pull":         (_Str(GPIO_PULLS, upper=True), "NOPULL"),
+    "speed":        (_Str(GPIO_SPEEDS, upper=True), "LOW"),
+    "alternate_fn": (_Str(pattern=r"(GPIO_AF\d+\w*)?", coerce=_af_const), ""),
+})
+
+_PINOUT = _Record({
+    "schema_version":  (_Int(SCHEMA_VERSION, SCHEMA_VERSION), SCHEMA_VERSION),
+    "project_name":    (_Str(), "MyProject"),
+    "microcontroller": (_Str(), ""),
+    "gpio":            (_List(_GPIO_PIN), []),
+}, check=_unique_pins)
+
+_I2C_DEVICE = _Record({
+    "name":    (_Str(pattern=r"[A-Za-z_]\w*"), _REQUIRED),
+    "address": (_Int(0, 0x7F), _REQUIRED),
+})
+
+_I2C_INSTANCE = _Record({
+    "clockSpeed":     (_Int(1_000, 1_000_000), 100_000),
+    "addressingMode": (_Str(("I2C_ADDRESSINGMODE_7BIT", "I2C_ADDRESSINGMODE_10BIT")), "I2C_ADDRESSINGMODE_7BIT"),
+    "transferMode":   (_Str(TRANSFER_MODES, upper=True), "POLLING"),
+    "devices":        (_List(_I2C_DEVICE), []),
+})
+
+_UART_INSTANCE = _Record({
+    "baudRate":     (_Int(1, 20_000_000), 115_200),
+    "wordLength":   (_Str(pattern=r"UART_WORDLENGTH_\w+"), "UART_WORDLENGTH_8B"),
+    "stopBits":     (_Str(pattern=r"UART_STOPBITS_\w+"), "UART_STOPBITS_1"),
+    "parity":       (_Str(pattern=r"UART_PARITY_\w+"), "UART_PARITY_NONE"),
+    "flowControl":  (_Str(pattern=r"UART_HWCONTROL_\w+"), "UART_HWCONTROL_NONE"),
+    "transferMode": (_Str(TRANSFER_MODES, upper=True), "POLLING"),
+    "txBufferSize": (_Int(16, 4096), 512),      # TX ring buffer of the DMA mode
+}, check=_uart_tx_buffer)
+
+_ADC_INSTANCE = _Record({
+    "channel":           (_Str(pattern=r"ADC_CHANNEL_\w+"), _OMIT),  # Default: the ANALOG pin of the pinout
+    "sampleTime":        (_Str(pattern=r"ADC_SAMPLETIME_\w+"), "ADC_SAMPLETIME_47CYCLES_5"),
+    "conversionMode":    (_Str(ADC_CONVERSION_MODES, upper=True), "SINGLE"),
+    "sampleRateHz":      (_Int(1, 1_000_000), 1_000),    # TIMER mode
+    "oversamplingRatio": (_Int(1, 256), 1),              # 1: off
+    "oversamplingShift": (_Int(0, 8), _OMIT),            # Default: log2(ratio), keeps 12-bit results
+    "dma":               (_Bool(), False),               # Circular DMA into a sample buffer
+    "dmaBufferLength":   (_Int(1, 1024), 16),
+}, check=_adc_settings)
+
+_PERIPHERALS = _Record({
+    "I2C":  (_Map(r"I2C\d+", _I2C_INSTANCE), _OMIT),
+    "UART": (_Map(r"(US|U|LPU)ART\d+", _UART_INSTANCE), _OMIT),
+    "ADC":  (_Map(r"ADC1", _ADC_INSTANCE), _OMIT),   # Only ADC1 is generated
+}, check=_other_peripherals)
+
+_CASE_PERIPHERAL = _Record({
+    "type":     (_Str(upper=True, coerce=_uart_type), ""),
+    "instance": (_Str(), ""),
+    "settings": (_Dict(), {}),
+})
+
+_CASE = _Record({
+    "input_key":  (_Str(), _REQUIRED),
+    "output_key": (_Str(), _REQUIRED),
+    "processing": (_Record({"enabled": (_Bool(), False), "formula": (_Str(), "")}), None),
+    "threshold":  (_Record({"enabled": (_Bool(), False), "value": (_Str(coerce=_to_str), "")}), None),
+    "peripheral_settings": (_Record({
+        "input_peripheral":  (_CASE_PERIPHERAL, None),
+        "output_peripheral": (_CASE_PERIPHERAL, None),
+    }), None),
+    "sample_period_ms": (_Int(1, 3_600_000), _OMIT),    # Task period; default from the case type
+}, check=_case_period)
+
+_PRESETS = _Record({"cases": (_List(_CASE), [])})
+
+_check_pinout = _PINOUT.compile()
+_check_peripherals = _PERIPHERALS.compile()
+_check_presets = _PRESETS.compile()
+_check_case = _CASE.compile()
+
+
+# --- Migrations ---
+# _MIGRATIONS[v] turns version v configs into version v + 1 (raw JSON in and out).
+
+def _migrate_1(pinout, peripherals, presets, errors: list):
+    # pinout: a bare list of blocks, or {"peripherals": [{"type", "pins": [...]}]}
+    if isinstance(pinout, list):
+        pinout = {"peripherals": pinout}
+    if isinstance(pinout, dict) and "peripherals" in pinout:
+        pinout = dict(pinout)
+        blocks = pinout.pop("peripherals")
+        if "gpio" not in pinout:
+            gpio = []
+            if not isinstance(blocks, list):
+                errors.append(f"{PINOUT_FILE}: peripherals: expected a list of pin blocks, got {_kind(blocks)}")
+            else:
+                for i, blk in enumerate(blocks):
+                    pins = blk.get("pins", []) if isinstance(blk, dict) else None
+                    if not isinstance(pins, list):
+                        errors.append(f"{PINOUT_FILE}: peripherals[{i}].pins: expected a list")
+                        continue
+                    gpio.extend(pins)
+            pinout["gpio"] = gpio
+
+    # peripheral settings: "USART" instances next to (or instead of) "UART"
+    if isinstance(peripherals, dict) and "USART" in peripherals:
+        peripherals = dict(peripherals)
+        usart = peripherals.pop("USART")
+        uart = peripherals.get("UART")
+        if isinstance(usart, dict) and isinstance(uart or {}, dict):
+            peripherals["UART"] = {**usart, **(uart or {})}
+        else:
+            errors.append(f"{PERIPHERAL_FILE}: USART: expected an object, got {_kind(usart)}")
+
+    # presets: a bare list of cases, or one case without the "cases" wrapper
+    if isinstance(presets, list):
+        presets = {"cases": presets}
+    elif isinstance(presets, dict) and "cases" not in presets:
+        presets = {"cases": [presets]} if any(presets.values()) else {}
+
+    if isinstance(pinout, dict):
+        pinout = dict(pinout, schema_version=2)
+    return pinout, peripherals, presets
+
+
+_MIGRATIONS = {1: _migrate_1}
+
+
+def config_version(pinout) -> int:
+    """Returns the schema version of a config set (1 when not recorded)."""
+    version = pinout.get("schema_version", 1) if isinstance(pinout, dict) else 1
+    return version if isinstance(version, int) and not isinstance(version, bool) else 1
+
+
+def validate_configs(pinout_config, peripheral_settings, preset_settings) -> tuple[dict, dict, dict]:
+    """Migrates and validates the three configs.
+
+    Args:
+        pinout_config: Raw pinout_config.json data.
+        peripheral_settings: Raw peripheral_settings.json data (None/{} if absent).
+        preset_settings: Raw preset_settings.json data (None/{} if absent).
+
+    Returns:
+        Canonical (pinout_config, peripheral_settings, preset_settings) copies;
+        preset_settings is {} when there are no cases. The inputs are not modified.
+
+    Raises:
+        ConfigValidationError: With every problem found, each with its file and path.
+    """
+    errors: list[str] = []
+    pinout, peripherals, presets = pinout_config, peripheral_settings or {}, preset_settings or {}
+
+    version = config_version(pinout)
+    if version > SCHEMA_VERSION:
+        raise ConfigValidationError([f"{PINOUT_FILE}: schema_version: version {version} is newer "
+                                     f"than this generator supports ({SCHEMA_VERSION})"])
+    while version < SCHEMA_VERSION:
+        pinout, peripherals, presets = _MIGRATIONS[version](pinout, peripherals, presets, errors)
+        version += 1
+
+    for file_name, check, value in ((PINOUT_FILE, _check_pinout, pinout),
+                                    (PERIPHERAL_FILE, _check_peripherals, peripherals),
+                                    (PRESET_FILE, _check_presets, presets)):
+        file_errors: list[str] = []
+        checked = check(value, "", file_errors)
+        errors.extend(f"{file_name}: {e}" for e in file_errors)
+        if file_name == PINOUT_FILE:
+            pinout = checked
+        elif file_name == PERIPHERAL_FILE:
+            peripherals = checked
+        else:
+            presets = checked
+    if errors:
+        raise ConfigValidationError(errors)
+    return pinout, peripherals, presets if presets["cases"] else {}
+
+
+def check_case(case: dict) -> tuple[dict, list[str]]:
+    """Validates one preset case, e.g. before the UI adds it.
+
+    Returns:
+        (canonical copy of the case, every problem found); the same rules as
+        the cases of preset_settings.json, with paths relative to the case.
+    """
+    errors: list[str] = []
+    return _check_case(case, "", errors), errors
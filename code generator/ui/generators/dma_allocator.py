@@ -0,0 +1,80 @@
+# generators/dma_allocator.py
+"""DMA channel allocation for the generated peripherals (STM32G4, DMAMUX).
+
+On the G4 every DMA channel can serve any request through DMAMUX1, so a
+channel is just the next free one. The allocation is computed from the whole
+peripheral_settings, in a fixed order, so every stage that needs a channel
+(uart.c, i2c.c, adc.c) gets the same answer without talking to the others, and the
+channels only move when the set of DMA users changes.
+"""
+from __future__ import annotations
+from typing import NamedTuple
+
+# (controller, channels) of the STM32G474: DMA1 and DMA2, 8 channels each.
+DMA_CONTROLLERS = (("DMA1", 8), ("DMA2", 8))
+
+
+class DmaChannel(NamedTuple):
+    request: str        # DMAMUX request suffix, e.g. "USART2_TX" (-> DMA_REQUEST_USART2_TX)
+    controller: str     # "DMA1"
+    channel: int        # 1..8
+
+    @property
+    def instance(self) -> str:
+        return f"{self.controller}_Channel{self.channel}"
+
+    @property
+    def irqn(self) -> str:
+        return f"{self.instance}_IRQn"
+
+    @property
+    def irq_handler(self) -> str:
+        return f"{self.instance}_IRQHandler"
+
+
+def uart_interface(instance: str) -> str:
+    """Maps a UART settings key to its G4 peripheral: UART1..3 -> USART1..3, UART4/5 stay."""
+    s = (instance or "").upper()
+    if s in ("UART1", "UART2", "UART3"):
+        return "US" + s[1:]
+    return s
+
+
+def _in_dma_mode(peripheral_settings: dict, ptype: str) -> list[str]:
+    return [instance for instance, settings in sorted((peripheral_settings or {}).get(ptype, {}).items())
+            if (settings.get("transferMode") or "").upper() == "DMA"]
+
+
+def dma_requests(peripheral_settings: dict) -> list[str]:
+    """Returns the DMAMUX requests of every peripheral in DMA mode, in allocation order.
+
+    UART requests come first, then I2C, then ADC, so adding users of a later
+    type does not move the channels of an earlier one.
+    """
+    requests = []
+    for instance in _in_dma_mode(peripheral_settings, "UART"):
+        iface = uart_interface(instance)
+        requests += [f"{iface}_TX", f"{iface}_RX"]
+    for instance in _in_dma_mode(peripheral_settings, "I2C"):
+        requests += [f"{instance}_TX", f"{instance}_RX"]
+    for instance, settings in sorted((peripheral_settings or {}).get("ADC", {}).items()):
+        if settings.get("dma"):
+            requests.append(instance)
+    return requests
+
+
+def allocate(peripheral_settings: dict) -> dict[str, DmaChannel]:
+    """Gives every DMA request of the config its own channel.
+
+    Returns:
+        {request: DmaChannel}
+
+    Raises:
+        ValueError: If there are more requests than DMA channels.
+    """
+    channels = [(ctrl, ch) for ctrl, n in DMA_CONTROLLERS for ch in range(1, n + 1)]
+    requests = dma_requests(peripheral_settings)
+    if len(requests) > len(channels):
+        raise ValueError(f"{len(requests)} DMA requests ({', '.join(requests)}) "
+                         f"but only {len(channels)} DMA channels")
+    return {req: DmaChannel(req, ctrl, ch) for req, (ctrl, ch) in zip(requests, channels)}
@@ -1,206 +1,552 @@
 # generate_all.py
 
 from collections import defaultdict
+import io
+import json
 import re
+import time
 from pathlib import Path
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 import os
 
+import output_routing
+
 # Import the modular generator scripts from the same package.
 from . import gpio_generator
 from . import i2c_generator
 from . import uart_generator
+from . import dma_allocator
 from . import adc_generator
 from . import main_generator
 from . import presets_generator
-
-def _gpio_list_from_pinout(pinout_config: dict) -> list[dict]:
-    """
-    Backward compatibility: if 'gpio' doesn't exist, tries to build the list from
-    pinout_config['peripherals'] (when it still came grouped by type).
-    Always returns a list of pins (dicts with port/pin/mode/pull/speed/...).
-    """
-    if not pinout_config:
-        return []
-    if "gpio" in pinout_config:
-        return pinout_config.get("gpio", [])
-
-    # Legacy mode: search within peripherals -> type == "GPIO"
-    all_gpio = []
-    for blk in pinout_config.get("peripherals", []):
-        if blk.get("type") == "GPIO":
-            all_gpio.extend(blk.get("pins", []))
-    return all_gpio
-
-
-def _cleanup_old_generated_files():
-    """Delete old generated files before creating new ones.
-    
-    Keeps only core STM32CubeMX files:
-    - stm32g4xx_hal_msp.c
-    - stm32g4xx_it.c
-    - syscalls.c
-    - sysmem.c
-    - system_stm32g4xx.c
+from . import template_engine
+from . import metrics
+from . import config_schema
+from .output_writer import write_if_changed, track_outputs, content_hash
+from .manifest import GenerationManifest, hash_json
+
+class GenerationCancelled(Exception):
+    """Raised when generation is cancelled before every stage ran."""
+
+
+# Project root (folder containing Core/, cmake/ and the code generator).
+PROJ_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+
+def _root(output_root) -> Path:
+    """Returns the folder generated files go to (the project root by default)."""
+    return Path(output_root).resolve() if output_root else PROJ_ROOT
+
+# Files each stage can generate, relative to the project root. Core STM32CubeMX
+# files (stm32g4xx_hal_msp.c, stm32g4xx_it.c, syscalls.c, sysmem.c,
+# system_stm32g4xx.c) are never listed here, so they are never removed.
+GENERATED_OUTPUTS = {
+    "gpio":    ["Core/Src/gpio.c", "Core/Inc/gpio.h"],
+    "i2c":     ["Core/Src/i2c.c", "Core/Inc/i2c.h"],
+    "uart":    ["Core/Src/uart.c", "Core/Inc/uart.h"],
+    "adc":     ["Core/Src/adc.c", "Core/Inc/adc.h"],
+    "presets": ["Core/Src/presets_in.c", "Core/Inc/presets_in.h",
+                "Core/Src/presets_out.c", "Core/Inc/presets_out.h"],
+    "main":    ["Core/Src/main.c", "Core/Inc/main.h"],
+}
+
+# Project files stages edit in place instead of generating. Their current
+# content is part of the stage's fingerprint, so a reverted or hand-edited
+# file makes the stage run again.
+EDITED_IN_PLACE = {
+    "hal_config": "Core/Inc/stm32g4xx_hal_conf.h",
+    "cmake":      "cmake/stm32cubemx/CMakeLists.txt",
+}
+
+
+def _remove_stale_generated_files(produced_files: list[str], completed_stages: set[str], output_root=None):
+    """Delete generated files that the current configuration no longer produces.
+
+    Only outputs of stages that completed without errors are considered, so a
+    failing stage never loses its previous files. Files that are still produced
+    are left alone (they were only rewritten if their content changed).
     """
-    project_root = Path(__file__).parent.parent.parent
-    
-    # Files to delete (generated by our templates)
-    files_to_delete = [
-        # Source files
-        project_root / "Core" / "Src" / "main.c",
-        project_root / "Core" / "Src" / "gpio.c",
-        project_root / "Core" / "Src" / "i2c.c",
-        project_root / "Core" / "Src" / "uart.c",
-        project_root / "Core" / "Src" / "presets_in.c",
-        project_root / "Core" / "Src" / "presets_out.c",
-        # Header files
-        project_root / "Core" / "Inc" / "main.h",
-        project_root / "Core" / "Inc" / "gpio.h",
-        project_root / "Core" / "Inc" / "i2c.h",
-        project_root / "Core" / "Inc" / "uart.h",
-        project_root / "Core" / "Inc" / "presets_in.h",
-        project_root / "Core" / "Inc" / "presets_out.h",
-    ]
-    
+    produced = {os.path.normcase(os.path.abspath(f)) for f in produced_files}
+
     deleted_count = 0
-    for file_path in files_to_delete:
-        if file_path.exists():
+    for stage in completed_stages:
+        for rel_path in GENERATED_OUTPUTS.get(stage, []):
+            file_path = _root(output_root) / rel_path
+            if os.path.normcase(str(file_path)) in produced or not file_path.exists():
+                continue
             try:
                 os.remove(file_path)
                 deleted_count += 1
-                print(f"[CLEANUP] Deleted: {file_path.name}")
+                print(f"[CLEANUP] Deleted stale file: {file_path.name}")
             except Exception as e:
                 print(f"[CLEANUP] Warning: Could not delete {file_path.name}: {e}")
-    
+
     if deleted_count > 0:
-        print(f"[CLEANUP] ✅ Cleaned up {deleted_count} old generated file(s)")
+        print(f"[CLEANUP] ✅ Removed {deleted_count} stale generated file(s)")
     else:
-        print("[CLEANUP] No old files to clean up")
+        print("[CLEANUP] No stale files to remove")
 
 
-def generate_project_files(pinout_config: dict, peripheral_settings: dict, preset_settings: dict | None = None) -> list[str]:
-    """Generate STM32 project files.
-    
-    Workflow:
-      0) Clean up old generated files
-      1) GPIO (with pinout_config['gpio'])
-      2) I2C/UART (with peripheral_settings)
-      3) PRESETS (if preset_settings["cases"] exists)
-      4) main.c/h
-    """
-    # 0) Clean up old generated files first
-    print("--- Cleanup: Removing old generated files ---")
-    _cleanup_old_generated_files()
-    print()
-    
-    all_generated_files = []
+# --- Generation stages ---
+# Each stage takes (output_root, pinout_config, peripheral_settings, preset_settings)
+# and returns the list of files it generated. Stages with dependencies also receive
+# the files produced by those dependencies as a fifth argument.
 
-    # 1) GPIO
-    try:
-        print("--- Processing: GPIO (MX_GPIO_Init) ---")
-        files_gpio = gpio_generator.generate_gpio_config(pinout_config)
-        if files_gpio: all_generated_files.extend(files_gpio)
-    except Exception as e:
-        print(f"[GPIO] generation error: {e}")
+def _stage_gpio(output_root, pinout_config, peripheral_settings, preset_settings):
+    print("--- Processing: GPIO (MX_GPIO_Init) ---")
+    return gpio_generator.generate_gpio_config(pinout_config, output_root=output_root)
 
-    # 2) I2C
-    try:
-        i2c_settings = (peripheral_settings or {}).get("I2C", {})
-        if i2c_settings:
-            print(f"--- Processing: I2C ({len(i2c_settings)} instance(s)) ---")
-            files_i2c = i2c_generator.generate_i2c_config(i2c_settings, pinout_config.get("gpio", []))
-            if files_i2c: all_generated_files.extend(files_i2c)
-    except Exception as e:
-        print(f"[I2C] generation error: {e}")
 
-    # 3) UART/USART
-    try:
-        uart_settings = (peripheral_settings or {}).get("UART", {})
-        if uart_settings:
-            print(f"--- Processing: UART ({len(uart_settings)} instance(s)) ---")
-            files_uart = uart_generator.generate_uart_config(uart_settings, pinout_config.get("gpio", []))
-            if files_uart: all_generated_files.extend(files_uart)
-    except Exception as e:
-        print(f"[UART] generation error: {e}")
+def _stage_i2c(output_root, pinout_config, peripheral_settings, preset_settings):
+    i2c_settings = (peripheral_settings or {}).get("I2C", {})
+    if not i2c_settings:
+        return []
+    print(f"--- Processing: I2C ({len(i2c_settings)} instance(s)) ---")
+    return i2c_generator.generate_i2c_config(i2c_settings, pinout_config.get("gpio", []), output_root=output_root,
+                                             dma=dma_allocator.allocate(peripheral_settings))
+
+
+def _stage_uart(output_root, pinout_config, peripheral_settings, preset_settings):
+    uart_settings = (peripheral_settings or {}).get("UART", {})
+    if not uart_settings:
+        return []
+    print(f"--- Processing: UART ({len(uart_settings)} instance(s)) ---")
+    return uart_generator.generate_uart_config(uart_settings, pinout_config.get("gpio", []), output_root=output_root,
+                                               dma=dma_allocator.allocate(peripheral_settings))
+
+
+def _stage_adc(output_root, pinout_config, peripheral_settings, preset_settings):
+    # ADC is only generated if a potentiometer is used in presets
+    cases = (preset_settings or {}).get("cases", [])
+    has_potentiometer = any("potentiometer" in case.get("input_key", "").lower() for case in cases)
+    if not has_potentiometer:
+        return []
+
+    print("--- Processing: ADC (for Potentiometer) ---")
+    # Get paths
+    template_dir = template_engine.TPL_ROOT
+    output_dir_inc = _root(output_root) / "Core" / "Inc"
+    output_dir_src = _root(output_root) / "Core" / "Src"
+    adc_settings = (peripheral_settings or {}).get("ADC", {}).get("ADC1")
+    return adc_generator.generate_adc_files(str(output_dir_inc), str(output_dir_src), str(template_dir),
+                                            adc_settings, dma=dma_allocator.allocate(peripheral_settings),
+                                            pinout_config=pinout_config)
+
+
+def _stage_presets(output_root, pinout_config, peripheral_settings, preset_settings):
+    # PRESETS (only if "cases" exist)
+    ps = preset_settings or {}
+    cases = ps.get("cases", [])
+    if not cases:
+        print("[SKIP] PRESETS: preset_settings missing or no 'cases'.")
+        return []
+    print(f"--- Processing: PRESETS ({len(cases)} case(s)) ---")
+    return presets_generator.generate_presets_files(ps, peripheral_settings, pinout_config, output_root=output_root)
+
+
+def _stage_main(output_root, pinout_config, peripheral_settings, preset_settings):
+    print("--- Processing: main.c and main.h ---")
+    return main_generator.generate_main_files(pinout_config, peripheral_settings, preset_settings, output_root=output_root)
+
+
+def _stage_hal_config(output_root, pinout_config, peripheral_settings, preset_settings):
+    print("--- Processing: HAL Configuration ---")
+    _update_hal_config(peripheral_settings, preset_settings, output_root)
+    return []
+
+
+def _stage_cmake(output_root, pinout_config, peripheral_settings, preset_settings, generated_files):
+    print("--- Processing: CMakeLists.txt Update ---")
+    _update_cmake_lists(generated_files, output_root)
+    return []
+
+
+def _stage_readme(output_root, pinout_config, peripheral_settings, preset_settings):
+    print("--- Processing: README Generation ---")
+    _generate_readme(pinout_config, peripheral_settings, preset_settings, output_root)
+    return []
+
+
+# Source-file stages, in the order their files are reported.
+_SOURCE_STAGES = ("gpio", "i2c", "uart", "adc", "presets", "main")
 
-    # 4) ADC (if potentiometer is used in presets)
+# (name, tag used in error messages, function, dependencies)
+# _update_hal_config only reads the settings, so it runs alongside the renderers;
+# _update_cmake_lists needs the complete list of generated sources.
+STAGES = [
+    ("gpio",       "GPIO",         _stage_gpio,       ()),
+    ("i2c",        "I2C",          _stage_i2c,        ()),
+    ("uart",       "UART",         _stage_uart,       ()),
+    ("adc",        "ADC",          _stage_adc,        ()),
+    ("presets",    "PRESETS",      _stage_presets,    ()),
+    ("main",       "MAIN",         _stage_main,       ()),
+    ("hal_config", "HAL CONFIG",   _stage_hal_config, ()),
+    ("cmake",      "CMAKE UPDATE", _stage_cmake,      _SOURCE_STAGES),
+    ("readme",     "README",       _stage_readme,     ()),
+]
+
+# Templates rendered by each stage (looked up in TEMPLATES/src and TEMPLATES/inc).
+STAGE_TEMPLATES = {
+    "gpio":    ("gpio_template.c", "gpio_template.h"),
+    "i2c":     ("i2c_template.c", "i2c_template.h"),
+    "uart":    ("uart_template.c", "uart_template.h"),
+    "adc":     ("adc_template.c", "adc_template.h"),
+    "presets": ("presets_in_template.c", "presets_in_template.h",
+                "presets_out_template.c", "presets_out_template.h"),
+    "main":    ("main_template.c", "main_template.h"),
+}
+
+
+# --- Incremental generation ---
+
+def _dma_channels(ps: dict, ptype: str) -> dict:
+    """Returns the DMA channels allocated to one peripheral type's requests.
+
+    Channels are allocated over every peripheral (dma_allocator), but a stage
+    only depends on the ones its own requests got, so e.g. turning on ADC DMA
+    does not re-render uart.c.
+    """
+    own = dma_allocator.dma_requests({ptype: ps.get(ptype) or {}})
     try:
-        ps = preset_settings or {}
-        cases = ps.get("cases", []) if isinstance(ps, dict) else []
-        has_potentiometer = False
-        for case in cases:
-            input_key = case.get("input_key", "").lower()
-            if "potentiometer" in input_key:
-                has_potentiometer = True
-                break
-        
-        if has_potentiometer:
-            print("--- Processing: ADC (for Potentiometer) ---")
-            # Get paths
-            script_dir = Path(__file__).parent.parent.parent  # Navigate to code generator root
-            template_dir = script_dir / "TEMPLATES"
-            project_root = script_dir.parent  # Navigate to TCCv02
-            output_dir_inc = project_root / "Core" / "Inc"
-            output_dir_src = project_root / "Core" / "Src"
-            
-            files_adc = adc_generator.generate_adc_files(str(output_dir_inc), str(output_dir_src), str(template_dir))
-            if files_adc: all_generated_files.extend(files_adc)
-    except Exception as e:
-        print(f"[ADC] generation error: {e}")
+        channels = dma_allocator.allocate(ps)
+    except ValueError as e:
+        return {"error": str(e)}  # Reported by the stage itself
+    return {req: channels[req].instance for req in own}
 
-    # 5) PRESETS (only if "cases" exist)
+
+def _file_hash(path: Path) -> str | None:
+    """Returns the content hash of a file, None if it does not exist."""
     try:
-        ps = preset_settings or {}
-        cases = ps.get("cases", []) if isinstance(ps, dict) else []
-        if cases:
-            print(f"--- Processing: PRESETS ({len(cases)} case(s)) ---")
-            files_p = presets_generator.generate_presets_files(ps, peripheral_settings, pinout_config)
-            if files_p: all_generated_files.extend(files_p)
+        return content_hash(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def _stage_sections(name: str, output_root, pinout_config: dict, peripheral_settings: dict,
+                    preset_settings: dict | None, upstream: list[str] | None = None) -> dict:
+    """Returns the config sections a stage reads, keyed by their path in the config files.
+
+    Only these sections are fingerprinted for the stage, so e.g. a UART baud rate
+    change re-renders uart.c/h (and main.c/h, which lists the UART instances) but
+    not gpio.c/h.
+    """
+    root = _root(output_root)
+    pc = pinout_config or {}
+    ps = peripheral_settings or {}
+    pr = preset_settings or {}
+    cases = pr.get("cases", [])
+
+    if name == "gpio":
+        return {"pinout_config.gpio": pc.get("gpio")}
+    if name == "i2c":
+        return {"peripheral_settings.I2C": ps.get("I2C"), "dma_channels": _dma_channels(ps, "I2C")}
+    if name == "uart":
+        return {"peripheral_settings.UART": ps.get("UART"), "dma_channels": _dma_channels(ps, "UART")}
+    if name == "adc":
+        return {"preset_settings.cases[].input_key": [c.get("input_key", "") for c in cases],
+                "peripheral_settings.ADC": ps.get("ADC"), "dma_channels": _dma_channels(ps, "ADC"),
+                "pinout_config.microcontroller": pc.get("microcontroller"),
+                "pinout_config.gpio[ANALOG]": [g for g in pc.get("gpio") or [] if g.get("mode") == "ANALOG"]}
+    if name == "presets":
+        # presets_generator only picks the first instance name of each peripheral type
+        instances = {t: list(v) for t, v in ps.items() if isinstance(v, dict)}
+        modes = {t: {i: s.get("transferMode") for i, s in (ps.get(t) or {}).items()} for t in ("I2C", "UART")}
+        return {"preset_settings": pr, "pinout_config.gpio": pc.get("gpio"),
+                "peripheral_settings.<instances>": instances, "peripheral_settings.<transferModes>": modes,
+                "peripheral_settings.ADC": ps.get("ADC")}
+    if name == "main":
+        return {"pinout_config": pc, "peripheral_settings.I2C": ps.get("I2C"),
+                "peripheral_settings.UART": ps.get("UART"), "preset_settings": pr}
+    if name == "hal_config":
+        return {"peripheral_settings.<types>": {t: bool(v) for t, v in ps.items()},
+                "uses_dma": bool(dma_allocator.dma_requests(ps)),
+                "preset_settings.cases[].keys": [[c.get("input_key", ""), c.get("output_key", "")] for c in cases],
+                "stm32g4xx_hal_conf.h": _file_hash(root / EDITED_IN_PLACE[name])}
+    if name == "cmake":
+        return {"generated_files": [os.path.relpath(f, root) for f in upstream or []],
+                "CMakeLists.txt": _file_hash(root / EDITED_IN_PLACE[name])}
+    if name == "readme":
+        return {"pinout_config": pc, "peripheral_settings": ps, "preset_settings": pr}
+    return {"pinout_config": pc, "peripheral_settings": ps, "preset_settings": pr}
+
+
+def _template_hashes(names) -> dict[str, str]:
+    """Returns the content hash of each template used by a stage."""
+    hashes = {}
+    for name in names:
+        for folder in ("src", "inc"):
+            path = template_engine.TPL_ROOT / folder / name
+            if path.exists():
+                hashes[name] = content_hash(path.read_bytes())
+                break
         else:
-            print("[SKIP] PRESETS: preset_settings missing or no 'cases'.")
-    except Exception as e:
-        print(f"[PRESETS] generation error: {e}")
+            hashes[name] = None
+    return hashes
 
-    # 5) main.c/h
-    try:
-        print("--- Processing: main.c and main.h ---")
-        main_files = main_generator.generate_main_files(pinout_config, peripheral_settings, preset_settings)
-        if main_files: all_generated_files.extend(main_files)
-    except Exception as e:
-        print(f"[MAIN] generation error: {e}")
 
-    # 6) Update HAL configuration
-    try:
-        print("--- Processing: HAL Configuration ---")
-        _update_hal_config(peripheral_settings, preset_settings)
-    except Exception as e:
-        print(f"[HAL CONFIG] generation error: {e}")
+def _generator_code_hash() -> str:
+    """Hash of the generator package sources, so code changes invalidate the manifest."""
+    sources = sorted(Path(__file__).parent.glob("*.py"))
+    return hash_json({p.name: content_hash(p.read_bytes()) for p in sources})
 
-    # 7) Update CMakeLists.txt with generated files
-    try:
-        print("--- Processing: CMakeLists.txt Update ---")
-        _update_cmake_lists(all_generated_files)
-    except Exception as e:
-        print(f"[CMAKE UPDATE] generation error: {e}")
 
-    # 8) Generate README with pin configuration
-    try:
-        print("--- Processing: README Generation ---")
-        _generate_readme(pinout_config, peripheral_settings, preset_settings)
-    except Exception as e:
-        import traceback
-        print(f"[README] generation error: {e}")
-        traceback.print_exc()
+def _stage_fingerprint(name: str, args: tuple, upstream: list[str] | None,
+                       code_hash: str, deterministic: bool) -> tuple[dict, dict, str]:
+    """Returns (section hashes, template hashes, combined fingerprint) for a stage."""
+    sections = {key: hash_json(value) for key, value in _stage_sections(name, *args, upstream).items()}
+    templates = _template_hashes(STAGE_TEMPLATES.get(name, ()))
+    fingerprint = hash_json({
+        "sections": sections,
+        "templates": templates,
+        "code": code_hash,
+        # Date-stamped output has to be re-rendered when the date changes.
+        "stamp": None if deterministic else template_engine.generation_stamp(),
+    })
+    return sections, templates, fingerprint
+
+
+def _run_stage(tag: str, func, args: tuple, stamp: str | None = None) -> tuple[list[str], bool, dict[str, str], dict, str]:
+    """Runs one stage, reporting errors the same way for every stage.
 
+    The stage's print() output is captured (only this thread's), so stages
+    running at the same time do not interleave their lines.
+
+    Returns:
+        (generated files, True if the stage completed without errors,
+         every file the stage wrote or confirmed unchanged -> content hash,
+         the stage's metrics counters, the stage's output)
+    """
+    # Set here so the stamp also reaches stages running in a process pool.
+    template_engine.set_generation_stamp(stamp)
+    ok = True
+    output = io.StringIO()
+    with output_routing.route(output), metrics.collect() as counters, track_outputs() as outputs:
+        try:
+            files = list(func(*args) or [])
+        except Exception as e:
+            print(f"[{tag}] generation error: {e}")
+            if tag == "README":
+                import traceback
+                traceback.print_exc()
+            files, ok = [], False
+    return files, ok, outputs, counters, output.getvalue()
+
+
+def _run_stages(
+    stages,
+    args: tuple,
+    manifest: GenerationManifest,
+    incremental: bool = True,
+    deterministic: bool = True,
+    max_workers: int | None = None,
+    use_processes: bool = False,
+    progress=None,
+    cancel=None,
+    log=print,
+) -> tuple[dict[str, list[str]], dict[str, dict]]:
+    """Runs stages on a worker pool, starting each one as soon as its dependencies finish.
+
+    Args:
+        stages: List of (name, tag, function, dependencies) tuples.
+        args: Positional arguments passed to every stage function.
+        manifest: Generation manifest; updated with every stage that runs.
+        incremental: Skip stages whose inputs and outputs match the manifest.
+        deterministic: Stamp headers with a hash of each file's content instead of the date.
+        max_workers: Pool size. Defaults to the number of CPUs; 1 runs the stages in order.
+        use_processes: Use a process pool instead of a thread pool.
+        progress: Optional callback (done, total, tag) called as each stage finishes.
+        cancel: Optional threading.Event; once set, no further stages are started.
+        log: Called with each output line of the stages (a stage's lines
+             are passed on together when it finishes).
+
+    Returns:
+        (dict mapping stage name -> list of generated files,
+         dict mapping stage name -> metrics counters with its tag and status:
+         "ok", "failed" or "skipped")
+    """
+    results: dict[str, list[str]] = {}
+    stage_metrics: dict[str, dict] = {}
+    pending = list(stages)
+    running = {}
+    code_hash = _generator_code_hash()
+
+    def _finished(tag: str):
+        if progress is not None:
+            progress(len(results), len(stages), tag)
+
+    workers = max_workers or os.cpu_count() or 1
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_cls(max_workers=workers) as pool:
+        while pending or running:
+            if cancel is not None and cancel.is_set():
+                pending.clear()  # Let running stages finish, start nothing new.
+            ready = [s for s in pending if all(dep in results for dep in s[3])]
+            for stage in ready:
+                if len(running) >= workers:
+                    break  # Only queue what can start now, so cancelling stops the rest.
+                pending.remove(stage)
+                name, tag, func, deps = stage
+                upstream = [f for dep in deps for f in results[dep]] if deps else None
+                stage_args = args + (upstream,) if deps else args
+
+                sections, templates, fingerprint = _stage_fingerprint(name, args, upstream, code_hash, deterministic)
+                if incremental and manifest.is_fresh(name, fingerprint):
+                    log(f"[SKIP] {tag}: inputs unchanged since last generation")
+                    results[name] = manifest.files(name)
+                    stage_metrics[name] = dict(metrics.new_counters(), tag=tag, status="skipped")
+                    _finished(tag)
+                    continue
+
+                stamp = template_engine.CONTENT_STAMP if deterministic else None
+                future = pool.submit(_run_stage, tag, func, stage_args, stamp)
+                running[future] = (name, tag, fingerprint, sections, templates, upstream)
+
+            if not running:
+                if ready or not pending:
+                    continue  # Everything ready was skipped; dependents may be ready now.
+                # Unknown dependency names would otherwise spin forever.
+                raise ValueError(f"Unresolvable stage dependencies: {[s[0] for s in pending]}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, tag, fingerprint, sections, templates, upstream = running.pop(future)
+                files, ok, outputs, counters, output = future.result()
+                if ok and name in EDITED_IN_PLACE:
+                    # Record the file as the stage left it, so the next run can skip it.
+                    sections, templates, fingerprint = _stage_fingerprint(name, args, upstream, code_hash,
+                                                                          deterministic)
+                for line in output.splitlines():
+                    log(line)
+                results[name] = files
+                stage_metrics[name] = dict(counters, tag=tag, status="ok" if ok else "failed")
+                if ok:
+                    manifest.record(name, fingerprint, sections, templates, files, outputs)
+                else:
+                    manifest.forget(name)
+                _finished(tag)
+
+    return results, stage_metrics
+
+
+def generate_project_files(
+    pinout_config: dict,
+    peripheral_settings: dict,
+    preset_settings: dict | None = None,
+    max_workers: int | None = None,
+    use_processes: bool = False,
+    deterministic: bool = True,
+    incremental: bool = True,
+    output_root: str | Path | None = None,
+    strict: bool = False,
+    progress=None,
+    cancel=None,
+    metrics_path: str | Path | None = None,
+    log=None,
+) -> tuple[list[str], dict]:
+    """Generate STM32 project files.
+    
+    Workflow:
+      1) GPIO, I2C, UART, ADC, PRESETS, main.c/h, HAL config and README (in parallel)
+      2) CMakeLists.txt, once every source file is generated
+      3) Remove previously generated files that are no longer produced
+
+    Files are only rewritten when their content changes, so regenerating an
+    unchanged configuration does not trigger any recompilation. With
+    incremental=True, stages whose config sections, templates and outputs match
+    the generation manifest (.codegen_manifest.json) are not re-rendered at all.
+
+    The three configs are first migrated and validated (config_schema), so a
+    malformed config fails before any file is touched.
+
+    Args:
+        pinout_config: Configuration from pinout_config.json.
+        peripheral_settings: Configuration from peripheral_settings.json.
+        preset_settings: Configuration from preset_settings.json.
+        max_workers: Number of stages rendered at the same time (1 = sequential).
+        use_processes: Render stages on a process pool instead of threads.
+        deterministic: Stamp file headers with a hash of their own content instead
+                       of the current date, so a file only changes with its body.
+        incremental: Skip stages whose inputs did not change since the last run.
+        output_root: Folder to generate into (Core/, cmake/, README.md). Defaults to
+                     the project root; HAL config and CMakeLists.txt are only
+                     updated if the output root already contains them.
+        strict: Raise RuntimeError if any stage fails instead of only reporting it.
+        progress: Optional callback (done, total, tag) called as each stage finishes.
+        cancel: Optional threading.Event; once set, stages not yet started are
+                dropped and GenerationCancelled is raised.
+        metrics_path: If given, the metrics report is also written there as JSON.
+        log: Optional callback receiving every output line instead of stdout
+             (only the generation's own output, even while other threads print).
+
+    Returns:
+        (list of generated source/header files, metrics report). The report has
+        per-stage wall time, template render time, bytes written and files
+        written vs unchanged, plus totals (see generators.metrics.summarize).
+
+    Raises:
+        config_schema.ConfigValidationError: If a config does not match the schema.
+        GenerationCancelled: If `cancel` was set before every stage ran.
+    """
+    if log is not None:
+        with output_routing.route(output_routing.LineWriter(log)) as writer:
+            try:
+                return generate_project_files(
+                    pinout_config, peripheral_settings, preset_settings,
+                    max_workers=max_workers, use_processes=use_processes, deterministic=deterministic,
+                    incremental=incremental, output_root=output_root, strict=strict,
+                    progress=progress, cancel=cancel, metrics_path=metrics_path)
+            finally:
+                writer.flush()
+
+    start = time.perf_counter()
+    pinout_config, peripheral_settings, preset_settings = config_schema.validate_configs(
+        pinout_config, peripheral_settings, preset_settings)
+    print(f"[CONFIG] Validated (schema version {config_schema.SCHEMA_VERSION}) "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    root = _root(output_root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = GenerationManifest(root)
+    results, stage_metrics = _run_stages(
+        STAGES,
+        (None if root == PROJ_ROOT else str(root), pinout_config, peripheral_settings, preset_settings),
+        manifest,
+        incremental=incremental,
+        deterministic=deterministic,
+        max_workers=max_workers,
+        use_processes=use_processes,
+        progress=progress,
+        cancel=cancel,
+    )
+    if len(results) < len(STAGES):
+        # Cancelled: keep what finished in the manifest, but leave all other files alone.
+        manifest.save()
+        raise GenerationCancelled(f"Generation cancelled after {len(results)} of {len(STAGES)} stage(s)")
+    all_generated_files = [f for name in _SOURCE_STAGES for f in results.get(name, [])]
+    failed = {name for name, c in stage_metrics.items() if c["status"] == "failed"}
+
+    print("\n--- Cleanup: Removing stale generated files ---")
+    _remove_stale_generated_files(all_generated_files, set(results) - failed, root)
+    manifest.save()
+
+    report = metrics.summarize({name: stage_metrics[name] for name, _, _, _ in STAGES},
+                               (time.perf_counter() - start) * 1000)
+    print("\n--- Generation metrics ---")
+    print(metrics.format_report(report))
+    if metrics_path:
+        with open(metrics_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[METRICS] Written to: {metrics_path}")
+
+    if failed and strict:
+        tags = [tag for name, tag, _, _ in STAGES if name in failed]
+        raise RuntimeError(f"Generation failed for stage(s): {', '.join(tags)}")
     print("\nProject file generation complete!")
-    return all_generated_files
+    return all_generated_files, report
 
 
-def _update_hal_config(peripheral_settings: dict, preset_settings: dict | None = None):
+def _update_hal_config(peripheral_settings: dict, preset_settings: dict | None = None, output_root=None):
     """Update stm32g4xx_hal_conf.h to enable required HAL modules."""
-    # Go up one directory from code generator to project root
-    project_root = Path(__file__).parent.parent.parent
+    project_root = _root(output_root)
     hal_conf_path = project_root / "Core" / "Inc" / "stm32g4xx_hal_conf.h"
     
     if not hal_conf_path.exists():
@@ -218,12 +564,14 @@ def _update_hal_config(peripheral_settings: dict, preset_settings: dict | None =
     if peripheral_settings:
         if peripheral_settings.get("I2C"):
             modules_to_enable.add("HAL_I2C_MODULE_ENABLED")
-        if peripheral_settings.get("UART") or peripheral_settings.get("USART"):
+        if peripheral_settings.get("UART"):
             modules_to_enable.add("HAL_UART_MODULE_ENABLED")
         if peripheral_settings.get("TIM"):
             modules_to_enable.add("HAL_TIM_MODULE_ENABLED")
         if peripheral_settings.get("ADC"):
             modules_to_enable.add("HAL_ADC_MODULE_ENABLED")
+        if dma_allocator.dma_requests(peripheral_settings):
+            modules_to_enable.add("HAL_DMA_MODULE_ENABLED")
     
     # Check preset settings for additional requirements
     if preset_settings and preset_settings.get("cases"):
@@ -242,21 +590,19 @@ def _update_hal_config(peripheral_settings: dict, preset_settings: dict | None =
     # Update the configuration file
     for module in modules_to_enable:
         # Enable module (uncomment)
-        pattern = f"/*#define {module}.*?*/"
+        pattern = rf"/\*\s*#define {module}\b[^\n]*?\*/"
         replacement = f"#define {module}"
-        content = re.sub(pattern, replacement, content, flags=re.DOTALL)
+        content = re.sub(pattern, replacement, content)
     
-    # Write back the updated configuration
-    with open(hal_conf_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    # Write back the updated configuration (only if a module was enabled)
+    write_if_changed(hal_conf_path, content)
     
     print(f"Enabled HAL modules: {', '.join(modules_to_enable)}")
 
 
-def _update_cmake_lists(generated_files: list[str]):
+def _update_cmake_lists(generated_files: list[str], output_root=None):
     """Update CMakeLists.txt to include all generated source files."""
-    # Use current working directory as project root (when run from code generator directory)
-    project_root = Path.cwd().parent
+    project_root = _root(output_root)
     cmake_file = project_root / "cmake" / "stm32cubemx" / "CMakeLists.txt"
     
     if not cmake_file.exists():
@@ -318,20 +664,21 @@ def _update_cmake_lists(generated_files: list[str]):
     
     updated_content = '\n'.join(new_lines)
     
-    # Write back the updated CMakeLists.txt
-    with open(cmake_file, 'w', encoding='utf-8') as f:
-        f.write(updated_content)
+    # Write back the updated CMakeLists.txt (unchanged lists keep CMake from reconfiguring)
+    write_if_changed(cmake_file, updated_content)
     
     print(f"Added {len(generated_c_files)} generated files to CMakeLists.txt")
 
 
-def _generate_readme(pinout_config: dict, peripheral_settings: dict, preset_settings: dict | None = None):
+def _generate_readme(pinout_config: dict, peripheral_settings: dict, preset_settings: dict | None = None,
+                     output_root=None):
     """Generate README.md with pin configuration summary."""
-    # Get project root relative to this script's location
-    # This file is in: code generator/ui/generators/generate_all.py
-    # Project root is: ../../.. from here
-    project_root = Path(__file__).parent.parent.parent
-    readme_file = project_root / "README.md"
+    # In the project tree the README lives next to the code generator (code generator/README.md);
+    # other output roots get it at their top level.
+    if output_root:
+        readme_file = Path(output_root) / "README.md"
+    else:
+        readme_file = template_engine.GEN_DIR / "README.md"
     
     print(f"[README] Writing to: {readme_file}")
     
@@ -361,7 +708,7 @@ def _generate_readme(pinout_config: dict, peripheral_settings: dict, preset_sett
     readme_content = f"""# {project_name}
 
 **Microcontroller:** {mcu}  
-**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Generated:** {template_engine.generation_stamp()}
 
 ---
 
@@ -429,6 +776,11 @@ def _generate_readme(pinout_config: dict, peripheral_settings: dict, preset_sett
                         channel_name = channel.get("name", "Unknown")
                         channel_num = channel.get("channel", "Unknown")
                         readme_content += f"- {channel_name} (Channel {channel_num})\n"
+                elif periph_settings.get("conversionMode"):
+                    readme_content += (f"**Channel:** {adc_generator.adc1_channel(pinout_config, periph_settings) or 'ADC_CHANNEL_1 (no ANALOG pin)'}  \n"
+                                       f"**Conversion:** {periph_settings['conversionMode']}, "
+                                       f"{periph_settings.get('oversamplingRatio', 1)}x oversampling"
+                                       f"{', circular DMA' if periph_settings.get('dma') else ''}\n")
                 else:
                     readme_content += "No ADC channels configured.\n"
             
@@ -532,8 +884,7 @@ def _generate_readme(pinout_config: dict, peripheral_settings: dict, preset_sett
     
     # Write README file
     try:
-        with open(readme_file, 'w', encoding='utf-8') as f:
-            f.write(readme_content)
+        write_if_changed(readme_file, template_engine.finish_stamp(readme_content))
         print(f"[README] ✅ Generated README.md successfully at: {readme_file}")
     except Exception as e:
         print(f"[README] ❌ Error writing README: {e}")
@@ -2,8 +2,8 @@
 from __future__ import annotations
 import os
 from pathlib import Path
-from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
+from . import template_engine
+from .output_writer import write_if_changed, rebase_output
 
 # --- Path Definitions ---
 # The script calculates key directory paths by navigating up from its own location.
@@ -28,14 +28,9 @@ TEMPLATE_C_NAME = "gpio_template.c"
 TEMPLATE_H_NAME = "gpio_template.h"
 
 # --- Jinja2 Environment Setup ---
-# Initialize the Jinja2 environment. The FileSystemLoader is configured to
-# search for templates in both the 'src' and 'inc' template directories.
-env = Environment(
-    loader=FileSystemLoader([str(TPL_DIR_SRC), str(TPL_DIR_INC)]),
-    autoescape=False,
-    trim_blocks=True,      # Removes the first newline after a block
-    lstrip_blocks=True,    # Strips leading whitespace from a block
-)
+# All generators share one environment (and its bytecode cache), which searches
+# for templates in both the 'src' and 'inc' template directories.
+env = template_engine.get_environment()
 
 def _render_and_save(template_name: str, context: dict, output_path: Path) -> Path:
     """
@@ -47,65 +42,40 @@ def _render_and_save(template_name: str, context: dict, output_path: Path) -> Pa
         output_path (Path): The absolute path where the rendered file will be saved.
 
     Returns:
-        Path: The path to the newly created file.
+        Path: The path to the generated file (rewritten only if its content changed).
         
     Raises:
         FileNotFoundError: If the specified template cannot be found in the loader paths.
     """
     print(f"[JINJA] Looking for '{template_name}' in: {TPL_DIR_SRC} and {TPL_DIR_INC}")
 
-    try:
-        template = env.get_template(template_name)
-    except TemplateNotFound as e:
-        raise FileNotFoundError(
-            f"Template '{template_name}' not found. "
-            f"Ensure it exists in {TPL_DIR_SRC} or {TPL_DIR_INC}"
-        ) from e
-
     # Render the template with the provided context data.
-    rendered_content = template.render(**context)
-
-    # Create the parent directory for the output file if it doesn't exist.
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Write the rendered content to the output file.
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(rendered_content)
+    rendered_content = template_engine.render(template_name, context)
 
-    print(f"[SUCCESS] -> Generated file: {output_path}")
+    # Write the rendered content, leaving the file untouched if nothing changed.
+    if write_if_changed(output_path, rendered_content):
+        print(f"[SUCCESS] -> Generated file: {output_path}")
+    else:
+        print(f"[UNCHANGED] -> {output_path}")
     return output_path
 
 
-def generate_gpio_config(pinout_data_or_blocks) -> list[str]:
+def generate_gpio_config(pinout_config: dict, output_root=None) -> list[str]:
     """
-    Generates gpio.c/.h files from the new 'pinout_config.json' format (field 'gpio')
-    or, for backward compatibility, from an old list of blocks with 'pins'.
+    Generates gpio.c/.h files from 'pinout_config.json' (field 'gpio').
     
     Args:
-        pinout_data_or_blocks: Either a dict with 'gpio' field or a list of peripheral blocks.
+        pinout_config: Validated pinout config (see config_schema; legacy
+                       shapes are migrated there).
+        output_root: Folder to generate into (default: the project root).
         
     Returns:
         List of generated file paths.
     """
-    # Collect pins (supports both new and old format)
-    all_pins = []
-
-    # NEW format: dict with 'gpio': [...]
-    if isinstance(pinout_data_or_blocks, dict) and "gpio" in pinout_data_or_blocks:
-        all_pins = list(pinout_data_or_blocks.get("gpio", []))
-
-    # COMPAT: old format: list of blocks {"pins":[...]}
-    elif isinstance(pinout_data_or_blocks, list):
-        for peripheral_dict in pinout_data_or_blocks:
-            all_pins.extend(peripheral_dict.get("pins", []))
-
-    else:
-        # Last fallback: empty
-        all_pins = []
+    all_pins = list(pinout_config.get("gpio", []))
 
     # Build context for template
     context = {
-        "now": datetime.now,
         "pins": all_pins,
         "map_mode": {
             "INPUT":     "GPIO_MODE_INPUT",
@@ -128,6 +98,6 @@ def generate_gpio_config(pinout_data_or_blocks) -> list[str]:
         }
     }
 
-    out_h_path = _render_and_save(TEMPLATE_H_NAME, context, OUT_INC_PATH)
-    out_c_path = _render_and_save(TEMPLATE_C_NAME, context, OUT_SRC_PATH)
+    out_h_path = _render_and_save(TEMPLATE_H_NAME, context, rebase_output(OUT_INC_PATH, output_root))
+    out_c_path = _render_and_save(TEMPLATE_C_NAME, context, rebase_output(OUT_SRC_PATH, output_root))
     return [str(out_c_path), str(out_h_path)]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
-from datetime import datetime
+from . import template_engine
+from .output_writer import write_if_changed, rebase_output
 import data
 
 # --- Paths ---
@@ -18,24 +18,16 @@ OUT_SRC_PATH = PROJ_ROOT / "Core" / "Src" / "i2c.c"
 TEMPLATE_C_NAME = "i2c_template.c"
 TEMPLATE_H_NAME = "i2c_template.h"
 
-env = Environment(
-    loader=FileSystemLoader([str(TPL_DIR_SRC), str(TPL_DIR_INC)]),
-    autoescape=False, trim_blocks=True, lstrip_blocks=True,
-)
+env = template_engine.get_environment()
 
 
 def _render_and_save(template_name: str, context: dict, output_path: Path) -> Path:
     print(f"[JINJA] Looking for '{template_name}' in: {TPL_DIR_SRC} and {TPL_DIR_INC}")
-    try:
-        template = env.get_template(template_name)
-    except TemplateNotFound as e:
-        raise FileNotFoundError(
-            f"Template '{template_name}' not found. Ensure it exists in {TPL_DIR_SRC} or {TPL_DIR_INC}"
-        ) from e
-    rendered_content = template.render(**context)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(rendered_content, encoding="utf-8")
-    print(f"[SUCCESS] -> Generated file: {output_path}")
+    rendered_content = template_engine.render(template_name, context)
+    if write_if_changed(output_path, rendered_content):
+        print(f"[SUCCESS] -> Generated file: {output_path}")
+    else:
+        print(f"[UNCHANGED] -> {output_path}")
     return output_path
 
 def _as_hal_const(value: str | None, default: str) -> str:
@@ -61,26 +53,23 @@ def _addr7_to_hal(addr_any) -> int:
     a7 = _to_int(addr_any, 0)
     return (a7 << 1) & 0xFF
 
-def generate_i2c_config(a, b=None) -> list[str]:
+def generate_i2c_config(i2c_settings: dict, gpio_list=None, output_root=None, dma=None) -> list[str]:
     """Generate I2C configuration files.
     
     Args:
-        a: I2C settings dictionary or pinout list (legacy).
-        b: Settings dictionary (legacy compatibility).
+        i2c_settings: Validated peripheral_settings["I2C"] ({instance: settings}).
+        gpio_list: Pinout 'gpio' entries (unused; kept for a uniform stage call).
+        output_root: Folder to generate into (default: the project root).
+        dma: DMA channels of the whole config (dma_allocator.allocate()); needed
+             when an instance uses the DMA transfer mode.
         
     Returns:
         List of generated file paths.
     """
-    # NEW signature: (i2c_settings: dict, gpio_list=None)
-    if isinstance(a, dict):
-        i2c_settings = a
-    else:
-        # COMPAT: old signature: (pinout_list, settings)
-        i2c_settings = b or {}
-
     if not i2c_settings:
         return []
 
+    dma = dma or {}
     i2c_interfaces = []
     for instance, inst_set in i2c_settings.items():
         # clock -> fixed timing values for HSI16 (16MHz internal clock)
@@ -111,7 +100,7 @@ def generate_i2c_config(a, b=None) -> list[str]:
                 "address_hal": _addr7_to_hal(dev.get("address", "0x00")),
             })
 
-        i2c_interfaces.append({
+        i2c = {
             "num": int(instance.replace("I2C","")),
             "interface": instance,
             "timing_reg": timing,
@@ -127,12 +116,24 @@ def generate_i2c_config(a, b=None) -> list[str]:
             "no_stretch_mode":    no_stretch_mode,
 
             "devices": processed_devices,
-        })
+
+            # Interrupt and DMA modes run the transfers (and the request queue) from the I2C interrupts
+            "irq": xfer_mode in ("INTERRUPT", "DMA"),
+            "dma": xfer_mode == "DMA",
+        }
+        if i2c["dma"]:
+            i2c.update({
+                "dma_name": instance.lower(),
+                "dma_tx": dma[f"{instance}_TX"],
+                "dma_rx": dma[f"{instance}_RX"],
+            })
+        i2c_interfaces.append(i2c)
 
     if not i2c_interfaces:
         return []
 
-    context = {"i2c_interfaces": i2c_interfaces, "now": datetime.now}
-    out_h_path = _render_and_save(TEMPLATE_H_NAME, context, OUT_INC_PATH)
-    out_c_path = _render_and_save(TEMPLATE_C_NAME, context, OUT_SRC_PATH)
+    dma_controllers = sorted({i[k].controller for i in i2c_interfaces if i["dma"] for k in ("dma_tx", "dma_rx")})
+    context = {"i2c_interfaces": i2c_interfaces, "dma_controllers": dma_controllers}
+    out_h_path = _render_and_save(TEMPLATE_H_NAME, context, rebase_output(OUT_INC_PATH, output_root))
+    out_c_path = _render_and_save(TEMPLATE_C_NAME, context, rebase_output(OUT_SRC_PATH, output_root))
     return [str(out_c_path), str(out_h_path)]
\ No newline at end of file
@@ -3,8 +3,9 @@
 from __future__ import annotations
 import re
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
-from datetime import datetime
+from . import template_engine
+from .config_schema import DHT11_MIN_PERIOD_MS
+from .output_writer import write_if_changed, rebase_output
 
 # --- Path Definitions ---
 THIS_FILE = Path(__file__).resolve()
@@ -17,28 +18,22 @@ OUT_INC_PATH = PROJ_ROOT / "Core" / "Inc" / "main.h" # Path for main.h
 TEMPLATE_C_NAME = "main_template.c"
 TEMPLATE_H_NAME = "main_template.h" # Template for main.h
 
+# Scheduler period of a preset case without "sample_period_ms" (ms)
+DISPLAY_PERIOD_MS = 200     # LCD/UART outputs
+POLL_PERIOD_MS = 1          # GPIO/PWM outputs, every SysTick
+
 # --- Jinja2 Environment Setup ---
-# The loader now searches in both 'inc' and 'src' template folders.
-env = Environment(
-    loader=FileSystemLoader([str(TPL_DIR_SRC), str(TPL_DIR_INC)]),
-    autoescape=False,
-    trim_blocks=True,
-    lstrip_blocks=True,
-)
+# Shared environment; the loader searches in both 'inc' and 'src' template folders.
+env = template_engine.get_environment()
 
 def _render_and_save(template_name: str, context: dict, output_path: Path) -> Path:
-    """Renders a Jinja2 template and saves it to a file."""
+    """Renders a Jinja2 template and saves it to a file if its content changed."""
     print(f"[JINJA] Looking for '{template_name}' in loader paths...")
-    try:
-        template = env.get_template(template_name)
-    except TemplateNotFound as e:
-        raise FileNotFoundError(f"Template '{template_name}' not found") from e
-
-    rendered_content = template.render(**context)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(rendered_content)
-    print(f"[SUCCESS] -> Generated file: {output_path}")
+    rendered_content = template_engine.render(template_name, context)
+    if write_if_changed(output_path, rendered_content):
+        print(f"[SUCCESS] -> Generated file: {output_path}")
+    else:
+        print(f"[UNCHANGED] -> {output_path}")
     return output_path
 
 def _get_digits(s: str) -> str:
@@ -46,14 +41,25 @@ def _get_digits(s: str) -> str:
     m = re.findall(r"\d+", s or "")
     return m[0] if m else ""
 
-def generate_main_files(pinout_config: dict, peripheral_settings: dict, preset_settings: dict | None = None) -> list[str]:
+def _sample_period(case: dict) -> int:
+    """Task period of a preset case: its "sample_period_ms", else one for its input/output type."""
+    if case.get("sample_period_ms"):
+        return case["sample_period_ms"]
+    if case["input_type"] == "dht11":
+        return DHT11_MIN_PERIOD_MS
+    if case["output_type"] in ("lcd", "uart"):
+        return DISPLAY_PERIOD_MS
+    return POLL_PERIOD_MS
+
+def generate_main_files(pinout_config: dict, peripheral_settings: dict, preset_settings: dict | None = None,
+                        output_root=None) -> list[str]:
     """
     Analyzes the user's configuration and generates main.c and main.h files
     with relevant example tasks and pin definitions.
+    output_root selects the folder to generate into (default: the project root).
     """
     # 1. Initialize a comprehensive context for the templates
     context = {
-        "now": datetime.now,
         "all_pins": [],
         "gpio_configs": [],
         "i2c_interfaces": [],
@@ -68,37 +74,20 @@ def generate_main_files(pinout_config: dict, peripheral_settings: dict, preset_s
         "preset_cases": [],
     }
 
-    # Support both new format (gpio: [...]) and old format (peripherals: [...])
+    # 2. Pins (config_schema migrates the old 'peripherals' blocks into 'gpio')
     gpio_pins = pinout_config.get("gpio", [])
-    pinout_blocks = pinout_config.get("peripherals", [])
-    
-    # 2. First pass: collect pins from both formats
+    context["all_pins"].extend(gpio_pins)
     if gpio_pins:
-        # New format: direct GPIO list
-        context["all_pins"].extend(gpio_pins)
-        if gpio_pins:
-            # Mark that we have GPIO configs
-            context["gpio_configs"] = [{"pins": gpio_pins}]  # Create dummy block structure for template
-    
-    # Old format: blocks with peripherals
-    for block in pinout_blocks:
-        # Add all pins from this block to the global pin list for #defines
-        context["all_pins"].extend(block.get("pins", []))
-        
-        block_type = block.get("type")
-        if block_type == "GPIO":
-            context["gpio_configs"].append(block)
-        elif block_type == "I2C":
-            context["i2c_interfaces"].append(block)
-        elif block_type in ["UART", "USART"]:
-            context["uart_interfaces"].append(block)
+        context["gpio_configs"] = [{"pins": gpio_pins}]  # Create dummy block structure for template
     
     # 3. Check for preset cases FIRST to determine what peripherals are actually needed
     if preset_settings and preset_settings.get("cases"):
         cases = preset_settings.get("cases", [])
         if cases:
             context["preset_example_needed"] = True
-            context["preset_cases"] = cases
+            # Copies: the type fields added below must not leak into the caller's
+            # config, which other stages read concurrently.
+            context["preset_cases"] = [dict(case) for case in cases]
     
     # 3b. Second pass: determine which examples are needed for main.c
     # Only generate example tasks if NOT using presets
@@ -154,6 +143,8 @@ def generate_main_files(pinout_config: dict, peripheral_settings: dict, preset_s
             else:
                 case["output_type"] = "unknown"
             
+            case["sample_period_ms"] = _sample_period(case)
+            
             # Extract peripheral info
             ps = case.get("peripheral_settings", {})
             in_periph = ps.get("input_peripheral", {})
@@ -225,8 +216,8 @@ def generate_main_files(pinout_config: dict, peripheral_settings: dict, preset_s
                 })
 
     # 4. Render and save both main.c and main.h
-    main_c_path = _render_and_save(TEMPLATE_C_NAME, context, OUT_SRC_PATH)
-    main_h_path = _render_and_save(TEMPLATE_H_NAME, context, OUT_INC_PATH)
+    main_c_path = _render_and_save(TEMPLATE_C_NAME, context, rebase_output(OUT_SRC_PATH, output_root))
+    main_h_path = _render_and_save(TEMPLATE_H_NAME, context, rebase_output(OUT_INC_PATH, output_root))
     
     return [str(main_c_path), str(main_h_path)]
 
@@ -0,0 +1,111 @@
+# generators/manifest.py
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from .output_writer import content_hash
+
+MANIFEST_NAME = ".codegen_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_json(value) -> str:
+    """Returns a SHA-256 hash of a JSON-serializable value (key order independent)."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return content_hash(payload.encode("utf-8"))
+
+
+class GenerationManifest:
+    """Persisted record of what each generation stage consumed and produced.
+
+    For every stage the manifest stores:
+      - the hash of each config section it read and of each template it rendered,
+      - the combined fingerprint of those inputs,
+      - every output file it wrote, with the hash, size and mtime of its content.
+
+    A stage whose fingerprint is unchanged and whose outputs are still on disk
+    untouched can be skipped on the next run.
+    """
+
+    def __init__(self, project_root: str | Path):
+        self.project_root = Path(project_root)
+        self.path = self.project_root / MANIFEST_NAME
+        self.stages: dict[str, dict] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if raw.get("version") == MANIFEST_VERSION:
+                self.stages = raw.get("stages", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[MANIFEST] Warning: ignoring unreadable {self.path.name}: {e}")
+
+    def _rel(self, file_path: str) -> str:
+        try:
+            return Path(file_path).resolve().relative_to(self.project_root.resolve()).as_posix()
+        except ValueError:
+            return str(file_path)
+
+    def _abs(self, rel_path: str) -> str:
+        return str(self.project_root / rel_path)
+
+    def _output_untouched(self, rel_path: str, record: dict) -> bool:
+        """True if an output file still has the content this manifest recorded."""
+        try:
+            st = os.stat(self._abs(rel_path))
+        except OSError:
+            return False
+        if st.st_size != record.get("size"):
+            return False
+        if st.st_mtime_ns == record.get("mtime_ns"):
+            return True
+        # Touched but possibly identical (e.g. checked out again): compare content.
+        with open(self._abs(rel_path), "rb") as f:
+            if content_hash(f.read()) != record.get("hash"):
+                return False
+        record["mtime_ns"] = st.st_mtime_ns
+        return True
+
+    def is_fresh(self, stage: str, fingerprint: str) -> bool:
+        """True if the stage's inputs and outputs match the last recorded run."""
+        entry = self.stages.get(stage)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return False
+        return all(self._output_untouched(rel, rec) for rel, rec in entry.get("outputs", {}).items())
+
+    def files(self, stage: str) -> list[str]:
+        """Returns the files the stage reported during its last recorded run."""
+        return [self._abs(rel) for rel in self.stages.get(stage, {}).get("files", [])]
+
+    def record(self, stage: str, fingerprint: str, sections: dict, templates: dict,
+               files: list[str], outputs: dict[str, str]):
+        """Stores the inputs and outputs of a stage that just ran successfully."""
+        recorded_outputs = {}
+        for file_path, digest in outputs.items():
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            recorded_outputs[self._rel(file_path)] = {
+                "hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            }
+        self.stages[stage] = {
+            "fingerprint": fingerprint,
+            "sections": sections,
+            "templates": templates,
+            "files": [self._rel(f) for f in files],
+            "outputs": recorded_outputs,
+        }
+
+    def forget(self, stage: str):
+        """Drops a stage (e.g. after it failed) so the next run regenerates it."""
+        self.stages.pop(stage, None)
+
+    def save(self):
+        """Writes the manifest next to the generated project."""
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "stages": self.stages}, f, indent=2, sort_keys=True)
+        except OSError as e:
+            print(f"[MANIFEST] Warning: could not save {self.path}: {e}")
@@ -0,0 +1,72 @@
+# generators/metrics.py
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Counters of the stage running in the current context (None outside collect()).
+_current: ContextVar[dict | None] = ContextVar("stage_metrics", default=None)
+
+
+def new_counters() -> dict:
+    """Returns the per-stage counters, all zero."""
+    return {
+        "wall_ms": 0.0,
+        "render_ms": 0.0,
+        "bytes_written": 0,
+        "files_written": 0,
+        "files_unchanged": 0,
+    }
+
+
+@contextmanager
+def collect():
+    """Collects the counters of everything rendered/written inside the block.
+
+    Yields:
+        dict: new_counters(), updated by template_engine.render() and
+              output_writer.write_if_changed(); wall_ms is set on exit.
+              Collection is per context, so stages running in parallel
+              threads do not mix their numbers.
+    """
+    counters = new_counters()
+    token = _current.set(counters)
+    start = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        counters["wall_ms"] = (time.perf_counter() - start) * 1000
+        _current.reset(token)
+
+
+def add(key: str, value):
+    """Adds to a counter of the current stage (no-op outside collect())."""
+    counters = _current.get()
+    if counters is not None:
+        counters[key] += value
+
+
+def summarize(stages: dict[str, dict], total_ms: float) -> dict:
+    """Builds the generation report from the per-stage counters."""
+    totals = new_counters()
+    for counters in stages.values():
+        for key in totals:
+            totals[key] += counters.get(key, 0)
+    totals["wall_ms"] = total_ms
+    return {
+        "totals": totals,
+        "stages_run": sorted(n for n, c in stages.items() if c["status"] != "skipped"),
+        "stages_skipped": sorted(n for n, c in stages.items() if c["status"] == "skipped"),
+        "stages_failed": sorted(n for n, c in stages.items() if c["status"] == "failed"),
+        "stages": stages,
+    }
+
+
+def format_report(report: dict) -> str:
+    """Formats a report as a fixed-width table."""
+    lines = [f"{'Stage':<14}{'Status':<9}{'Wall ms':>9}{'Render ms':>11}{'Written':>9}{'Unchanged':>11}{'Bytes':>10}"]
+    rows = list(report["stages"].items()) + [("TOTAL", dict(report["totals"], status=""))]
+    for name, c in rows:
+        lines.append(f"{c.get('tag', name):<14}{c['status']:<9}{c['wall_ms']:>9.2f}{c['render_ms']:>11.2f}"
+                     f"{c['files_written']:>9}{c['files_unchanged']:>11}{c['bytes_written']:>10}")
+    return "\n".join(lines)
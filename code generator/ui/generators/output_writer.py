@@ -0,0 +1,94 @@
+# generators/output_writer.py
+from __future__ import annotations
+import hashlib
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from . import metrics
+from .template_engine import PROJ_ROOT
+
+# Files written (or confirmed unchanged) while a track_outputs() block is active.
+_tracked_outputs: ContextVar[dict | None] = ContextVar("tracked_outputs", default=None)
+
+
+def content_hash(data: bytes) -> str:
+    """Returns the SHA-256 hex digest of some bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+@contextmanager
+def track_outputs():
+    """Collects every file handled by write_if_changed() inside the block.
+
+    Yields:
+        dict: Maps output path -> SHA-256 of its content. Tracking is per thread
+              (context), so stages running in parallel do not mix their files.
+    """
+    outputs: dict[str, str] = {}
+    token = _tracked_outputs.set(outputs)
+    try:
+        yield outputs
+    finally:
+        _tracked_outputs.reset(token)
+
+
+def rebase_output(default_path: str | Path, output_root: str | Path | None = None) -> Path:
+    """Moves a default output path into another output root.
+
+    Args:
+        default_path: Output path inside the project (e.g. <project>/Core/Inc/gpio.h).
+        output_root: Folder to generate into instead of the project root, or None.
+
+    Returns:
+        Path: e.g. <output_root>/Core/Inc/gpio.h, or default_path unchanged.
+    """
+    if output_root is None:
+        return Path(default_path)
+    return Path(output_root) / Path(default_path).relative_to(PROJ_ROOT)
+
+
+def _encode(content: str) -> bytes:
+    """Encodes text exactly as open(path, 'w', encoding='utf-8') would write it."""
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    return content.encode("utf-8")
+
+
+def write_if_changed(output_path: str | Path, content: str) -> bool:
+    """Writes a text file only if its bytes would change.
+
+    Leaving unchanged files alone keeps their mtime, so CMake/Ninja does not
+    recompile anything that depends on them.
+
+    Args:
+        output_path: File to write. Parent folders are created if needed.
+        content: Text content (UTF-8, platform line endings).
+
+    Returns:
+        bool: True if the file was written, False if it already had this content.
+    """
+    path = Path(output_path)
+    data = _encode(content)
+    digest = content_hash(data)
+
+    tracked = _tracked_outputs.get()
+    if tracked is not None:
+        tracked[str(path)] = digest
+
+    try:
+        if path.stat().st_size == len(data) and content_hash(path.read_bytes()) == digest:
+            metrics.add("files_unchanged", 1)
+            return False
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first so a build never sees a half-written file.
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    metrics.add("files_written", 1)
+    metrics.add("bytes_written", len(data))
+    return True
@@ -1,8 +1,8 @@
 # generators/presets_generator.py
 from __future__ import annotations
 from pathlib import Path
-from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
+from . import template_engine
+from .output_writer import write_if_changed, rebase_output
 import re
 
 THIS_FILE = Path(__file__).resolve()
@@ -17,10 +17,7 @@ OUT_PRESETS_IN_C  = PROJ_ROOT / "Core" / "Src" / "presets_in.c"
 OUT_PRESETS_OUT_H = PROJ_ROOT / "Core" / "Inc" / "presets_out.h"
 OUT_PRESETS_OUT_C = PROJ_ROOT / "Core" / "Src" / "presets_out.c"
 
-env = Environment(
-    loader=FileSystemLoader([str(TPL_DIR_SRC), str(TPL_DIR_INC)]),
-    autoescape=False, trim_blocks=True, lstrip_blocks=True,
-)
+env = template_engine.get_environment()
 
 def _digits(name: str) -> str:
     """Extract digits from a string."""
@@ -40,13 +37,9 @@ def _handle_from_instance(kind: str, instance: str) -> str:
     return f"{prefix}{n}" if n else ""
 
 def _render(name: str, ctx: dict, outpath: Path):
-    """Render template to file."""
-    try:
-        tpl = env.get_template(name)
-    except TemplateNotFound as e:
-        raise FileNotFoundError(f"Template {name} not found in {TPL_DIR_SRC} or {TPL_DIR_INC}") from e
-    outpath.parent.mkdir(parents=True, exist_ok=True)
-    outpath.write_text(tpl.render(**ctx), encoding="utf-8")
+    """Render template to file (only rewritten if the content changed)."""
+    rendered = template_engine.render(name, ctx)
+    write_if_changed(outpath, rendered)
     return str(outpath)
 
 def _get_device_list(devices: list[dict] | None, name_contains: str) -> list[dict]:
@@ -105,6 +98,7 @@ def generate_presets_files(
     preset_settings: dict,
     peripheral_settings: dict,
     pinout_config: dict,
+    output_root=None,
 ) -> list[str]:
     """
     Generate presets_in/out .c/.h files.
@@ -112,6 +106,7 @@ def generate_presets_files(
         preset_settings: Configuration from preset_settings.json
         peripheral_settings: Configuration from peripheral_settings.json
         pinout_config: Configuration from pinout_config.json
+        output_root: Folder to generate into (default: the project root)
     """
     out_files = []
 
@@ -122,15 +117,12 @@ def generate_presets_files(
 
     i2c_dict = (peripheral_settings or {}).get("I2C", {}) or {}
     uart_dict = (peripheral_settings or {}).get("UART", {}) or {}
-    usart_dict = (peripheral_settings or {}).get("USART", {}) or {}
     tim_dict = (peripheral_settings or {}).get("TIM", {}) or {}
 
     if i2c_dict:
         i2c_inst = _pick_first_key(i2c_dict, "I2C")
     if uart_dict:
         uart_inst = _pick_first_key(uart_dict, "UART")
-    if not uart_inst and usart_dict:
-        uart_inst = _pick_first_key(usart_dict, "USART")
     if tim_dict:
         tim_inst = _pick_first_key(tim_dict, "TIM")
 
@@ -138,6 +130,13 @@ def generate_presets_files(
     i2c_handle = _handle_from_instance("i2c", i2c_inst or "")
     uart_handle = _handle_from_instance("uart", uart_inst or "")
     tim_handle = _handle_from_instance("tim", tim_inst or "")
+    # DMA transfer mode: uart.c queues prints in its TX ring buffer
+    uart_dma = bool(uart_inst) and (uart_dict[uart_inst].get("transferMode") or "").upper() == "DMA"
+    # Interrupt/DMA I2C: sensor reads and LCD writes go through i2c.c's request queue
+    i2c_async = bool(i2c_inst) and (i2c_dict[i2c_inst].get("transferMode") or "").upper() in ("INTERRUPT", "DMA")
+    # CONTINUOUS/TIMER ADC: adc.c keeps converting, the potentiometer reads the latest result
+    adc1 = ((peripheral_settings or {}).get("ADC", {}) or {}).get("ADC1", {}) or {}
+    adc_streaming = adc1.get("conversionMode", "SINGLE") != "SINGLE"
 
     # --- Extract inputs/outputs from preset_settings ---
     cases = (preset_settings or {}).get("cases", []) or []
@@ -261,8 +260,8 @@ def generate_presets_files(
 
     # --- Build context for input templates ---
     ctx_in = {
-        "now": datetime.now,
         "i2c_handle": i2c_handle,
+        "i2c_async": i2c_async,
         "uart_handle": uart_handle,
         "tim_handle": tim_handle,
         "lcd_addr": lcd_addr_hal,
@@ -280,13 +279,15 @@ def generate_presets_files(
         "include_dht11": has_dht11,
         "dht_pin": dht_pin,
         "include_pot": has_pot,
+        "adc_streaming": adc_streaming,
     }
     
     # --- Build context for output templates ---
     ctx_out = {
-        "now": datetime.now,
         "i2c_handle": i2c_handle,
+        "i2c_async": i2c_async,
         "uart_handle": uart_handle,
+        "uart_dma": uart_dma,
         "tim_handle": tim_handle,
         "lcd_addr": lcd_addr_hal,
         "OUT": {
@@ -298,10 +299,10 @@ def generate_presets_files(
     }
     
     # --- Render templates ---
-    out_files.append(_render("presets_in_template.h", ctx_in, OUT_PRESETS_IN_H))
-    out_files.append(_render("presets_in_template.c", ctx_in, OUT_PRESETS_IN_C))
-    out_files.append(_render("presets_out_template.h", ctx_out, OUT_PRESETS_OUT_H))
-    out_files.append(_render("presets_out_template.c", ctx_out, OUT_PRESETS_OUT_C))
+    out_files.append(_render("presets_in_template.h", ctx_in, rebase_output(OUT_PRESETS_IN_H, output_root)))
+    out_files.append(_render("presets_in_template.c", ctx_in, rebase_output(OUT_PRESETS_IN_C, output_root)))
+    out_files.append(_render("presets_out_template.h", ctx_out, rebase_output(OUT_PRESETS_OUT_H, output_root)))
+    out_files.append(_render("presets_out_template.c", ctx_out, rebase_output(OUT_PRESETS_OUT_C, output_root)))
     
     print(f"[SUCCESS] Generated presets files: {out_files}")
     return out_files
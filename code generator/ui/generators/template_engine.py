@@ -0,0 +1,129 @@
+# generators/template_engine.py
+from __future__ import annotations
+import hashlib
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, TemplateNotFound
+from . import metrics
+
+# --- Path Definitions ---
+# Assumes a structure like: .../TCCV02/code generator/ui/generators/template_engine.py
+THIS_FILE = Path(__file__).resolve()
+GEN_DIR = THIS_FILE.parent.parent.parent
+PROJ_ROOT = GEN_DIR.parent
+
+# Default template root; templates live in its 'src' and 'inc' subfolders.
+TPL_ROOT = GEN_DIR / "TEMPLATES"
+
+# Persistent on-disk cache for compiled template bytecode.
+CACHE_DIR = GEN_DIR / ".cache"
+BYTECODE_CACHE_DIR = CACHE_DIR / "jinja"
+
+# One Environment per template root, shared by every generator.
+_environments: dict[Path, Environment] = {}
+_lock = threading.Lock()
+
+# Value of {{ generation_stamp() }} in the file headers. None means today's date.
+# Kept per context so stages rendering in parallel can use different stamps.
+_generation_stamp: ContextVar[str | None] = ContextVar("generation_stamp", default=None)
+
+# set_generation_stamp(CONTENT_STAMP): each file is stamped with a hash of its
+# own text, so it only changes (and is rewritten) when its body does.
+CONTENT_STAMP = "\x00content-stamp\x00"
+
+
+def set_generation_stamp(stamp: str | None):
+    """Sets the stamp written into generated file headers.
+
+    Args:
+        stamp: CONTENT_STAMP for reproducible output, fixed text, or None to
+               stamp the current date.
+    """
+    _generation_stamp.set(stamp)
+
+
+def generation_stamp() -> str:
+    """Returns the stamp for generated file headers."""
+    return _generation_stamp.get() or datetime.now().strftime('%b %d, %Y')
+
+
+def finish_stamp(text: str) -> str:
+    """Replaces the CONTENT_STAMP placeholder in rendered text with the hash of that text."""
+    if CONTENT_STAMP not in text:
+        return text
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return text.replace(CONTENT_STAMP, f"content {digest[:12]}")
+
+
+def _build_environment(template_root: Path) -> Environment:
+    """Creates a Jinja2 environment for a template root with a bytecode cache.
+
+    Jinja2 checks each template's mtime before reusing the in-memory copy, and
+    the bytecode cache stores a checksum of the template source, so editing a
+    template (or replacing it with different content) invalidates both levels.
+    """
+    bytecode_cache = None
+    try:
+        BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(BYTECODE_CACHE_DIR), "%s.cache")
+    except OSError as e:
+        # Read-only checkouts still work, they just compile templates every run.
+        print(f"[JINJA] Warning: bytecode cache disabled ({e})")
+
+    env = Environment(
+        loader=FileSystemLoader([str(template_root / "src"), str(template_root / "inc")]),
+        autoescape=False,
+        trim_blocks=True,      # Removes the first newline after a block
+        lstrip_blocks=True,    # Strips leading whitespace from a block
+        bytecode_cache=bytecode_cache,
+        auto_reload=True,      # Re-validates templates against their mtime
+    )
+    env.globals["generation_stamp"] = generation_stamp
+    return env
+
+
+def get_environment(template_root: str | Path | None = None) -> Environment:
+    """Returns the shared Jinja2 environment for a template root.
+
+    Args:
+        template_root: Folder with 'src' and 'inc' template subfolders.
+                       Defaults to 'code generator/TEMPLATES'.
+
+    Returns:
+        Environment: Created on first use, then reused by every generator.
+    """
+    root = Path(template_root).resolve() if template_root else TPL_ROOT
+    env = _environments.get(root)
+    if env is None:
+        with _lock:
+            env = _environments.get(root)
+            if env is None:
+                env = _environments[root] = _build_environment(root)
+    return env
+
+
+def get_template(template_name: str, template_root: str | Path | None = None):
+    """Loads a template from the shared environment.
+
+    Raises:
+        FileNotFoundError: If the template is not in the root's 'src' or 'inc' folder.
+    """
+    root = Path(template_root) if template_root else TPL_ROOT
+    try:
+        return get_environment(root).get_template(template_name)
+    except TemplateNotFound as e:
+        raise FileNotFoundError(
+            f"Template '{template_name}' not found. "
+            f"Ensure it exists in {root / 'src'} or {root / 'inc'}"
+        ) from e
+
+
+def render(template_name: str, context: dict, template_root: str | Path | None = None) -> str:
+    """Renders a template from the shared environment with the given context."""
+    start = time.perf_counter()
+    text = finish_stamp(get_template(template_name, template_root).render(**context))
+    metrics.add("render_ms", (time.perf_counter() - start) * 1000)
+    return text
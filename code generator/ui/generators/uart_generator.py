@@ -1,12 +1,11 @@
 # uart_generator.py
 
 from __future__ import annotations
-from datetime import datetime
 import os
-import json
 import re
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
+from . import template_engine, dma_allocator
+from .output_writer import write_if_changed, rebase_output
 
 # --- Path Definitions ---
 # The script calculates key directory paths by navigating up from its own location.
@@ -26,31 +25,14 @@ TPL_DIR_SRC = GEN_DIR / "TEMPLATES" / "src"
 OUT_INC_PATH = PROJ_ROOT / "Core" / "Inc" / "uart.h"
 OUT_SRC_PATH = PROJ_ROOT / "Core" / "Src" / "uart.c"
 
-# Path to the MCU mapping definition file.
-MAP_PATH = GEN_DIR/ "Mappings" / "pin_map.json"
-
 # Template filenames to be used.
 TEMPLATE_C_NAME = "uart_template.c"
 TEMPLATE_H_NAME = "uart_template.h"
 
 # --- Jinja2 Environment Setup ---
-# Initialize the Jinja2 environment. The FileSystemLoader is configured to
-# search for templates in both the 'src' and 'inc' template directories.
-env = Environment(
-    loader=FileSystemLoader([str(TPL_DIR_SRC), str(TPL_DIR_INC)]),
-    autoescape=False,
-    trim_blocks=True,
-    lstrip_blocks=True,
-)
-
-def _load_mappings() -> dict:
-    """Loads and parses the pin_map.json file."""
-    try:
-        with open(MAP_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading {MAP_PATH.name}: {e}")
-        return {}
+# All generators share one environment (and its bytecode cache), which searches
+# for templates in both the 'src' and 'inc' template directories.
+env = template_engine.get_environment()
 
 def _get_digits(s: str) -> str:
     """Extracts the first sequence of digits from a string (e.g., 'UART1' -> '1')."""
@@ -67,55 +49,45 @@ def _render_and_save(template_name: str, context: dict, output_path: Path) -> Pa
         output_path (Path): The absolute path where the rendered file will be saved.
 
     Returns:
-        Path: The path to the newly created file.
+        Path: The path to the generated file (rewritten only if its content changed).
     """
     print(f"[JINJA] Looking for '{template_name}' in: {TPL_DIR_SRC} and {TPL_DIR_INC}")
 
-    try:
-        template = env.get_template(template_name)
-    except TemplateNotFound as e:
-        raise FileNotFoundError(
-            f"Template '{template_name}' not found. "
-            f"Ensure it exists in {TPL_DIR_SRC} or {TPL_DIR_INC}"
-        ) from e
-
-    rendered_content = template.render(**context)
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(rendered_content)
+    rendered_content = template_engine.render(template_name, context)
 
-    print(f"[SUCCESS] -> Generated file: {output_path}")
+    if write_if_changed(output_path, rendered_content):
+        print(f"[SUCCESS] -> Generated file: {output_path}")
+    else:
+        print(f"[UNCHANGED] -> {output_path}")
     return output_path
 
 
 def _map_uart_interface_name(instance: str) -> str:
-    s = (instance or "").upper()
-    if s == "UART1": return "USART1"
-    if s == "UART2": return "USART2"
-    return s  
+    return dma_allocator.uart_interface(instance)
 
-def generate_uart_config(a, b=None) -> list[str]:
+def generate_uart_config(uart_settings: dict, gpio_list=None, output_root=None, dma=None) -> list[str]:
     """Generate UART configuration files.
     
     Args:
-        a: UART settings dictionary.
-        b: Legacy parameter (unused).
+        uart_settings: Validated peripheral_settings["UART"] ({instance: settings};
+                       "USART" settings are merged in by config_schema).
+        gpio_list: Pinout 'gpio' entries (unused; kept for a uniform stage call).
+        output_root: Folder to generate into (default: the project root).
+        dma: DMA channels of the whole config (dma_allocator.allocate()); needed
+             when an instance uses the DMA transfer mode.
         
     Returns:
         List of generated file paths.
     """
-    # Detect new/old mode
-    if isinstance(a, dict):
-        uart_settings = a
-
     if not uart_settings:
         return []
 
+    dma = dma or {}
     uart_interfaces = []
     for instance, inst_set in uart_settings.items():
         iface = _map_uart_interface_name(instance)
-        uart_interfaces.append({
+        transfer_mode = (inst_set.get("transferMode") or "POLLING").upper()
+        uart = {
             "num": "".join([c for c in instance if c.isdigit()]),
             "interface": iface,  # USART1/2/3 ou UART4
             "baud_rate": inst_set.get("baudRate", 115200),
@@ -123,13 +95,27 @@ def generate_uart_config(a, b=None) -> list[str]:
             "stop_bits": inst_set.get("stopBits", "UART_STOPBITS_1"),
             "parity": inst_set.get("parity", "UART_PARITY_NONE"),
             "hw_flow_ctl": inst_set.get("flowControl", "UART_HWCONTROL_NONE"),
-            "transferMode": (inst_set.get("transferMode") or "POLLING").upper(),
+            "transferMode": transfer_mode,
             "mode": inst_set.get("mode", "UART_MODE_TX_RX"),
             "oversampling": "UART_OVERSAMPLING_16",
-        })
-
-    context = { "uart_interfaces": uart_interfaces, "now": datetime.now }
-
-    out_h_path = _render_and_save(TEMPLATE_H_NAME, context, OUT_INC_PATH)
-    out_c_path = _render_and_save(TEMPLATE_C_NAME, context, OUT_SRC_PATH)
+            # Interrupt and DMA modes finish their transfers in the UART interrupt
+            "irq": transfer_mode in ("INTERRUPT", "DMA"),
+            "irqn": f"{iface}_IRQn",
+            "irq_handler": f"{iface}_IRQHandler",
+            "dma": transfer_mode == "DMA",
+        }
+        if uart["dma"]:
+            uart.update({
+                "dma_name": iface.lower(),
+                "dma_tx": dma[f"{iface}_TX"],
+                "dma_rx": dma[f"{iface}_RX"],
+                "tx_buffer_size": inst_set.get("txBufferSize", 512),
+            })
+        uart_interfaces.append(uart)
+
+    dma_controllers = sorted({u[k].controller for u in uart_interfaces if u["dma"] for k in ("dma_tx", "dma_rx")})
+    context = { "uart_interfaces": uart_interfaces, "dma_controllers": dma_controllers }
+
+    out_h_path = _render_and_save(TEMPLATE_H_NAME, context, rebase_output(OUT_INC_PATH, output_root))
+    out_c_path = _render_and_save(TEMPLATE_C_NAME, context, rebase_output(OUT_SRC_PATH, output_root))
     return [str(out_c_path), str(out_h_path)]
@@ -1,11 +1,13 @@
 # ui/handlers/file_handler.py
 import json
 import os
-import subprocess
 import importlib
 from collections import defaultdict
 from tkinter import filedialog, messagebox
 import data
+import config_loader
+import selection_store
+from generators import config_schema  # no jinja2; safe at startup
 
 # Port conversion helper function
 def _port_to_hal(port_str: str) -> str:
@@ -84,194 +86,76 @@ def export_config(app):
 
 
 def build_and_flash(app):
-    """Builds the project using CMake and flashes it to the board."""
-    try:
-        # Change to project root directory (one level up from code generator)
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
-        original_cwd = os.getcwd()
-        os.chdir(project_root)
-        
-        # Check if code has been generated first
-        if not os.path.exists("Core/Src/main.c"):
-            messagebox.showwarning("Code Not Generated", "Please generate code first before building and flashing.")
-            os.chdir(original_cwd)
-            return
-        
-        messagebox.showinfo("Build & Flash", f"Starting build and flash process...\nWorking directory: {os.getcwd()}")
-        
-        # Find STM32CubeIDE toolchain
-        toolchain_path = None
-        possible_paths = [
-            r"C:\Users\laram\AppData\Local\stm32cube\bundles\gnu-tools-for-stm32\13.3.1+st.9\bin\arm-none-eabi-gcc.exe",
-            r"C:\ST\STM32CubeIDE_1.15.0\STM32CubeIDE\plugins\com.st.stm32cube.ide.mcu.externaltools.gnu-tools-for-stm32.13.3.1+st.9.win32_1.0.0.202404081157\tools\bin\arm-none-eabi-gcc.exe",
-            r"C:\Program Files\STMicroelectronics\STM32Cube\STM32CubeProgrammer\bin\STM32_Programmer_CLI.exe"
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                toolchain_path = os.path.dirname(path)
-                break
-        
-        if not toolchain_path:
-            messagebox.showerror("Toolchain Not Found", 
-                "STM32 ARM toolchain not found. Please ensure STM32CubeIDE or STM32CubeMX is installed.")
-            return
-        
-        # Set up environment with ARM toolchain
-        env = os.environ.copy()
-        env["PATH"] = toolchain_path + os.pathsep + env.get("PATH", "")
-        
-        # First, configure CMake with ARM toolchain
-        build_dir = "build"
-        
-        # Always clean build directory to ensure correct generator is used
-        if os.path.exists(build_dir):
-            import shutil
-            shutil.rmtree(build_dir)
-            print(f"Cleaned existing build directory: {build_dir}")
-        
-        messagebox.showinfo("Configuring", "Configuring CMake with ARM toolchain...")
-        
-        # Try to find the toolchain file
-        toolchain_file = None
-        toolchain_candidates = [
-            "cmake/gcc-arm-none-eabi.cmake",
-            "cmake/stm32cubemx/STM32G474xx.cmake",
-            "cmake/stm32cubemx/STM32G4xx.cmake",
-            "cmake/stm32cubemx/toolchain.cmake"
-        ]
-        
-        for candidate in toolchain_candidates:
-            if os.path.exists(candidate):
-                toolchain_file = candidate
-                break
-        
-        config_cmd = ["cmake", "-B", build_dir, "-G", "MinGW Makefiles"]
-        if toolchain_file:
-            config_cmd.extend(["--toolchain", toolchain_file])
-        
-        print(f"Running CMake command: {' '.join(config_cmd)}")
-        
-        config_result = subprocess.run(
-            config_cmd,
-            capture_output=True,
-            text=True,
-            timeout=60,
-            env=env
-        )
-        
-        if config_result.returncode != 0:
-            messagebox.showerror("CMake Config Error", 
-                f"CMake configuration failed:\n{config_result.stderr}\n\n"
-                f"Tried toolchain file: {toolchain_file or 'None found'}")
+    """Builds the project using CMake and flashes it to the board.
+
+    Runs in a TaskWindow worker so the UI stays responsive; CMake and compiler
+    output streams into the window and the build can be cancelled. The build
+    directory is kept between runs (see build_system), so only the files that
+    changed since the last build are recompiled.
+    """
+    # Imported on first use to keep them off the startup path
+    build_system = importlib.import_module("build_system")
+    task_window = importlib.import_module("task_window")
+
+    def _work(log, progress, cancel):
+        log(f"Working directory: {build_system.PROJ_ROOT}")
+        return build_system.build_project(log=log, progress=progress, cancel=cancel)
+
+    def _done(result, error):
+        if isinstance(error, build_system.BuildCancelled):
             return
-        
-        # Build the project
-        messagebox.showinfo("Building", "Building project...")
-        result = subprocess.run(
-            ["cmake", "--build", build_dir],
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minutes timeout
-            env=env
-        )
-        
-        if result.returncode == 0:
-            messagebox.showinfo("Success", "Build completed successfully!")
-            
-            # Try to flash if build succeeded
-            flash_result = subprocess.run(
-                ["cmake", "--build", build_dir, "--target", "flash"],
-                capture_output=True,
-                text=True,
-                timeout=60,
-                env=env
-            )
-            
-            if flash_result.returncode == 0:
-                messagebox.showinfo("Flash Success", "Build and flash completed successfully!")
-            else:
-                messagebox.showwarning("Flash Failed", 
-                    f"Build succeeded but flash failed:\n{flash_result.stderr}\n\n"
-                    f"You can manually flash the .elf file from the build directory.")
+        if isinstance(error, build_system.BuildError):
+            messagebox.showerror(error.title, error.message); return
+        if error is not None:
+            messagebox.showerror("Error", f"Unexpected error:\n{str(error)}"); return
+        if result["flash_ok"]:
+            messagebox.showinfo("Flash Success", "Build and flash completed successfully!")
         else:
-            messagebox.showerror("Build Error", f"Build failed:\n{result.stderr}")
-            
-    except subprocess.TimeoutExpired:
-        messagebox.showerror("Timeout", "Build/flash process timed out.")
-    except FileNotFoundError:
-        messagebox.showerror("CMake Not Found", 
-            "CMake is not installed or not in PATH.\n\n"
-            "Please install CMake and ensure it's available in your system PATH.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Unexpected error:\n{str(e)}")
-    finally:
-        # Always restore original working directory
-        try:
-            os.chdir(original_cwd)
-        except:
-            pass
+            messagebox.showwarning("Flash Failed",
+                f"Build succeeded but flash failed:\n{result['flash_output']}\n\n"
+                f"You can manually flash the .elf file from {result['build_dir']}.")
+
+    task_window.run_task(app, "Build & Flash", _work, _done)
 
 
 def generate_files(app):
     """Asks for a folder, loads the config files, and calls the code generator module.
     
     Prompts user to select configuration folder and generates STM32 project files.
+    Generation runs in a TaskWindow worker with its output streamed to a log pane.
     """
     folder_path = filedialog.askdirectory(title="Select Folder with Configuration Files")
     if not folder_path: return
     
-    pinout_path = os.path.join(folder_path, "pinout_config.json")
-    settings_path = os.path.join(folder_path, "peripheral_settings.json")
-    presets_path = os.path.join(folder_path, "preset_settings.json")
-
     try:
-        with open(pinout_path, "r", encoding="utf-8") as f: pinout_data = json.load(f)
-    except Exception as e:
-        messagebox.showerror("Read Error", f"Could not read 'pinout_config.json':\n{e}"); return
+        pinout_data, peripheral_data, preset_settings = config_loader.load_config_folder(folder_path)
+    except config_loader.ConfigLoadError as e:
+        messagebox.showerror("Read Error", str(e)); return
 
-    peripheral_data = {}
-    try:
-        with open(settings_path, "r", encoding="utf-8") as f: peripheral_data = json.load(f)
-    except FileNotFoundError:
-        print("Info: 'peripheral_settings.json' not found. Continuing without peripheral-specific settings.")
-    except Exception as e:
-        messagebox.showerror("Read Error", f"Error processing 'peripheral_settings.json':\n{e}"); return
-    
-    preset_settings = {}
+    gen = importlib.import_module("generators.generate_all")  # jinja2 is loaded here, not at startup
+    task_window = importlib.import_module("task_window")
 
-    try:
-        with open(presets_path, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-            # Accepts both list (legacy) and new dict {"cases":[...]}
-            if isinstance(raw, list):
-                # Only use if list is not empty
-                if raw:
-                    preset_settings = {"cases": raw}
-            elif isinstance(raw, dict):
-                # Ensure "cases" key
-                if "cases" in raw and isinstance(raw["cases"], list):
-                    # Only use if cases list is not empty
-                    if raw["cases"]:
-                        preset_settings = raw
-                elif raw:
-                    # Only treat as single case if dict has meaningful content
-                    # Check if dict has any non-empty values
-                    if any(v for v in raw.values() if v):
-                        preset_settings = {"cases": [raw]}
-                # If raw is empty dict {}, preset_settings stays {}
-    except FileNotFoundError:
-        preset_settings = {}
+    def _work(log, progress, cancel):
+        return gen.generate_project_files(pinout_data, peripheral_data, preset_settings,
+                                          progress=progress, cancel=cancel, log=log)
 
-    try:
-        gen = importlib.import_module("generators.generate_all")
-        out_files = gen.generate_project_files(pinout_data, peripheral_data,preset_settings)
+    def _done(result, error):
+        if isinstance(error, gen.GenerationCancelled):
+            return
+        if isinstance(error, config_schema.ConfigValidationError):
+            messagebox.showerror("Invalid Configuration", f"{error}\n\nNo files were changed."); return
+        if error is not None:
+            messagebox.showerror("Generation Error", str(error)); return
+        out_files, report = result
+        totals = report["totals"]
+        summary = (f"{len(report['stages_run'])} stage(s) run, {len(report['stages_skipped'])} skipped, "
+                   f"{totals['files_written']} file(s) written in {totals['wall_ms']:.0f} ms")
         if out_files:
-            messagebox.showinfo("Generation Complete", "Generated files:\n\n" + "\n".join(out_files))
+            messagebox.showinfo("Generation Complete", summary + "\n\nGenerated files:\n\n" + "\n".join(out_files))
         else:
             messagebox.showinfo("Generation Complete", "No files were reported. Check the console.")
-    except Exception as e:
-        messagebox.showerror("Generation Error", str(e))
+
+    task_window.run_task(app, "Generate Code", _work, _done)
 
 
 def get_pinout_config(app) -> dict:
@@ -313,6 +197,7 @@ def get_pinout_config(app) -> dict:
         })
 
     return {
+        "schema_version": config_schema.SCHEMA_VERSION,
         "project_name":   project_name,
         "microcontroller": micro,
         "gpio": gpio_entries,
@@ -326,7 +211,7 @@ def get_peripheral_settings(app) -> dict:
     settings = {}
     
     # Process all active I2C peripherals based on the pinout selection
-    active_i2c = {r['instance'] for r in app.selections if r['type'] == 'I2C'}
+    active_i2c = app.selections.instances("I2C")
     if active_i2c:
         settings["I2C"] = {}
         for inst_name in active_i2c:
@@ -342,7 +227,7 @@ def get_peripheral_settings(app) -> dict:
                 settings["I2C"][inst_name] = i2c_settings
 
     # Process all active UART peripherals based on the pinout selection.
-    active_uart = {r['instance'] for r in app.selections if r['type'] in ['UART', 'USART']}
+    active_uart = app.selections.instances(*selection_store.UART_TYPES)
     if active_uart:
         settings["UART"] = {}
         for inst_name in active_uart:
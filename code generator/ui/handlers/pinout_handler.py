@@ -1,6 +1,8 @@
 # ui/handlers/pinout_handler.py
 from tkinter import ttk, messagebox
+import data
 import utils
+import selection_store
 
 def on_type_change(app, event=None):
     t = app.cmb_type.get()
@@ -34,8 +36,9 @@ def on_role_change(app, event=None):
 
 def on_pin_change(app, event=None):
     t = app.cmb_type.get(); inst = app.cmb_inst.get(); pin = app.cmb_pin.get()
-    afs = app.mcu_data.get(f"{t.lower()}_af_mapping", {}).get(inst, {}); af_const = afs.get(pin, "")
+    af_const = data.pin_af(app.current_mcu, t, inst, pin)
     app.ent_af.delete(0, "end"); app.ent_af.insert(0, af_const)
+    if hasattr(app, "show_pin_functions"): app.show_pin_functions(pin)
     if not app.ent_label.get().strip(): app.ent_label.insert(0, f"{inst}_{app.cmb_role.get().upper()}")
 
 def add_row(app):
@@ -46,12 +49,15 @@ def add_row(app):
     if t != "GPIO" and (not app.cmb_inst.get() or not app.cmb_role.get()): messagebox.showwarning("Incomplete", "Please select instance and function."); return
     port, pin_num = utils.split_pin(pin_label)
     afn = app.ent_af.get().strip() or ""  # Store full AF constant string
-    app.selections.append({"type": t, "instance": "" if t=="GPIO" else app.cmb_inst.get(), "name": app.ent_label.get().strip() or "SIGNAL", "port": port, "pin": pin_num, "mode": app.cmb_mode.get(), "pull": app.cmb_pull.get(), "speed": app.cmb_speed.get(), "alternate_fn": afn})
+    app.selections.add({"type": t, "instance": "" if t=="GPIO" else app.cmb_inst.get(), "name": app.ent_label.get().strip() or "SIGNAL", "port": port, "pin": pin_num, "mode": app.cmb_mode.get(), "pull": app.cmb_pull.get(), "speed": app.cmb_speed.get(), "alternate_fn": afn})
     app.refresh_table(); app.ent_label.delete(0, "end"); app.update_peripheral_tabs_state()
 
 def del_selected(app):
     cur = app.tree.selection()
     if not cur: return
-    selected_values = app.tree.item(cur[0], "values"); port, pin_num_str = selected_values[3], selected_values[4]
-    app.selections = [r for r in app.selections if not (r['port'] == port and str(r['pin']) == pin_num_str)]
+    case_pins = getattr(app, "use_case_pins", {})
+    for iid in cur:
+        key = selection_store.iid_key(iid)
+        app.selections.remove(*key)
+        case_pins.pop(key, None)  # No longer the use case's: a later apply must not touch the pin
     app.refresh_table(); app.update_peripheral_tabs_state()
@@ -2,6 +2,9 @@
 from tkinter import messagebox
 import data
 import utils
+import selection_store
+import pin_allocator
+from generators import config_schema  # no jinja2; safe at startup
 
 # ============================ UI helpers ============================
 
@@ -62,15 +65,8 @@ def update_valid_outputs(app, event=None):
     
     selected_input = app.cmb_preset_input.get()
     
-    # Define valid outputs for each input type
-    output_rules = {
-        "Digital Input": ["Digital Output (LED)"],
-        "Potentiometer (ADC)": ["Digital Output (LED)", "UART"],
-        "GY-521 Sensor": ["LCD 20x4 (I2C)", "UART"],
-        "DHT11 Humidity & Temp Sensor": ["LCD 20x4 (I2C)", "UART"],
-    }
-    
-    valid_outputs = output_rules.get(selected_input, [])
+    # Valid outputs for each input type
+    valid_outputs = data.VALID_PRESET_COMBINATIONS.get(selected_input, [])
     
     if valid_outputs:
         current_selection = app.cmb_preset_output.get()
@@ -87,37 +83,46 @@ def update_valid_outputs(app, event=None):
 
 # ============================ Internal helpers ============================
 
-def _reset_ui_for_new_case(app):
-    """One case at a time mode: clears pin selection and zeros device lists in tabs."""
-    # Clear selected pinout
-    app.selections = []
-    # Clear tree if it exists
-    if hasattr(app, "tree") and app.tree is not None:
-        try:
-            app.tree.delete(*app.tree.get_children())
-        except Exception:
-            pass
-    # Clear I2C tab devices
+def _clear_i2c_devices(app):
+    """Zeros the device lists of the I2C tab (instance frames not built yet have none)."""
     if hasattr(app, "i2c_widgets"):
-        for _inst, w in app.i2c_widgets.items():
+        for _inst, w in app.i2c_widgets.built().items():
             tree = w.get("devices_tree")
             if tree:
                 for iid in tree.get_children():
                     tree.delete(iid)
-    # Reset config in memory (clear previous use case for "one at a time" mode)
+
+def _case_rows(app) -> dict:
+    """Returns the pins added by the applied use cases that still hold the case's row.
+
+    app.use_case_pins maps store keys to the rows the cases added; a pin the
+    user deleted or reassigned in the Detailed Pinout tab is no longer the
+    case's and is left alone.
+    """
+    return {key: row for key, row in getattr(app, "use_case_pins", {}).items()
+            if app.selections.get(*key) is row}
+
+def clear_use_cases(app):
+    """Removes every applied use case: its pins, the I2C device lists and the case list.
+
+    Pins added by hand in the Detailed Pinout tab are kept.
+    """
+    for key in _case_rows(app):
+        app.selections.remove(*key)
+    app.use_case_pins = {}
+    _clear_i2c_devices(app)
+    # Clear tree if it exists (synced, so its row cache stays consistent)
+    if hasattr(app, "refresh_table") and getattr(app, "tree", None) is not None:
+        app.refresh_table()
+    if hasattr(app, "update_peripheral_tabs_state"):
+        app.update_peripheral_tabs_state()
+    # Reset config in memory
     app.use_case_config = None
-    app.use_cases = []  # Clear list - only keep the new one
+    app.use_cases = []
 
 def _find_selection_by_pin(app, pin_str: str):
     """Returns the existing record in app.selections for this pin (or None)."""
-    try:
-        port, pin_num = utils.split_pin(pin_str)
-    except Exception:
-        port, pin_num = pin_str[:2], pin_str[2:]
-    for r in getattr(app, "selections", []):
-        if r.get("port") == port and str(r.get("pin")) == str(pin_num):
-            return r
-    return None
+    return app.selections.get_label(pin_str)
 
 def _safe_is_pin_used(app, pin_str: str) -> bool:
     """Uses app.is_pin_used if it exists; otherwise checks app.selections."""
@@ -151,7 +156,7 @@ def _add_pin_from_config(app, pin_config, parent_mapping) -> bool:
     port, pin_num = utils.split_pin(p_pin)
 
     # Don't duplicate in main table (normalize as string)
-    if any(r.get('port') == port and str(r.get('pin')) == str(pin_num) for r in app.selections):
+    if app.selections.get(port, pin_num) is not None:
         return False
 
     # Parent metadata
@@ -177,19 +182,16 @@ def _add_pin_from_config(app, pin_config, parent_mapping) -> bool:
 
     if p_type.upper() == "I2C":
         mode, pull, speed = "AF_OD", "PULLUP", "VERY_HIGH"
-        afs = app.mcu_data.get("i2c_af_mapping", {}).get(p_instance, {}) if hasattr(app, "mcu_data") else {}
-        afn = afs.get(p_pin, "")  # Store full AF constant like "GPIO_AF4_I2C1"
+        afn = data.pin_af(getattr(app, "current_mcu", ""), p_type, p_instance, p_pin)  # Full AF constant like "GPIO_AF4_I2C1"
 
     elif p_type.upper() in ("UART", "USART"):
         mode, pull, speed = "AF_PP", "NOPULL", "VERY_HIGH"
-        afs = app.mcu_data.get("uart_af_mapping", {}).get(p_instance, {}) if hasattr(app, "mcu_data") else {}
-        afn = afs.get(p_pin, "")  # Store full AF constant
+        afn = data.pin_af(getattr(app, "current_mcu", ""), p_type, p_instance, p_pin)  # Full AF constant
 
     elif p_type.upper() == "TIM":
         # PWM/TIM normally AF_PP
         mode, pull, speed = "AF_PP", "NOPULL", "HIGH"
-        afs = app.mcu_data.get("tim_af_mapping", {}).get(p_instance, {}) if hasattr(app, "mcu_data") else {}
-        afn = afs.get(p_pin, "")  # Store full AF constant
+        afn = data.pin_af(getattr(app, "current_mcu", ""), p_type, p_instance, p_pin)  # Full AF constant
 
     elif p_type.upper() == "ADC":
         # ADC pins must be in ANALOG mode
@@ -201,7 +203,7 @@ def _add_pin_from_config(app, pin_config, parent_mapping) -> bool:
         pull = parent_mapping.get("pull", pull)
 
     # Add to main list
-    app.selections.append({
+    app.selections.add({
         "type": p_type,
         "instance": p_instance,
         "name": p_label,
@@ -217,9 +219,9 @@ def _add_pin_from_config(app, pin_config, parent_mapping) -> bool:
 # ============================ Main flow ============================
 
 def apply_use_case(app):
-    """Applies the use case (one case at a time mode):
-      - Clears pinout/tabs before applying
-      - Adds pins from input+output presets
+    """Adds the selected use case to the ones already applied:
+      - Allocates pins for all applied cases at once (pin_allocator), moving
+        presets off pins/instances another case already uses
       - Allows pin sharing on the SAME I2C (same instance)
       - Populates I2C/UART tabs
       - Saves summary in app.use_case_config and accumulates in app.use_cases (for presets_generator)
@@ -241,12 +243,7 @@ def apply_use_case(app):
         return
     
     # Validate input/output combination
-    valid_combinations = {
-        "Digital Input": ["Digital Output (LED)"],
-        "Potentiometer (ADC)": ["Digital Output (LED)", "UART"],
-        "GY-521 Sensor": ["LCD 20x4 (I2C)", "UART"],
-        "DHT11 Humidity & Temp Sensor": ["LCD 20x4 (I2C)", "UART"],
-    }
+    valid_combinations = data.VALID_PRESET_COMBINATIONS
     
     if input_key in valid_combinations:
         valid_outputs = valid_combinations[input_key]
@@ -260,30 +257,74 @@ def apply_use_case(app):
             )
             return
 
+    # Sample period: same rules as the cases of preset_settings.json
+    period_text = (app.ent_sample_period.get().strip() if getattr(app, "ent_sample_period", None) else "")
+    sample_period = None
+    if period_text:
+        checked, errors = config_schema.check_case(
+            {"input_key": input_key, "output_key": output_key, "sample_period_ms": period_text})
+        if errors:
+            messagebox.showerror("Invalid Sample Period", "\n".join(errors))
+            return
+        sample_period = checked["sample_period_ms"]
+
     input_map  = maps.get(input_key, {})
     output_map = maps.get(output_key, {})
 
-    # One case at a time mode
-    _reset_ui_for_new_case(app)
-
-    # Pins to process
-    pins_to_process = []
-    if input_map:
-        for p in input_map.get("pins", [input_map]):
-            pins_to_process.append((p, input_map, input_key or "input"))
-    if output_map:
-        for p in output_map.get("pins", [output_map]):
-            pins_to_process.append((p, output_map, output_key or "output"))
-
-    # Add pins (no conflicts after reset)
-    added = []
-    for pin_cfg, parent_map, _owner in pins_to_process:
-        if _add_pin_from_config(app, pin_cfg, parent_map):
-            added.append(pin_cfg.get("pin_choice"))
+    # Allocate pins for every applied case plus the new one at once, so
+    # presets wanting the same pin (or instance) are moved apart.
+    previous = [c for c in getattr(app, "use_cases", []) if isinstance(c, dict)]
+    requests, owners = [], []  # owners[i] = (case index, "input"/"output")
+    for ci, (in_key, out_key) in enumerate([(c.get("input_key"), c.get("output_key")) for c in previous]
+                                           + [(input_key, output_key)]):
+        for side, key in (("input", in_key), ("output", out_key)):
+            if key and maps.get(key):
+                requests.append((key, maps[key])); owners.append((ci, side))
+
+    case_pins = _case_rows(app)
+    occupied = [f"P{port[-1]}{pin}" for (port, pin) in (selection_store.pin_key(r.get("port", ""), r.get("pin", "")) for r in app.selections)
+                if (port, pin) not in case_pins]
+    try:
+        assignments = pin_allocator.allocate(app.mcu_data, requests, occupied)
+    except pin_allocator.AllocationError as e:
+        messagebox.showerror("Pin Conflict", f"The use case cannot be added:\n\n{e}")
+        return
 
-    # Merge settings by instance
+    # Replace the pins of the previously applied cases with the new assignment
+    for key in case_pins:
+        app.selections.remove(*key)
+    _clear_i2c_devices(app)
+    app.use_case_pins = {}
+
+    added, moved, instances = [], [], {}
+    for a in assignments:
+        parent_map = requests[a.request][1]
+        if a.instance:
+            instances[owners[a.request]] = a.instance
+            parent_map = dict(parent_map, instance=a.instance)
+        pin_cfg = dict(a.config, pin_choice=a.pin, role=a.role or a.config.get("role", ""))
+        if _add_pin_from_config(app, pin_cfg, parent_map):
+            port, pin_num = utils.split_pin(a.pin)
+            app.use_case_pins[selection_store.pin_key(port, pin_num)] = app.selections.get(port, pin_num)
+            added.append(a.pin)
+        if a.preferred_pin and a.pin != a.preferred_pin:
+            moved.append(f"{requests[a.request][0]} {a.role or 'pin'}: {a.preferred_pin} -> {a.pin}")
+
+    # Previously applied cases keep their (possibly moved) instances up to date
+    for ci, case in enumerate(previous):
+        for side in ("input", "output"):
+            periph = case.get("peripheral_settings", {}).get(f"{side}_peripheral")
+            if periph and (ci, side) in instances:
+                periph["instance"] = instances[(ci, side)]
+
+    input_map = dict(input_map, instance=instances.get((len(previous), "input"), input_map.get("instance", "")))
+    output_map = dict(output_map, instance=instances.get((len(previous), "output"), output_map.get("instance", "")))
+
+    # Merge settings by instance (all applied cases, devices on a shared bus are combined)
+    all_maps = [dict(requests[i][1], instance=instances.get(owners[i], requests[i][1].get("instance", "")))
+                for i in range(len(requests))]
     settings_to_apply = {}
-    for p_map in (input_map, output_map):
+    for p_map in all_maps:
         if not p_map or "settings" not in p_map:
             continue
         inst = p_map.get("instance")
@@ -378,6 +419,8 @@ def apply_use_case(app):
             }
         }
     }
+    if sample_period is not None:
+        app.use_case_config["sample_period_ms"] = sample_period
 
     # Maintain a list of applied cases (history)
     if not hasattr(app, "use_cases"):
@@ -401,6 +444,8 @@ def apply_use_case(app):
         parts.append("Peripherals updated: " + ", ".join(sorted(set(updated_ifaces))))
     else:
         parts.append("No peripherals were updated (check the tabs).")
-    parts.append("Mode: One case at a time (previous pinout was cleared).")
+    if moved:
+        parts.append("Moved to avoid conflicts: " + "; ".join(moved))
+    parts.append(f"Use cases in project: {len(app.use_cases)}.")
 
     messagebox.showinfo("Preset Applied", "\n".join(parts))
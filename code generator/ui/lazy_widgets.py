@@ -0,0 +1,134 @@
+# lazy_widgets.py
+"""On-demand construction of notebook tabs and per-instance frames.
+
+The peripheral tabs used to build a full frame for every I2C/UART instance
+at startup. LazyInstances keeps the same app.<kind>_widgets / app.<kind>_frames
+dict interface, but an instance frame is only built the first time it is
+looked up (a handler fills it, the user opens its tab, ...). Membership
+tests and iteration cover every known instance without building anything;
+built() returns only what exists.
+
+Each instance also registers its stateful widgets (entries, comboboxes,
+buttons, ...) once, at build time. set_active() enables/disables those flat
+lists, and only for the instances whose active state changed, instead of
+walking every frame's widget tree with winfo_children() after each pinout
+change.
+"""
+from __future__ import annotations
+from collections.abc import Mapping
+from typing import Callable
+
+
+class _View(Mapping):
+    """Read-only dict view of one part (frame or widgets) of LazyInstances."""
+
+    def __init__(self, owner: "LazyInstances", part: int):
+        self._owner = owner
+        self._part = part
+
+    def __getitem__(self, name):
+        return self._owner.ensure(name)[self._part]
+
+    def __contains__(self, name) -> bool:
+        return name in self._owner.names
+
+    def __iter__(self):
+        return iter(self._owner.names)
+
+    def __len__(self) -> int:
+        return len(self._owner.names)
+
+    def built(self) -> dict:
+        """Returns {name: frame/widgets} of the instances built so far."""
+        return {name: parts[self._part] for name, parts in self._owner.instances.items()}
+
+
+class LazyInstances:
+    """Instance frames of one peripheral tab, built on first access.
+
+    Args:
+        names: Instance names in display order (e.g. ["I2C1", "I2C2"]).
+        build: build(name, row) -> (frame, widgets, stateful); creates the frame
+               of one instance at grid row `row`, so frames keep their order no
+               matter which one is built first. `stateful` lists the widgets
+               that set_active() enables/disables.
+        on_build: Optional on_build(name, frame), called after each build.
+    """
+
+    def __init__(self, names, build: Callable, on_build: Callable | None = None):
+        self.names = list(names)
+        self.instances: dict[str, tuple] = {}
+        self.stateful: dict[str, list] = {}
+        self._build = build
+        self.on_build = on_build
+        self.frames = _View(self, 0)
+        self.widgets = _View(self, 1)
+        self._active: set[str] | None = None    # Last set_active() argument
+        self._enabled: dict[str, bool] = {}     # State applied to each built instance
+
+    def ensure(self, name: str) -> tuple:
+        """Returns (frame, widgets) of an instance, building it if needed."""
+        parts = self.instances.get(name)
+        if parts is None:
+            if name not in self.names:
+                raise KeyError(name)
+            frame, widgets, stateful = self._build(name, self.names.index(name))
+            parts = self.instances[name] = (frame, widgets)
+            self.stateful[name] = list(stateful)
+            if self._active is not None:
+                self._apply(name, name in self._active)
+            if self.on_build:
+                self.on_build(name, frame)
+        return parts
+
+    def build_all(self):
+        for name in self.names:
+            self.ensure(name)
+
+    def set_active(self, active) -> list[str]:
+        """Enables the instances in `active` and disables the others.
+
+        Only built instances whose state changes are touched; instances built
+        later get their state on build. Returns the names that changed.
+        """
+        self._active = set(active)
+        changed = [name for name in self.instances
+                   if self._enabled.get(name) != (name in self._active)]
+        for name in changed:
+            self._apply(name, name in self._active)
+        return changed
+
+    def _apply(self, name: str, enabled: bool):
+        flag = "!disabled" if enabled else "disabled"
+        for widget in self.stateful[name]:
+            if hasattr(widget, "state"):   # ttk widgets
+                widget.state([flag])
+            else:
+                widget.configure(state="normal" if enabled else "disabled")
+        self._enabled[name] = enabled
+
+
+class LazyNotebook:
+    """Builds each notebook tab the first time it is shown.
+
+    Tabs are added with an empty frame; build(frame, app) runs on the first
+    <<NotebookTabChanged>> that selects the tab, or on ensure(frame).
+    """
+
+    def __init__(self, notebook, app):
+        self.notebook = notebook
+        self.app = app
+        self._builders: dict[str, Callable] = {}
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed, add="+")
+
+    def add(self, frame, text: str, build: Callable):
+        self.notebook.add(frame, text=text)
+        self._builders[str(frame)] = build
+
+    def ensure(self, frame):
+        build = self._builders.pop(str(frame), None)
+        if build is not None:
+            build(frame, self.app)
+
+    def _on_tab_changed(self, event=None):
+        self.ensure(self.notebook.select())
@@ -1,45 +1,60 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # main.py
+# Usage: python ui/main.py [--profile-startup [FILE]]
+# jinja2 and the generators package are only imported when code generation is
+# first requested (see file_handler.generate_files).
 
+import startup_profile
 import json
 import re
 import importlib
 import os
+import sys
 from collections import defaultdict
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinter import BooleanVar
+startup_profile.mark("import stdlib/tkinter")
 
 # Import custom modules
 import data
-import utils
+import selection_store
+from lazy_widgets import LazyNotebook
+from refresh_scheduler import RefreshScheduler
 import tab_gpio
 import tab_i2c
 import tab_uart
 import tab_presets
 # Import the new handler modules
 from handlers import use_case_handler, pinout_handler, file_handler
+startup_profile.mark("import app modules")
 
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
-        
+        startup_profile.mark("create Tk root")
+
         # --- Load initial data ---
         data.load_initial_mapping(); data.load_hal_mappings(); data.load_presets()
+        startup_profile.mark("load mappings")
 
         # --- Application State ---
         self.title("STM32 Config Generator")
         self.geometry("1150x740"); self.minsize(980, 620)
-        self.current_mcu = list(data.MCU_MAP.keys())[0]; self.mcu_data = data.MCU_MAP[self.current_mcu]
-        self.selections = []; self.use_case_config = None
-        self.i2c_frames = {}; self.uart_frames = {}
+        self.current_mcu = data.MCU_MAP.default; self.mcu_data = data.get_mcu(self.current_mcu)
+        self.selections = selection_store.SelectionStore(); self.use_case_config = None
+        # refresh_table()/update_peripheral_tabs_state() mark these dirty; they run once per event-loop turn
+        self.refresh = RefreshScheduler(self)
+        self.refresh.register("table", self._sync_table)
+        self.refresh.register("tabs", self._sync_peripheral_tabs_state)
 
         # --- UI Widget References ---
         self.cmb_preset_input: ttk.Combobox | None = None; self.cmb_preset_output: ttk.Combobox | None = None
         self.var_convert: BooleanVar | None = None
         self.ent_formula: ttk.Entry | None = None
         self.frm_threshold: ttk.Frame | None = None; self.ent_threshold: ttk.Entry | None = None
+        self.ent_sample_period: ttk.Entry | None = None
         self.cmb_type: ttk.Combobox | None = None; self.cmb_inst: ttk.Combobox | None = None
         self.cmb_role: ttk.Combobox | None = None; self.cmb_pin: ttk.Combobox | None = None
         self.ent_label: ttk.Entry | None = None; self.cmb_mode: ttk.Combobox | None = None
@@ -50,7 +65,7 @@ class App(tk.Tk):
         self._build_ui()
         self.refresh_mapping_view()
         self.update_peripheral_tabs_state()
-        pinout_handler.on_type_change(self)
+        startup_profile.mark("build UI")
 
         self.use_cases = []        # list of selected use cases
         self.last_use_case = None  # optional: reference to the last applied one
@@ -70,74 +85,90 @@ class App(tk.Tk):
         mid = ttk.Panedwindow(self, orient="horizontal"); mid.pack(fill="both", expand=True, padx=6, pady=6)
         left = ttk.Frame(mid, padding=6); mid.add(left, weight=1)
         ttk.Label(left, text="Available GPIOs").pack(anchor="w")
-        self.lst_gpio = tk.Listbox(left, height=20); self.lst_gpio.pack(fill="both", expand=True)
+        self.lst_gpio = tk.Listbox(left, height=20, exportselection=False); self.lst_gpio.pack(fill="both", expand=True)
+        self.lst_gpio.bind("<<ListboxSelect>>", self.on_gpio_select)
+
+        # --- "What can this pin do" panel (data.pin_functions) ---
+        frm_pin = ttk.LabelFrame(left, text="Pin functions", padding=4); frm_pin.pack(fill="x", pady=(6,0))
+        self.lbl_pin_usage = ttk.Label(frm_pin, text="Select a pin"); self.lbl_pin_usage.pack(anchor="w")
+        self.tree_pin_funcs = ttk.Treeview(frm_pin, columns=("type","instance","role","af"), show="headings", height=6)
+        for c, h, w in zip(("type","instance","role","af"), ("Type","Instance","Role","AF / Channel"), (50, 70, 50, 130)):
+            self.tree_pin_funcs.heading(c, text=h); self.tree_pin_funcs.column(c, width=w, anchor="w")
+        self.tree_pin_funcs.pack(fill="x")
         
-        # --- Notebook with tabs ---
+        # --- Notebook with tabs (each one is built the first time it is shown) ---
         notebook = ttk.Notebook(mid); mid.add(notebook, weight=2)
         tab_presets_frame = ttk.Frame(notebook, padding=6)
         tab_gpio_frame = ttk.Frame(notebook, padding=6)
         tab_i2c_frame = ttk.Frame(notebook, padding=6)
         tab_uart_frame = ttk.Frame(notebook, padding=6)
 
-        notebook.add(tab_presets_frame, text="Use Case Builder")
-        notebook.add(tab_gpio_frame, text="Detailed Pinout")
-        notebook.add(tab_i2c_frame, text="I2C")
-        notebook.add(tab_uart_frame, text="UART/USART")
-        
-        tab_presets.create_presets_tab(tab_presets_frame, self)
-        tab_gpio.create_gpio_tab(tab_gpio_frame, self)
-        tab_i2c.create_i2c_tab(tab_i2c_frame, self)
-        tab_uart.create_uart_tab(tab_uart_frame, self)
+        self.tabs = LazyNotebook(notebook, self)
+        self.tabs.add(tab_presets_frame, "Use Case Builder", tab_presets.create_presets_tab)
+        self.tabs.add(tab_gpio_frame, "Detailed Pinout", self._build_gpio_tab)
+        self.tabs.add(tab_i2c_frame, "I2C", tab_i2c.create_i2c_tab)
+        self.tabs.add(tab_uart_frame, "UART/USART", tab_uart.create_uart_tab)
+
+        # Instance frames of the peripheral tabs are built on demand, even before their tab is shown
+        tab_i2c.register_i2c_tab(tab_i2c_frame, self)
+        tab_uart.register_uart_tab(tab_uart_frame, self)
+        self.tabs.ensure(tab_presets_frame)
+
+    def _build_gpio_tab(self, frame, _app):
+        """Builds the 'Detailed Pinout' tab and shows the signals added before it existed."""
+        tab_gpio.create_gpio_tab(frame, self)
+        self.refresh_table(); pinout_handler.on_type_change(self)
 
     # --- METHODS THAT MANAGE THE APP'S STATE ---
 
     def is_pin_used(self, pin_label):
-        if not pin_label: return False
-        port, pin_num = utils.split_pin(pin_label)
-        return any(r['port'] == port and str(r['pin']) == str(pin_num) for r in self.selections)
+        return self.selections.is_used(pin_label)
 
     def refresh_table(self):
+        self.refresh.mark("table")
+
+    def _sync_table(self):
         if not self.tree: return
-        self.tree.delete(*self.tree.get_children())
-        for i, r in enumerate(self.selections):
-            self.tree.insert("", "end", iid=str(i), values=(
-                r.get("type",""),
-                r.get("instance",""),
-                r.get("name",""),
-                r.get("port",""),
-                r.get("pin",""),
-                r.get("mode",""),
-                r.get("pull",""),
-                r.get("speed",""),
-                r.get("alternate_fn",""),
-            ))
+        tab_gpio.sync_pinout_tree(self.tree, self.selections)
+
 
+    def on_gpio_select(self, event=None):
+        cur = self.lst_gpio.curselection()
+        if cur: self.show_pin_functions(self.lst_gpio.get(cur[0]))
+
+    def show_pin_functions(self, pin_label):
+        """Fills the 'Pin functions' panel from the reverse pin index."""
+        self.tree_pin_funcs.delete(*self.tree_pin_funcs.get_children())
+        funcs = data.pin_functions(self.current_mcu, pin_label)
+        for f in funcs:
+            self.tree_pin_funcs.insert("", "end", values=(f.type, f.instance, f.role, f.af or f.adc_channel))
+        used = self.selections.get_label(pin_label) if pin_label else None
+        usage = f"in use by {used.get('name','')} ({used.get('type','')})" if used else "free"
+        self.lbl_pin_usage.configure(text=f"{pin_label}: {usage}, {len(funcs)} alternate function(s)")
 
     def on_mcu_change(self, event=None):
         """Handles MCU selection change."""
-        self.current_mcu = self.cmb_mcu.get(); self.mcu_data = data.MCU_MAP[self.current_mcu]
-        self.refresh_mapping_view(); pinout_handler.on_type_change(self)
+        self.current_mcu = self.cmb_mcu.get(); self.mcu_data = data.get_mcu(self.current_mcu)  # Loads only this part
+        self.tree_pin_funcs.delete(*self.tree_pin_funcs.get_children()); self.lbl_pin_usage.configure(text="Select a pin")
+        self.refresh_mapping_view()
+        if self.cmb_type is not None: pinout_handler.on_type_change(self)
 
     def refresh_mapping_view(self):
         """Updates the available GPIO listbox."""
         self.lst_gpio.delete(0, "end"); [self.lst_gpio.insert("end", p) for p in self.mcu_data.get("gpio_pins", [])]
 
     def update_peripheral_tabs_state(self):
-        """Updates the enabled/disabled state of the peripheral tabs."""
-        self._update_i2c_tab_state(); self._update_uart_tab_state()
+        """Updates the enabled/disabled state of the peripheral tabs (on the next idle)."""
+        self.refresh.mark("tabs")
 
-    def _set_widget_state_recursive(self, parent_widget, state_flag):
-        for child in parent_widget.winfo_children():
-            if isinstance(child, (ttk.Combobox, ttk.Entry, ttk.Button, ttk.Checkbutton, tk.Text, ttk.Treeview)): child.state([state_flag])
-            if child.winfo_children(): self._set_widget_state_recursive(child, state_flag)
+    def _sync_peripheral_tabs_state(self):
+        self._update_i2c_tab_state(); self._update_uart_tab_state()
 
     def _update_i2c_tab_state(self):
-        active = {r['instance'] for r in self.selections if r['type'] == 'I2C'}
-        for name, frame in self.i2c_frames.items(): self._set_widget_state_recursive(frame, '!disabled' if name in active else 'disabled')
+        self.i2c_instances.set_active(self.selections.instances('I2C'))
 
     def _update_uart_tab_state(self):
-        active = {r['instance'] for r in self.selections if r['type'] in ['UART', 'USART']}
-        for name, frame in self.uart_frames.items(): self._set_widget_state_recursive(frame, '!disabled' if name in active else 'disabled')
+        self.uart_instances.set_active(self.selections.instances(*selection_store.UART_TYPES))
     
     # --- I2C DEVICE MANAGEMENT (These methods stay in the main App) ---
     def add_i2c_device(self, instance_name):
@@ -159,7 +190,25 @@ class App(tk.Tk):
         if not selected_item: messagebox.showwarning("No Item", "Please select a device to remove."); return
         tree.delete(selected_item)
 
+def _profile_startup(app, path):
+    """Reports the startup phases once the first window has been drawn, then exits."""
+    def _report():
+        startup_profile.mark("first window drawn")
+        generators_loaded = "generators.generate_all" in sys.modules
+        startup_profile.print_report(startup_profile.report({
+            "mapping_loads": dict(data.LOAD_STATS),
+            "generators_imported": generators_loaded,
+        }), path)
+        app.destroy()
+    app.update_idletasks()
+    app.after_idle(_report)
+
+
 if __name__ == "__main__":
     app = App()
+    if "--profile-startup" in sys.argv[1:]:
+        i = sys.argv.index("--profile-startup")
+        out = sys.argv[i + 1] if i + 1 < len(sys.argv) and not sys.argv[i + 1].startswith("-") else None
+        _profile_startup(app, out)
     app.mainloop()
 
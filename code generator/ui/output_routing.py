@@ -0,0 +1,88 @@
+# output_routing.py
+"""Per-thread print() capture.
+
+contextlib.redirect_stdout swaps sys.stdout for the whole process, so while a
+task captured its output, print() from the Tk main thread and from any other
+thread went into the task's log too. route() installs (once) a sys.stdout
+proxy that sends the writes of the calling thread to that thread's sink and
+the writes of every other thread to the real stdout.
+"""
+from __future__ import annotations
+import contextlib
+import sys
+import threading
+
+
+class LineWriter:
+    """File-like object calling `emit(line)` for every complete line written.
+
+    Writes are serialized, so lines from several threads are never mixed.
+    """
+
+    def __init__(self, emit):
+        self.emit = emit
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._partial += text
+            *lines, self._partial = self._partial.split("\n")
+        for line in lines:
+            self.emit(line)
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            partial, self._partial = self._partial, ""
+        if partial:
+            self.emit(partial)
+
+
+class _Router:
+    """sys.stdout replacement dispatching on the writing thread."""
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def _target(self):
+        return getattr(self.local, "sink", None) or self.default
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):  # encoding, isatty(), ...
+        return getattr(self._target(), name)
+
+
+_lock = threading.Lock()
+_router: _Router | None = None
+_users = 0
+
+
+@contextlib.contextmanager
+def route(sink):
+    """Sends the print() output of the calling thread to `sink` inside the block."""
+    global _router, _users
+    with _lock:
+        if _router is None:
+            _router = _Router(sys.stdout)
+            sys.stdout = _router
+        _users += 1
+        router = _router
+    previous = getattr(router.local, "sink", None)
+    router.local.sink = sink
+    try:
+        yield sink
+    finally:
+        router.local.sink = previous
+        with _lock:
+            _users -= 1
+            if not _users:
+                if sys.stdout is router:
+                    sys.stdout = router.default
+                _router = None
@@ -0,0 +1,349 @@
+# pin_allocator.py
+"""Conflict-free pin allocation for several preset use cases at once.
+
+presets.json gives every preset pin a preferred `pin_choice`, and several
+presets want the same pin (Digital Input and DHT11 both use PA1, PWM and
+I2C1 SCL share PA15). allocate() takes the preset mappings of all selected
+cases and finds pins for every one of them at once:
+
+  - Pins of one peripheral instance are placed together (a "group"): the
+    roles (scl/sda, tx/rx, ...) are taken from <type>_interfaces, the AF from
+    <type>_af_mapping. I2C groups on the same instance are merged, since
+    devices share the bus. If the preferred instance cannot be used, other
+    instances of the same type are tried.
+  - GPIO pins can go on any GPIO; ADC inputs on the pins of their channel.
+  - Pins and peripheral instances are bits of one occupancy bitset; the
+    search is a backtracking search that always expands the group with the
+    fewest remaining options and prunes when the remaining groups cannot
+    fit in the free pins.
+
+Preferred pins/instances are tried first, so a combination that already
+fits keeps its presets.json pins. Reserved pins (the SWD debug port and the
+board's fixed pins) are only given to an entry that names them as its
+pin_choice.
+"""
+from __future__ import annotations
+from collections import Counter
+from itertools import product
+from typing import NamedTuple
+
+import data
+
+# Types whose instances can be shared by several cases (devices on one bus).
+SHARED_BUS_TYPES = ("I2C",)
+
+# Pins never picked automatically: the SWD port used to flash and debug the
+# NUCLEO-G474RE, and the pins wired to its 32.768 kHz LSE crystal.
+RESERVED_PINS = {
+    "PA13": "SWDIO",
+    "PA14": "SWCLK",
+    "PB3":  "SWO",
+    "PC14": "OSC32_IN",
+    "PC15": "OSC32_OUT",
+}
+_AF_TYPES = ("I2C", "UART", "SPI", "TIM")
+
+
+class AllocationError(Exception):
+    """No conflict-free assignment exists (or the search gave up).
+
+    Attributes:
+        conflicts: Names of the requests the message is about.
+    """
+
+    def __init__(self, message: str, conflicts=()):
+        super().__init__(message)
+        self.conflicts = list(conflicts)
+
+
+class Assignment(NamedTuple):
+    """The pin given to one pin entry of a preset mapping."""
+    request: int        # Index of the request in allocate()'s `requests`
+    config: dict        # The preset pin entry ({"role", "pin_choice", ...})
+    type: str
+    instance: str       # Allocated instance ("" for GPIO)
+    role: str
+    pin: str
+    af: str
+    preferred_pin: str  # The entry's pin_choice ("" if none)
+
+
+class _Option(NamedTuple):
+    instance: str
+    pins: tuple         # ((role, pin, af), ...) in the group's role order
+    mask: int           # Pin bits | instance bit
+
+
+class _Group:
+    """Pins that must be placed together, with every way of placing them."""
+
+    def __init__(self, name: str, ptype: str, instance: str, roles: list[tuple[str, str]]):
+        self.name = name            # Owners, for messages ("GY-521 Sensor + LCD 20x4 (I2C)")
+        self.type = ptype
+        self.instance = instance    # Preferred instance
+        self.roles = roles          # [(role, preferred pin), ...]
+        self.entries: list[tuple[int, dict, str]] = []  # (request index, pin entry, role)
+        self.options: list[_Option] = []
+        self.reserved: set[str] = set()  # Reserved pins dropped from the options
+
+
+class _Bits:
+    """Bit numbers of pins and (type, instance) resources."""
+
+    def __init__(self, pins):
+        self.index = {pin: i for i, pin in enumerate(pins)}
+        self.n_pins = len(self.index)
+
+    def pin(self, pin: str) -> int:
+        return 1 << self.index.setdefault(pin, len(self.index))
+
+    def resource(self, key) -> int:
+        return 1 << self.index.setdefault(key, len(self.index))
+
+
+def _request_pins(mapping: dict) -> list[dict]:
+    return mapping.get("pins", [mapping])
+
+
+def _build_groups(requests: list[tuple[str, dict]]) -> list[_Group]:
+    groups: list[_Group] = []
+    shared: dict[tuple[str, str], _Group] = {}
+    for idx, (name, mapping) in enumerate(requests):
+        ptype = (mapping.get("type") or "GPIO").strip().upper()
+        ptype = "UART" if ptype == "USART" else ptype
+        instance = (mapping.get("instance") or "").strip()
+        pins = _request_pins(mapping)
+
+        if ptype in _AF_TYPES:
+            key = (ptype, instance)
+            group = shared.get(key) if ptype in SHARED_BUS_TYPES else None
+            if group is None:
+                roles = [((p.get("role") or "").lower(), p.get("pin_choice") or "") for p in pins]
+                group = _Group(name, ptype, instance, roles)
+                groups.append(group)
+                if ptype in SHARED_BUS_TYPES:
+                    shared[key] = group
+            elif name not in group.name.split(" + "):
+                group.name += f" + {name}"
+            for p in pins:
+                group.entries.append((idx, p, (p.get("role") or "").lower()))
+        else:
+            # GPIO and ADC: every pin entry is placed on its own
+            for p in pins:
+                group = _Group(name, ptype, instance, [(p.get("role") or "", p.get("pin_choice") or "")])
+                group.entries.append((idx, p, p.get("role") or ""))
+                groups.append(group)
+    return groups
+
+
+def _af_options(group: _Group, mcu_data: dict, af_index: dict, bits: _Bits, flexible: bool) -> list[_Option]:
+    interfaces = mcu_data.get(f"{group.type.lower()}_interfaces", {})
+    instances = [group.instance] if group.instance in interfaces else []
+    if flexible or not instances:
+        instances += sorted(i for i in interfaces if i != group.instance)
+    options = []
+    for inst in instances:
+        role_pins = {r.lower(): pins for r, pins in interfaces[inst].items()}
+        candidates = []
+        for role, preferred in group.roles:
+            pins = list(role_pins.get(role, []))
+            if preferred in pins:
+                pins.remove(preferred); pins.insert(0, preferred)
+            candidates.append(pins)
+        inst_bit = bits.resource((group.type, inst))
+        for combo in product(*candidates):
+            if len(set(combo)) != len(combo):
+                continue
+            mask = inst_bit
+            for pin in combo:
+                mask |= bits.pin(pin)
+            pins = tuple((role, pin, af_index.get((group.type, inst, pin), ""))
+                         for (role, _), pin in zip(group.roles, combo))
+            options.append(_Option(inst, pins, mask))
+    return options
+
+
+def _adc_options(group: _Group, mcu_data: dict, bits: _Bits) -> list[_Option]:
+    channels = mcu_data.get("adc_pin_mapping", {}).get(group.instance, {})
+    role, preferred = group.roles[0]
+    wanted = [role] if role in channels else list(channels)
+    options = [_Option(group.instance, ((ch, channels[ch], ""),), bits.pin(channels[ch])) for ch in wanted]
+    options.sort(key=lambda o: o.pins[0][1] != preferred)
+    return options
+
+
+def _gpio_options(group: _Group, mcu_data: dict, pin_index: dict, bits: _Bits) -> list[_Option]:
+    role, preferred = group.roles[0]
+    pins = list(mcu_data.get("gpio_pins", []))
+    # Preferred pin first, then the pins with the fewest alternate functions,
+    # to keep peripheral-capable pins free for the groups that need them.
+    pins.sort(key=lambda p: (p != preferred, len(pin_index.get(p, ()))))
+    return [_Option("", ((role, p, ""),), bits.pin(p)) for p in pins]
+
+
+def _search(groups: list[_Group], used: int, pin_mask: int, max_nodes: int) -> dict[int, _Option] | None:
+    """Backtracking over groups (fewest remaining options first). Returns {group id: option}."""
+    nodes = 0
+    failed: set[tuple[frozenset, int]] = set()
+
+    def rec(remaining: list[_Group], used: int) -> dict[int, _Option] | None:
+        nonlocal nodes
+        if not remaining:
+            return {}
+        nodes += 1
+        if nodes > max_nodes:
+            raise AllocationError(f"Pin allocation gave up after {max_nodes} search steps.",
+                                  [g.name for g in remaining])
+        state = (frozenset(id(g) for g in remaining), used)
+        if state in failed:
+            return None
+
+        best, best_opts, reachable = None, None, 0
+        instances: dict[str, set[str]] = {}   # type -> instances still usable
+        groups_of_type: Counter = Counter()
+        for g in remaining:
+            opts = [o for o in g.options if not o.mask & used]
+            if not opts:
+                failed.add(state)
+                return None
+            for o in opts:
+                reachable |= o.mask
+            if g.type in _AF_TYPES:
+                groups_of_type[g.type] += 1
+                instances.setdefault(g.type, set()).update(o.instance for o in opts)
+            if best is None or len(opts) < len(best_opts):
+                best, best_opts = g, opts
+        # Every group needs at least one free pin, and every peripheral group
+        # an instance, of its own
+        if (bin(reachable & pin_mask).count("1") < len(remaining)
+                or any(n > len(instances[t]) for t, n in groups_of_type.items())):
+            failed.add(state)
+            return None
+
+        rest = [g for g in remaining if g is not best]
+        for opt in best_opts:
+            result = rec(rest, used | opt.mask)
+            if result is not None:
+                result[id(best)] = opt
+                return result
+        failed.add(state)
+        return None
+
+    return rec(groups, used)
+
+
+def _drop_reserved(group: _Group, reserved) -> list[_Option]:
+    """Removes the options using a reserved pin the group did not ask for as its pin_choice."""
+    kept = []
+    for opt in group.options:
+        taken = {pin for (_, preferred), (_, pin, _) in zip(group.roles, opt.pins)
+                 if pin in reserved and pin != preferred}
+        if taken:
+            group.reserved |= taken
+        else:
+            kept.append(opt)
+    return kept
+
+
+def _prepare(mcu_data: dict, requests: list[tuple[str, dict]], occupied, flexible: bool, reserved=()):
+    pin_index, af_index = data.build_pin_index(mcu_data)
+    bits = _Bits(mcu_data.get("gpio_pins", []))
+    groups = _build_groups(requests)
+    for g in groups:
+        if g.type in _AF_TYPES:
+            g.options = _af_options(g, mcu_data, af_index, bits, flexible)
+        elif g.type == "ADC":
+            g.options = _adc_options(g, mcu_data, bits)
+        else:
+            g.options = _gpio_options(g, mcu_data, pin_index, bits)
+        if reserved:
+            g.options = _drop_reserved(g, reserved)
+    used = 0
+    for pin in occupied:
+        used |= bits.pin(pin)
+    pin_mask = (1 << bits.n_pins) - 1
+    return groups, used, pin_mask
+
+
+def allocate(mcu_data: dict, requests: list[tuple[str, dict]], occupied=(),
+             flexible_instances: bool = True, max_nodes: int = 100_000,
+             reserved: dict[str, str] = RESERVED_PINS) -> list[Assignment]:
+    """Finds a conflict-free pin for every pin entry of every request.
+
+    Args:
+        mcu_data: One part of the MCU database (data.get_mcu()).
+        requests: [(name, preset mapping), ...], e.g. the input and output
+                  mappings of every selected use case.
+        occupied: Pin labels ('PA5') already taken by other signals.
+        flexible_instances: Allow moving a peripheral to another instance of
+                            the same type when the preferred one does not fit.
+        max_nodes: Search step budget.
+        reserved: {pin label: function} of pins only used when an entry names
+                  them as its pin_choice.
+
+    Returns:
+        One Assignment per pin entry, in request order.
+
+    Raises:
+        AllocationError: With the requests that cannot be placed together.
+    """
+    groups, used, pin_mask = _prepare(mcu_data, requests, occupied, flexible_instances, reserved)
+
+    for g in groups:
+        skipped = ""
+        if g.reserved:
+            pins = ", ".join(f"{p} ({reserved[p]})" for p in sorted(g.reserved))
+            skipped = f" Reserved pins are not used unless chosen explicitly: {pins}."
+        if not g.options and g.reserved:
+            raise AllocationError(f"{g.name}: only reserved pins are left.{skipped}", [g.name])
+        if not g.options:
+            roles = ", ".join(r for r, _ in g.roles if r) or "pin"
+            raise AllocationError(f"{g.name}: no {g.type} {g.instance} pins for {roles} on this MCU.", [g.name])
+        if not any(not o.mask & used for o in g.options):
+            raise AllocationError(f"{g.name}: every candidate pin is already in use.{skipped}", [g.name])
+
+    result = _search(groups, used, pin_mask, max_nodes)
+    if result is None:
+        raise _explain(groups, requests, used, pin_mask, max_nodes)
+
+    assignments = []
+    for g in groups:
+        opt = result[id(g)]
+        by_role = {role: (pin, af) for role, pin, af in opt.pins}
+        for idx, entry, role in g.entries:
+            pin, af = by_role.get(role, opt.pins[0][1:])
+            assignments.append(Assignment(idx, entry, g.type, opt.instance, role, pin, af,
+                                          entry.get("pin_choice") or ""))
+    assignments.sort(key=lambda a: a.request)
+    return assignments
+
+
+def _names(names: list[str]) -> str:
+    return ", ".join(n if c == 1 else f"{n} (x{c})" for n, c in Counter(names).items())
+
+
+def _explain(groups, requests, used, pin_mask, max_nodes) -> AllocationError:
+    """Finds the first request that cannot be added to the ones before it.
+
+    Adding requests only adds constraints, so the shortest unsatisfiable
+    prefix of `requests` is found by bisection.
+    """
+    first = {id(g): min(idx for idx, _, _ in g.entries) for g in groups}
+
+    def fits(n: int) -> bool:
+        return _search([g for g in groups if first[id(g)] < n], used, pin_mask, max_nodes) is not None
+
+    lo, hi = 1, len(requests)  # fits(hi) is known to be False
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            lo = mid + 1
+        else:
+            hi = mid
+    name = requests[lo - 1][0]
+    others = [r[0] for r in requests[:lo - 1]]
+    if others:
+        msg = f"{name} cannot be placed together with: {_names(others)}."
+    else:
+        msg = f"{name} cannot be placed with the pins already in use."
+    return AllocationError(msg, others + [name])
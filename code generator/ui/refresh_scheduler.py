@@ -0,0 +1,54 @@
+# refresh_scheduler.py
+"""Coalesced UI refreshes on Tk's idle queue.
+
+Handlers used to call app.refresh_table() and app.update_peripheral_tabs_state()
+right after every change, so a bulk operation (applying a use case adds a
+row per pin, clearing several cases removes them) redrew the pinout table
+and re-ran the tab-state pass once per step. Now those calls only mark the
+view dirty; the first mark of an event-loop turn schedules one after_idle
+callback, which runs each dirty task once, after the handler has returned.
+"""
+from __future__ import annotations
+from typing import Callable
+
+
+class RefreshScheduler:
+    """Runs registered refresh tasks at most once per event-loop turn.
+
+    Args:
+        widget: Any Tk widget (its after_idle/after_cancel are used).
+    """
+
+    def __init__(self, widget):
+        self._widget = widget
+        self._tasks: dict[str, Callable[[], None]] = {}   # Run in registration order
+        self._dirty: set[str] = set()
+        self._after_id = None
+        self.runs: dict[str, int] = {}                    # Times each task ran
+
+    def register(self, name: str, task: Callable[[], None]):
+        self._tasks[name] = task
+        self.runs.setdefault(name, 0)
+
+    def mark(self, *names: str):
+        """Marks tasks dirty; they run once the current handler returns."""
+        for name in names:
+            if name not in self._tasks:
+                raise KeyError(name)
+            self._dirty.add(name)
+        if self._dirty and self._after_id is None:
+            self._after_id = self._widget.after_idle(self._run)
+
+    def flush(self):
+        """Runs the dirty tasks now (for code that needs the refreshed widgets right away)."""
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+        self._run()
+
+    def _run(self):
+        self._after_id = None
+        dirty, self._dirty = self._dirty, set()
+        for name, task in self._tasks.items():
+            if name in dirty:
+                task()
+                self.runs[name] += 1
@@ -0,0 +1,151 @@
+# selection_store.py
+"""Keyed store behind app.selections (the configured pinout rows).
+
+Rows are the same dicts as before ({"type","instance","name","port","pin",
+"mode","pull","speed","alternate_fn"}), keyed by (port, pin) with the pin
+normalized to a string, so 5 and "5" are the same pin. The store keeps
+secondary indexes by type and by instance up to date on every add/remove,
+so pin-occupancy checks and the "which instances are active" questions the
+tabs ask are dict lookups instead of passes over every row.
+
+Iteration, len(), truthiness and indexing behave like the old list (rows
+in insertion order), so read-only code that loops over app.selections keeps
+working unchanged.
+"""
+from __future__ import annotations
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+import utils
+
+# Types that share one set of "UART" peripheral settings/tabs.
+UART_TYPES = ("UART", "USART")
+
+
+def pin_key(port: str, pin) -> tuple[str, str]:
+    """Returns the store key of a pin: (port, pin number as string)."""
+    return port, str(pin)
+
+
+def label_key(pin_label: str) -> tuple[str, str]:
+    """Returns the store key of a pin label like 'PA5'."""
+    return pin_key(*utils.split_pin(pin_label))
+
+
+def row_iid(row: dict) -> str:
+    """Returns the stable Treeview iid of a row, e.g. 'GPIOA:5'."""
+    return ":".join(pin_key(row.get("port", ""), row.get("pin", "")))
+
+
+def iid_key(iid: str) -> tuple[str, str]:
+    """Inverse of row_iid(): returns the store key of a Treeview iid."""
+    port, _, pin = iid.partition(":")
+    return port, pin
+
+
+class SelectionStore:
+    """Pinout rows with O(1) lookup by (port, pin) and indexes by type and instance."""
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self._rows: dict[tuple[str, str], dict] = {}
+        # Secondary indexes; dicts used as insertion-ordered sets of keys
+        self._by_type: dict[str, dict[tuple[str, str], None]] = defaultdict(dict)
+        self._by_instance: dict[str, dict[tuple[str, str], None]] = defaultdict(dict)
+        # type -> instance -> number of rows, i.e. the active instances of each type
+        self._instances: dict[str, dict[str, int]] = defaultdict(dict)
+        for row in rows:
+            self.add(row)
+
+    # --- List-like read access ---
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._rows.values())
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        return list(self._rows.values())[index]
+
+    def __contains__(self, key) -> bool:
+        return key in self._rows
+
+    # --- Updates ---
+
+    def add(self, row: dict) -> bool:
+        """Adds a row. Returns False (and keeps the existing row) if its pin is already used."""
+        key = pin_key(row.get("port", ""), row.get("pin", ""))
+        if key in self._rows:
+            return False
+        self._rows[key] = row
+        self._index(key, row)
+        return True
+
+    append = add  # Old list API
+
+    def remove(self, port: str, pin) -> dict | None:
+        """Removes and returns the row of a pin (None if the pin is free)."""
+        key = pin_key(port, pin)
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._unindex(key, row)
+        return row
+
+    def update(self, port: str, pin, **fields) -> dict | None:
+        """Changes fields of a row in place, re-indexing it if type/instance change."""
+        key = pin_key(port, pin)
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        self._unindex(key, row)
+        row.update(fields)
+        self._index(key, row)
+        return row
+
+    def clear(self):
+        self._rows.clear(); self._by_type.clear(); self._by_instance.clear(); self._instances.clear()
+
+    # --- Lookups ---
+
+    def get(self, port: str, pin) -> dict | None:
+        """Returns the row of a pin, or None."""
+        return self._rows.get(pin_key(port, pin))
+
+    def get_label(self, pin_label: str) -> dict | None:
+        """Returns the row of a pin label like 'PA5', or None."""
+        return self._rows.get(label_key(pin_label))
+
+    def is_used(self, pin_label: str) -> bool:
+        return bool(pin_label) and label_key(pin_label) in self._rows
+
+    def by_type(self, *types: str) -> list[dict]:
+        """Returns the rows of the given peripheral type(s)."""
+        return [self._rows[key] for t in types for key in self._by_type.get(t, ())]
+
+    def by_instance(self, instance: str) -> list[dict]:
+        """Returns the rows of a peripheral instance (e.g. 'I2C1')."""
+        return [self._rows[key] for key in self._by_instance.get(instance, ())]
+
+    def instances(self, *types: str) -> set[str]:
+        """Returns the active instances of the given type(s), e.g. instances('I2C') -> {'I2C1'}."""
+        return {inst for t in types for inst in self._instances.get(t, ())}
+
+    # --- Index maintenance ---
+
+    def _index(self, key, row):
+        t, inst = row.get("type", ""), row.get("instance", "")
+        self._by_type[t][key] = None
+        if inst:
+            self._by_instance[inst][key] = None
+            counts = self._instances[t]
+            counts[inst] = counts.get(inst, 0) + 1
+
+    def _unindex(self, key, row):
+        t, inst = row.get("type", ""), row.get("instance", "")
+        self._by_type[t].pop(key, None)
+        if inst:
+            self._by_instance[inst].pop(key, None)
+            counts = self._instances[t]
+            counts[inst] -= 1
+            if not counts[inst]:
+                del counts[inst]
@@ -0,0 +1,49 @@
+# startup_profile.py
+"""Startup timing marks for `python ui/main.py --profile-startup`.
+
+main.py imports this module first and calls mark() after each startup phase
+(import groups, mapping loads, UI build, first idle). The marks are always
+recorded (a perf_counter call each); they are only reported when profiling.
+Interpreter start-up before main.py runs is not included; use
+`python -X importtime ui/main.py` for a per-module breakdown.
+"""
+from __future__ import annotations
+import json
+import platform
+import time
+
+_T0 = time.perf_counter()
+_last = _T0
+MARKS: list[tuple[str, float]] = []   # (phase, ms spent since the previous mark)
+
+
+def mark(phase: str):
+    """Records the time spent since the previous mark under `phase`."""
+    global _last
+    now = time.perf_counter()
+    MARKS.append((phase, (now - _last) * 1000))
+    _last = now
+
+
+def report(extra: dict | None = None) -> dict:
+    return {
+        "python": platform.python_version(),
+        "total_ms": round((_last - _T0) * 1000, 3),
+        "phases": [{"phase": phase, "ms": round(ms, 3)} for phase, ms in MARKS],
+        **(extra or {}),
+    }
+
+
+def print_report(rep: dict, path: str | None = None):
+    """Prints a report and, if `path` is given, writes it there as JSON."""
+    print(f"{'Startup phase':<28}{'ms':>10}")
+    for p in rep["phases"]:
+        print(f"{p['phase']:<28}{p['ms']:>10.2f}")
+    print(f"{'TOTAL':<28}{rep['total_ms']:>10.2f}")
+    for key, value in rep.items():
+        if key not in ("phases", "total_ms"):
+            print(f"{key}: {value}")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rep, f, indent=2)
+        print(f"Startup profile written to {path}")
@@ -3,11 +3,40 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import data
 from handlers import pinout_handler
-import utils
+import selection_store
+
+PINOUT_FIELDS = ("type", "instance", "name", "port", "pin", "mode", "pull", "speed", "alternate_fn")
+
+
+def sync_pinout_tree(tree: ttk.Treeview, rows):
+    """Brings the pinout Treeview in line with `rows` touching only what changed.
+
+    Each row is shown under its stable iid (selection_store.row_iid, one per
+    pin), so adding or removing a signal never renumbers the others. The
+    values last shown are cached on the tree to skip item() round-trips into
+    Tk for rows that did not change.
+    """
+    shown: dict[str, tuple] | None = getattr(tree, "_shown_rows", None)
+    if shown is None:
+        shown = tree._shown_rows = {}
+    wanted = {selection_store.row_iid(r): tuple(r.get(f, "") for f in PINOUT_FIELDS) for r in rows}
+
+    stale = [iid for iid in shown if iid not in wanted]
+    if stale:
+        tree.delete(*stale)
+        for iid in stale:
+            del shown[iid]
+    for iid, vals in wanted.items():
+        if iid not in shown:
+            tree.insert("", "end", iid=iid, values=vals)
+        elif shown[iid] != vals:
+            tree.item(iid, values=vals)
+        shown[iid] = vals
+
 
 def create_gpio_tab(parent_tab, app):
     """Creates the 'Detailed Pinout' tab and registers in app:
-      - app.selections (list of dicts that the handler populates)
+      - app.selections (SelectionStore of row dicts that the handler populates)
       - app.is_pin_used(pin_str)
       - app.refresh_table() -> renders app.selections in app.tree
       - app.remove_selected_pinout() (optional)
@@ -16,7 +45,7 @@ def create_gpio_tab(parent_tab, app):
 
     # ---------- Base state used by handler ----------
     if not hasattr(app, "selections"):
-        app.selections = []  # Each item: {"type","instance","name","port","pin","mode","pull","speed","alternate_fn"}
+        app.selections = selection_store.SelectionStore()  # Each item: {"type","instance","name","port","pin","mode","pull","speed","alternate_fn"}
 
     # --- Add peripheral / signal frame ---
     frm_add = ttk.LabelFrame(parent_tab, text="Detailed Pin Configuration", padding=8)
@@ -95,36 +124,15 @@ def create_gpio_tab(parent_tab, app):
 
     def is_pin_used(pin_str: str) -> bool:
         """Returns True if 'PA0' etc is already in app.selections."""
-        try:
-            port, pin_num = utils.split_pin(pin_str)
-        except Exception:
-            port, pin_num = pin_str[:2], pin_str[2:]
-        for r in app.selections:
-            if r.get("port") == port and str(r.get("pin")) == str(pin_num):
-                return True
-        return False
+        return app.selections.is_used(pin_str)
     app.is_pin_used = is_pin_used
 
-    def refresh_table():
-        """Re-renders app.selections in the Treeview.
-        
-        Converts 'alternate_fn' -> 'af' column.
-        """
-        app.tree.delete(*app.tree.get_children())
-        for r in app.selections:
-            vals = (
-                r.get("type",""),
-                r.get("instance",""),
-                r.get("name",""),
-                r.get("port",""),
-                r.get("pin",""),
-                r.get("mode",""),
-                r.get("pull",""),
-                r.get("speed",""),
-                r.get("alternate_fn",""),
-            )
-            app.tree.insert("", "end", values=vals)
-    app.refresh_table = refresh_table
+    # The App's refresh_table() (coalesced, see refresh_scheduler) is kept if present.
+    if not hasattr(app, "refresh_table"):
+        def refresh_table():
+            """Syncs the Treeview with app.selections ('alternate_fn' -> 'af' column)."""
+            sync_pinout_tree(app.tree, app.selections)
+        app.refresh_table = refresh_table
 
     # Some part of your app might call this; if it doesn't exist, it becomes a no-op.
     if not hasattr(app, "update_peripheral_tabs_state"):
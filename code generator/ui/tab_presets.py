@@ -34,6 +34,9 @@ def _set_locked_state(app, locked: bool):
     if app.ent_formula and app.ent_formula.winfo_exists():
         app.ent_formula.config(state="disabled" if locked or not app.var_convert.get() else "normal")
 
+    if app.ent_sample_period and app.ent_sample_period.winfo_exists():
+        app.ent_sample_period.config(state="disabled" if locked else "normal")
+
     # Threshold frame (only appears for LED/PWM)
     if app.frm_threshold and app.frm_threshold.winfo_exists():
         # Even when locked, we keep visible/hidden based on selection, but disable children
@@ -129,6 +132,11 @@ def create_presets_tab(parent_tab, app):
     app.ent_threshold.pack(fill="x")
     app.ent_threshold.insert(0, "2048")  # Default for 12-bit ADC (0-4095)
 
+    # Scheduler period of the case's task in main.c (empty: the default of its input/output type)
+    ttk.Label(frm_out, text="Run every (ms, empty for default):").pack(anchor="w", pady=(6, 0))
+    app.ent_sample_period = ttk.Entry(frm_out)
+    app.ent_sample_period.pack(fill="x")
+
     # ===================== 4) ACTIONS =====================
     btns = ttk.Frame(main)
     btns.pack(fill="x", pady=(10, 0))
@@ -149,6 +157,13 @@ def create_presets_tab(parent_tab, app):
     )
     app.btn_unlock_case.pack(side="left", padx=8)
 
+    # Clear (removes the pins of every applied use case)
+    ttk.Button(
+        btns,
+        text="Clear Use Cases",
+        command=lambda: (use_case_handler.clear_use_cases(app), _unlock_only(app)),
+    ).pack(side="left")
+
     # Initial state (handlers adjust visibility of threshold and formula, and filter valid outputs)
     use_case_handler.update_valid_outputs(app, None)  # Set valid outputs based on initial input
     use_case_handler.toggle_formula_field(app, None)
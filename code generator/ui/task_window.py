@@ -0,0 +1,142 @@
+# task_window.py
+import contextlib
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+from tkinter.scrolledtext import ScrolledText
+
+import output_routing
+
+POLL_MS = 50           # How often the UI drains the worker's message queue
+MAX_LINES_PER_POLL = 500
+
+
+class TaskWindow(tk.Toplevel):
+    """Runs a long task (generation, build/flash) on a worker thread.
+
+    The window shows the task output line by line, a progress bar fed by the
+    task, and a Cancel button that sets the threading.Event passed to the task.
+    Tk is only touched from the main thread: the worker posts messages to a
+    queue that is drained with after().
+    """
+
+    def __init__(self, app, title: str):
+        super().__init__(app)
+        self.app = app
+        self.title(title)
+        self.geometry("760x420")
+        self.transient(app)
+
+        self.cancel_event = threading.Event()
+        self.messages: queue.Queue = queue.Queue()
+        self.running = False
+
+        top = ttk.Frame(self, padding=6); top.pack(fill="x")
+        self.lbl_status = ttk.Label(top, text="Starting..."); self.lbl_status.pack(side="left")
+        self.btn_action = ttk.Button(top, text="Cancel", command=self._on_action); self.btn_action.pack(side="right")
+        self.progress = ttk.Progressbar(self, mode="determinate", maximum=1.0); self.progress.pack(fill="x", padx=6)
+        self.txt_log = ScrolledText(self, height=20, wrap="none", state="disabled", font=("Consolas", 9))
+        self.txt_log.pack(fill="both", expand=True, padx=6, pady=6)
+        self.protocol("WM_DELETE_WINDOW", self._on_action)
+
+    # --- Worker side (any thread) ---
+
+    def log(self, line: str):
+        self.messages.put(("log", line))
+
+    def report_progress(self, done: float, total: float, label: str):
+        self.messages.put(("progress", done, total, label))
+
+    def start(self, work, on_done, capture_stdout: bool = True):
+        """Starts `work(log, progress, cancel)` on a worker thread.
+
+        Args:
+            work: Callable returning the task result; may raise.
+            on_done: Called on the main thread as on_done(result, error).
+            capture_stdout: Also stream the worker thread's print() output into the
+                            log pane (other threads keep printing to the console;
+                            work that prints from threads of its own should send
+                            those lines to `log`).
+        """
+        self.running = True
+        self._on_done = on_done
+
+        def _worker():
+            result, error = None, None
+            writer = output_routing.LineWriter(self.log)
+            redirect = output_routing.route(writer) if capture_stdout else contextlib.nullcontext()
+            try:
+                with redirect:
+                    result = work(self.log, self.report_progress, self.cancel_event)
+            except Exception as e:
+                error = e
+            finally:
+                writer.flush()
+            self.messages.put(("done", result, error))
+
+        threading.Thread(target=_worker, daemon=True).start()
+        self.after(POLL_MS, self._poll)
+
+    # --- UI side (main thread) ---
+
+    def _append(self, lines: list[str]):
+        self.txt_log.configure(state="normal")
+        self.txt_log.insert("end", "\n".join(lines) + "\n")
+        self.txt_log.see("end")
+        self.txt_log.configure(state="disabled")
+
+    def _poll(self):
+        lines = []
+        try:
+            for _ in range(MAX_LINES_PER_POLL):
+                msg = self.messages.get_nowait()
+                if msg[0] == "log":
+                    lines.append(msg[1])
+                elif msg[0] == "progress":
+                    _, done, total, label = msg
+                    self.progress.configure(value=done / total if total else 0)
+                    self.lbl_status.configure(text=f"{label} ({min(done, total):.0f}/{total:.0f})")
+                elif msg[0] == "done":
+                    if lines:
+                        self._append(lines)
+                    self._finish(msg[1], msg[2])
+                    return
+        except queue.Empty:
+            pass
+        if lines:
+            self._append(lines)
+        self.after(POLL_MS, self._poll)
+
+    def _finish(self, result, error):
+        self.running = False
+        self.btn_action.configure(text="Close", state="normal")
+        if error is None:
+            self.progress.configure(value=1.0)
+            self.lbl_status.configure(text="Done")
+        else:
+            self.lbl_status.configure(text="Cancelled" if self.cancel_event.is_set() else "Failed")
+        self._on_done(result, error)
+
+    def _on_action(self):
+        if self.running:
+            self.cancel_event.set()
+            self.btn_action.configure(state="disabled")
+            self.lbl_status.configure(text="Cancelling...")
+        else:
+            self.destroy()
+
+
+def run_task(app, title: str, work, on_done, capture_stdout: bool = True) -> TaskWindow | None:
+    """Opens a TaskWindow and starts `work` in it. Only one task runs at a time.
+
+    Returns:
+        The new window, or None if another task is still running (it is raised instead).
+    """
+    current = getattr(app, "task_window", None)
+    if current is not None and current.winfo_exists() and current.running:
+        current.lift()
+        return None
+    app.task_window = TaskWindow(app, title)
+    app.task_window.start(work, on_done, capture_stdout)
+    return app.task_window